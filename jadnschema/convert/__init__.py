@@ -1,7 +1,7 @@
 """
 JADN Message & Schema conversion
 """
-from .message import Message, MessageType, SerialFormats
+from .message import Message, MessageReader, MessageStore, MessageType, MessageWriter, SerialFormats, TransferEncoding
 from .schema import *
 
 __all__ = [
@@ -38,6 +38,10 @@ __all__ = [
     "load", "loads",
     # Message Conversion
     "Message",
+    "MessageReader",
+    "MessageStore",
     "MessageType",
-    "SerialFormats"
+    "MessageWriter",
+    "SerialFormats",
+    "TransferEncoding"
 ]
@@ -1,9 +1,22 @@
 from .enums import MessageType
-from .message import Message
-from .serialize import SerialFormats
+from .message import LazyContent, Message, MessageReader, MessageWriter
+from .serialize import Compression, SerialFormats, TransferEncoding
+from .serialize.batch import decode_many, encode_many, iter_decode, iter_encode
+from .store import MessageStore, StoreEntry
 
 __all__ = [
+    "Compression",
+    "LazyContent",
     "Message",
+    "MessageReader",
+    "MessageStore",
     "MessageType",
-    "SerialFormats"
+    "MessageWriter",
+    "SerialFormats",
+    "StoreEntry",
+    "TransferEncoding",
+    "decode_many",
+    "encode_many",
+    "iter_decode",
+    "iter_encode"
 ]
@@ -1,14 +1,31 @@
-import struct
+import socket
 import uuid
 
-from datetime import datetime
-from io import BytesIO
+from datetime import datetime, timedelta, timezone
+from struct import Struct
 from textwrap import shorten
-from typing import List, Union
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Union
 from .enums import MessageType
-from .serialize import decode_msg, encode_msg, SerialFormats
+from .peek import peek_msg
+from .serialize import decode_msg, encode_msg, transfer_decode, Compression, SerialFormats, TransferEncoding
+from .serialize.compression import COMPRESSION_FLAGS, compress, decompress
+from .serialize.schema_cbor import SchemaCBOR
+from ...schema import Schema
 from ...utils import unixTimeMillis
 
+# Binary record framing, see `Message.dumps`
+RECORD_MAGIC = b"\xF5\xBE"  # §¥
+RECORD_VERSION = 1
+# magic, version, flags, size of the record following the prefix
+RECORD_PREFIX = Struct("!2sBBI")
+# flags of the compression of the content
+RECORD_COMPRESSION = 0x03
+_FLAG_COMPRESSION = {v: k for k, v in COMPRESSION_FLAGS.items()}
+# created (microseconds since epoch), request_id, size of msg_type, content_type & origin, recipient count, size of content
+RECORD_HEADER = Struct("!q16sBBHHI")
+RECIPIENT_SIZE = Struct("!H")
+EPOCH = datetime(1970, 1, 1)
+
 
 class Message:
     """
@@ -30,12 +47,14 @@ class Message:
     # Content_type application/openc2 identifies content defined by OpenC2 language specification versions 1.x, i.e.,
     # all versions that are compatible with version 1.0
     content_type: SerialFormats
-    # Message body as specified by serialization and msg_type
-    content: dict
+    # Message body as specified by serialization and msg_type, see `content`
+    _content: dict
+    # Encoded message body that has not been decoded yet, see `raw_content`
+    _lazy: Optional["LazyContent"]
 
-    __slots__ = ("recipients", "origin", "created", "msg_type", "request_id", "content_type", "content")
+    __slots__ = ("recipients", "origin", "created", "msg_type", "request_id", "content_type", "_content", "_lazy")
 
-    def __init__(self, recipients: Union[str, List[str]] = "", origin: str = "", created: datetime = None, msg_type: MessageType = None, request_id: uuid.UUID = None, content_type: SerialFormats = None, content: dict = None):
+    def __init__(self, recipients: Union[str, List[str]] = "", origin: str = "", created: datetime = None, msg_type: MessageType = None, request_id: uuid.UUID = None, content_type: SerialFormats = None, content: Union[dict, "LazyContent"] = None):
         self.recipients = (recipients if isinstance(recipients, list) else [recipients]) if recipients else []
         self.origin = origin
         self.created = created or datetime.utcnow()
@@ -45,12 +64,31 @@ class Message:
         self.content = content or {}
 
     def __setattr__(self, key: str, val):
-        val = self._validate_content(val) if key == "content" else val
+        if key == "content":
+            # lazy content is decoded and validated on first access
+            lazy = val if isinstance(val, LazyContent) else None
+            object.__setattr__(self, "_lazy", lazy)
+            object.__setattr__(self, "_content", None if lazy else self._validate_content(val))
+            return
         if key in self.__slots__:
             object.__setattr__(self, key, val)
             return
         raise AttributeError(f"Cannot set an unknown attribute of {key}")
 
+    @property
+    def content(self) -> dict:
+        # Message body as specified by serialization and msg_type
+        if self._lazy is not None:
+            # the loader is only dropped once the content is valid, invalid content raises on every access
+            object.__setattr__(self, "_content", self._validate_content(self._lazy.load()))
+            object.__setattr__(self, "_lazy", None)
+        return self._content
+
+    @property
+    def raw_content(self) -> Optional["LazyContent"]:
+        # Encoded message body, if it has not been accessed since the message was loaded
+        return self._lazy
+
     def __str__(self):
         msg = self.content.copy()
         if self.msg_type == MessageType.Request:
@@ -73,8 +111,19 @@ class Message:
         # message encoding
         return self.content_type.name
 
-    def serialize(self) -> Union[bytes, str]:
-        return self.oc2_message(serialize=True)
+    def serialize(self, compression: Compression = Compression.NONE, dictionary: bytes = None, schema: Union[Schema, SchemaCBOR] = None) -> Union[bytes, str]:
+        """
+        Serialize the OpenC2 message in its content_type
+        The compression is not marked in the serialized message, the receiver passes it to `Message.oc2_loads`
+        :param compression: compression of the serialized message, see `Message.oc2_loads`
+        :param dictionary: zlib preset dictionary, the receiver has to register it, see `compression.register_dictionary`
+        :param schema: schema of the content, see `encode_msg`
+        :return: serialized message
+        """
+        encoded = self.oc2_message(serialize=True, schema=schema)
+        if compression == Compression.NONE:
+            return encoded
+        return compress(encoded, compression, dictionary)
 
     # OpenC2 Specifics
     @property
@@ -99,34 +148,61 @@ class Message:
             }
         }
 
-    def oc2_message(self, serialize: bool = False) -> Union[bytes, dict, str]:
+    def oc2_message(self, serialize: bool = False, schema: Union[Schema, SchemaCBOR] = None) -> Union[bytes, dict, str]:
+        if serialize and (encoded := self._passthrough(self.content_type, envelope=True)) is not None:
+            return encoded
         msg = {
             "headers": self.oc2_headers,
             "body": self.oc2_body
             # signature??
         }
-        return encode_msg(msg, self.content_type, raw=True) if serialize else msg
+        return encode_msg(msg, self.content_type, raw=True, schema=schema) if serialize else msg
 
     @classmethod
-    def oc2_loads(cls, m: Union[bytes, dict, str], serial: SerialFormats) -> "Message":
-        msg = decode_msg(m, serial) #get human readable text
-            
-        #decoded msg into json, turn into pkt
-        #msg = Message('receiver---','origin---','crtd','msg_type','id---',serial,msg).oc2_message() 
-        #TODO: --- signifies info that may possibly come from the msg
-        
-        msg = Message(content_type=serial, content=msg).oc2_message() 
-        headers = msg.get("headers", {})
-        body = msg.get("body", None)
-        if body is None:
+    def oc2_loads(cls, m: Union[bytes, dict, str], serial: SerialFormats, lazy: bool = False, transfer_encoding: TransferEncoding = TransferEncoding.AUTO, compression: Compression = Compression.NONE, schema: Union[Schema, SchemaCBOR] = None) -> "Message":
+        """
+        Load an OpenC2 message
+        :param m: serialized message
+        :param serial: serialization of the message
+        :param lazy: defer decoding the body of the message until `content` is accessed, see `Message.peek`
+        :param transfer_encoding: encoding of the serialized message, see `decode_msg`
+        :param compression: compression of the serialized message, it is not detected, see `Message.serialize`
+        :param schema: schema of the content, see `decode_msg`
+        :return: loaded message
+        """
+        if compression != Compression.NONE and not isinstance(m, dict):
+            m, transfer_encoding = decompress(transfer_decode(m, transfer_encoding), compression), TransferEncoding.RAW
+        if lazy and not isinstance(m, dict):
+            return cls.peek(transfer_decode(m, transfer_encoding), serial, schema)
+        msg = decode_msg(m, serial, transfer_encoding=transfer_encoding, schema=schema)
+        if (body := msg.get("body", None)) is None:
             raise KeyError("Message is not properly formatted, `body` key is required")
+        msg_type, content = list(body["openc2"].items())[0]
+        return cls._from_oc2(msg.get("headers", {}), msg_type, serial, content)
 
+    @classmethod
+    def peek(cls, data: Union[bytes, bytearray, memoryview, str], serial: SerialFormats, schema: Union[Schema, SchemaCBOR] = None) -> "Message":
+        """
+        Load the headers of a raw serialized OpenC2 message without decoding the body
+        The body is decoded, for CBOR, JSON & MessagePack, when `content` is first accessed
+        :param data: raw serialized message
+        :param serial: serialization of the message
+        :param schema: schema of the content, see `decode_msg`
+        :return: message with deferred content
+        """
+        headers, msg_type, loader = peek_msg(data, serial, schema)
+        msg = cls._from_oc2(headers, msg_type, serial, LazyContent(data, serial, loader))
+        # re-serializing the untouched message in the same format returns the original data
+        msg.raw_content.envelope = (msg.oc2_headers, msg.msg_type)
+        return msg
+
+    @classmethod
+    def _from_oc2(cls, headers: dict, msg_type: str, serial: SerialFormats, content: Union[dict, "LazyContent"]) -> "Message":
         if created := headers.get("created", None):
             created = datetime.utcfromtimestamp(created / 1000.0)
         if request_id := headers.get("request_id", None):
             request_id = uuid.UUID(request_id)
 
-        msg_type = list(body["openc2"].keys())[0]
         return cls(
             recipients=headers.get("to", None),
             origin=headers.get("from", None),
@@ -134,56 +210,139 @@ class Message:
             msg_type=MessageType.from_value(msg_type),
             request_id=request_id,
             content_type=serial,
-            content=body["openc2"][msg_type]
+            content=content
         )
 
     # Dumper/Loader
-    def dump(self, file: Union[str, BytesIO]) -> None:
+    def dump(self, file: Union[str, BinaryIO]) -> None:
         if isinstance(file, str):
             with open(file, "wb") as f:
                 f.write(self.dumps())
-        elif isinstance(file, BytesIO):
+        elif hasattr(file, "write"):
             file.write(self.dumps())
-        raise TypeError(f"File is not expected string/BytesIO object, given {type(file)}")
-
-    def dumps(self) -> bytes:
-        return b"\xF5\xBE".join([  # §¥
-            b"\xF5\xBD".join(map(str.encode, self.recipients)),  # §¢
-            self.origin.encode(),
-            struct.pack("LI", *map(int, str(self.created.timestamp()).split("."))),
-            struct.pack("s", self.msg_type),
+        else:
+            raise TypeError(f"File is not expected string/file object, given {type(file)}")
+
+    def dumps(self, compression: Compression = Compression.NONE, dictionary: bytes = None) -> bytes:
+        """
+        Serialize the message as a length prefixed binary record
+        prefix - magic (2 bytes), version (1 byte), flags (1 byte), record size (4 bytes)
+        header - created (8 bytes), request_id (16 bytes), sizes of msg_type, content_type, origin, recipient count & content size
+        fields - msg_type, content_type, origin, size prefixed recipients, CBOR encoded content
+        The compression of the content is set in the flags, the ID of a zlib dictionary is part of the compressed content
+        :param compression: compression of the content
+        :param dictionary: zlib preset dictionary, it has to be registered by the reader, see `compression.register_dictionary`
+        :return: framed message
+        """
+        msg_type = self.msg_type.value.encode()
+        content_type = self.content_type.value.encode()
+        origin = (self.origin or "").encode()
+        recipients = b"".join(RECIPIENT_SIZE.pack(len(r)) + r for r in map(str.encode, self.recipients))
+        if (content := self._passthrough(SerialFormats.CBOR)) is None:
+            content = encode_msg(self.content, SerialFormats.CBOR, raw=True)
+        compression = Compression(compression)
+        if compression != Compression.NONE:
+            content = compress(content, compression, dictionary)
+        created = self.created
+        if created.tzinfo:
+            created = created.astimezone(timezone.utc).replace(tzinfo=None)
+        header = RECORD_HEADER.pack(
+            (created - EPOCH) // timedelta(microseconds=1),
             self.request_id.bytes,
-            struct.pack("s", self.content_type),
-            encode_msg(self.content, SerialFormats.CBOR, raw=True)
+            len(msg_type),
+            len(content_type),
+            len(origin),
+            len(self.recipients),
+            len(content)
+        )
+        size = len(header) + len(msg_type) + len(content_type) + len(origin) + len(recipients) + len(content)
+        return b"".join([
+            RECORD_PREFIX.pack(RECORD_MAGIC, RECORD_VERSION, COMPRESSION_FLAGS[compression], size),
+            header, msg_type, content_type, origin, recipients, content
         ])
 
     @classmethod
-    def load(cls, file: Union[str, BytesIO]) -> "Message":
+    def load(cls, file: Union[str, BinaryIO]) -> "Message":
         if isinstance(file, str):
             with open(file, "rb") as f:
-                return cls.loads(f.read())
-        elif isinstance(file, BytesIO):
-            return cls.loads(file.read())
-        raise TypeError(f"File is not expected string/BytesIO object, given {type(file)}")
+                return cls.load(f)
+        if hasattr(file, "readinto"):
+            if msg := MessageReader(file).read():
+                return msg
+            raise ValueError("The OpenC2 message was not properly loaded, no message record found")
+        raise TypeError(f"File is not expected string/file object, given {type(file)}")
 
     @classmethod
-    def loads(cls, m: bytes) -> "Message":
-        msg = m.split(b"\xF5\xBE")
-        if len(msg) != 7:
-            raise ValueError("The OpenC2 message was not properly loaded")
-        [recipients, origin, created, msg_type, request_id, serialization, content] = msg
+    def loads(cls, m: Union[bytes, bytearray, memoryview], lazy: bool = False) -> "Message":
+        """
+        Load a message from a single binary record, see `Message.dumps`
+        :param m: framed message
+        :param lazy: defer decoding the content until it is accessed, the record is referenced until then
+        :return: loaded message
+        """
+        record = memoryview(m)
+        size = record_size(record)
+        if len(record) != RECORD_PREFIX.size + size:
+            raise ValueError(f"The OpenC2 message was not properly loaded, expected {size} bytes got {len(record) - RECORD_PREFIX.size}")
+        return cls._from_record(record, lazy)
 
+    @classmethod
+    def _from_record(cls, record: memoryview, lazy: bool = False) -> "Message":
+        """
+        Load a message from a validated record, including the prefix
+        """
+        compression = _FLAG_COMPRESSION[record[3] & RECORD_COMPRESSION]
+        record = record[RECORD_PREFIX.size:]
+        created, request_id, *sizes, recipient_count, content_size = RECORD_HEADER.unpack_from(record)
+        offset = RECORD_HEADER.size
+        fields = []
+        for size in sizes:
+            fields.append(str(record[offset:offset + size], "utf-8"))
+            offset += size
+        msg_type, content_type, origin = fields
+
+        recipients = []
+        for _ in range(recipient_count):
+            size = RECIPIENT_SIZE.unpack_from(record, offset)[0]
+            offset += RECIPIENT_SIZE.size
+            recipients.append(str(record[offset:offset + size], "utf-8"))
+            offset += size
+
+        if offset + content_size != len(record):
+            raise ValueError("The OpenC2 message was not properly loaded, content size does not match the record")
+        content = record[offset:]
+        if compression != Compression.NONE:
+            content = decompress(content, compression)
         return cls(
-            recipients=list(filter(None, map(bytes.decode, recipients.split(b"\xF5\xBD")))),
-            origin=origin.decode(),
-            created=datetime.fromtimestamp(float(".".join(map(str, struct.unpack("LI", created))))),
-            msg_type=MessageType(struct.unpack("s", msg_type)[0]),
-            request_id=uuid.UUID(bytes=request_id),
-            content_type=SerialFormats.from_value(struct.unpack("s", serialization)[0]),
-            content=decode_msg(content, SerialFormats.CBOR, raw=True)
+            recipients=recipients,
+            origin=origin,
+            created=EPOCH + timedelta(microseconds=created),
+            msg_type=MessageType(msg_type),
+            request_id=uuid.UUID(bytes=bytes(request_id)),
+            content_type=SerialFormats.from_value(content_type),
+            content=LazyContent(content, SerialFormats.CBOR) if lazy else decode_msg(content, SerialFormats.CBOR, raw=True)
         )
 
     # Utility Functions
+    def _passthrough(self, serial: SerialFormats, envelope: bool = False) -> Optional[Union[bytes, bytearray, memoryview, str]]:
+        """
+        Get the original encoded data of the untouched lazy content, if it matches the requested encoding
+        :param serial: requested serialization
+        :param envelope: the complete OpenC2 message (headers & body) is requested, otherwise only the content
+        :return: encoded data or None if it has to be encoded
+        """
+        if (lazy := self._lazy) is None or lazy.serial != serial:
+            return None
+        if envelope != (lazy.envelope is not None):
+            return None
+        if envelope and lazy.envelope != (self.oc2_headers, self.msg_type):
+            return None
+        if not envelope:
+            return lazy.data
+        if SerialFormats.is_binary(serial):
+            return lazy.data.encode("utf-8") if isinstance(lazy.data, str) else bytes(lazy.data)
+        return lazy.data if isinstance(lazy.data, str) else str(lazy.data, "utf-8")
+
     def _validate_content(self, val: dict) -> dict:
         msg_keys = {*val.keys()}
         if self.msg_type == MessageType.Request:
@@ -197,3 +356,174 @@ class Message:
         else:
             print("Message property `msg_type` not set, cannot validate message")
         return val
+
+
+class LazyContent:
+    """
+    Encoded body of a message, decoded and validated on first access of `Message.content`
+    """
+    # Encoded data, the body or the complete OpenC2 message (see `envelope`)
+    data: Union[bytes, bytearray, memoryview, str]
+    # Serialization of the data
+    serial: SerialFormats
+    # Headers & message type at load when `data` is the complete OpenC2 message
+    envelope: Optional[tuple]
+    _loader: Callable[[], dict]
+
+    __slots__ = ("data", "serial", "envelope", "_loader")
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview, str], serial: SerialFormats, loader: Callable[[], dict] = None):
+        """
+        :param data: encoded data
+        :param serial: serialization of the data
+        :param loader: decoder of the body, defaults to decoding `data` as the body
+        """
+        self.data = data
+        self.serial = serial
+        self.envelope = None
+        self._loader = loader or (lambda: decode_msg(data, serial, raw=True))
+
+    def load(self) -> dict:
+        return self._loader()
+
+
+def record_size(prefix: Union[bytes, bytearray, memoryview]) -> int:
+    """
+    Validate the prefix of a binary message record and get the size of the record following it
+    :param prefix: data starting with a record prefix
+    :return: size of the record after the prefix
+    """
+    if len(prefix) < RECORD_PREFIX.size:
+        raise ValueError("The OpenC2 message was not properly loaded, record prefix is truncated")
+    magic, version, flags, size = RECORD_PREFIX.unpack_from(prefix)
+    if magic != RECORD_MAGIC:
+        raise ValueError("The OpenC2 message was not properly loaded, invalid record magic")
+    if version != RECORD_VERSION:
+        raise ValueError(f"The OpenC2 message record version {version} is not supported")
+    if flags & ~RECORD_COMPRESSION or (flags & RECORD_COMPRESSION) not in _FLAG_COMPRESSION:
+        raise ValueError(f"The OpenC2 message record flags {flags:#04x} are not supported")
+    return size
+
+
+class MessageReader:
+    """
+    Incrementally read framed messages (see `Message.dumps`) from a buffer, binary file or socket
+    Buffers are sliced without copying, streams are read one record at a time
+    """
+    _lazy: bool
+    _readinto: Optional[Callable[[memoryview], Optional[int]]]
+    _view: Optional[memoryview]
+    _offset: int
+
+    def __init__(self, source: Union[bytes, bytearray, memoryview, BinaryIO, socket.socket], lazy: bool = False):
+        """
+        :param source: buffer, binary file or socket to read from
+        :param lazy: defer decoding the message contents until they are accessed
+        """
+        self._lazy = lazy
+        self._readinto = self._view = None
+        self._offset = 0
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._view = memoryview(source)
+        elif hasattr(source, "recv_into"):
+            self._readinto = source.recv_into
+        elif hasattr(source, "readinto"):
+            self._readinto = source.readinto
+        else:
+            raise TypeError(f"Source is not expected buffer/file/socket object, given {type(source)}")
+
+    def __iter__(self) -> Iterator[Message]:
+        while msg := self.read():
+            yield msg
+
+    def read(self) -> Optional[Message]:
+        """
+        Read the next message
+        :return: message or None if the source is exhausted
+        """
+        if (record := self.read_record()) is None:
+            return None
+        return Message._from_record(record, self._lazy)  # pylint: disable=protected-access
+
+    def records(self) -> Iterator[memoryview]:
+        """
+        Iterate the raw message records, including the prefix, without decoding them
+        """
+        while (record := self.read_record()) is not None:
+            yield record
+
+    def read_record(self) -> Optional[memoryview]:
+        """
+        Read the next raw message record, including the prefix
+        :return: message record or None if the source is exhausted
+        """
+        if self._view is not None:
+            if self._offset == len(self._view):
+                return None
+            start = self._offset
+            end = start + RECORD_PREFIX.size + record_size(self._view[start:start + RECORD_PREFIX.size])
+            if end > len(self._view):
+                raise ValueError("The OpenC2 message was not properly loaded, record is truncated")
+            self._offset = end
+            return self._view[start:end]
+
+        prefix = bytearray(RECORD_PREFIX.size)
+        if not self._read_exact(memoryview(prefix), eof=True):
+            return None
+        record = bytearray(RECORD_PREFIX.size + record_size(prefix))
+        record[:RECORD_PREFIX.size] = prefix
+        view = memoryview(record)
+        self._read_exact(view[RECORD_PREFIX.size:])
+        return view
+
+    def _read_exact(self, view: memoryview, eof: bool = False) -> bool:
+        filled = 0
+        while filled < len(view):
+            if not (count := self._readinto(view[filled:])):
+                if eof and filled == 0:
+                    return False
+                raise ValueError("The OpenC2 message was not properly loaded, record is truncated")
+            filled += count
+        return True
+
+
+class MessageWriter:
+    """
+    Incrementally write framed messages (see `Message.dumps`) to a binary file or socket
+    """
+    compression: Compression
+    dictionary: Optional[bytes]
+    _write: Callable[[bytes], Optional[int]]
+
+    def __init__(self, sink: Union[BinaryIO, socket.socket], compression: Compression = Compression.NONE, dictionary: bytes = None):
+        """
+        :param sink: file or socket to write to
+        :param compression: compression of the message content, see `Message.dumps`
+        :param dictionary: zlib preset dictionary, the reader has to register it, see `compression.register_dictionary`
+        """
+        self.compression = Compression(compression)
+        self.dictionary = dictionary
+        if hasattr(sink, "sendall"):
+            self._write = sink.sendall
+        elif hasattr(sink, "write"):
+            self._write = sink.write
+        else:
+            raise TypeError(f"Sink is not expected file/socket object, given {type(sink)}")
+
+    def write(self, msg: Message) -> int:
+        """
+        Write the message as a single record
+        :param msg: message to write
+        :return: number of bytes written
+        """
+        record = msg.dumps(self.compression, self.dictionary)
+        self._write(record)
+        return len(record)
+
+    def write_many(self, msgs: Iterable[Message]) -> int:
+        """
+        Write the messages as consecutive records
+        :param msgs: messages to write
+        :return: number of bytes written
+        """
+        return sum(map(self.write, msgs))
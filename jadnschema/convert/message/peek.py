@@ -0,0 +1,182 @@
+"""
+Header-only decoding of serialized OpenC2 messages
+The headers and message type are decoded up front, the message body (content) is only decoded by the returned loader
+"""
+import json
+import cbor2
+import msgpack
+
+from functools import partial
+from io import BytesIO
+from json.decoder import scanstring
+from typing import Callable, Dict, Optional, Tuple, Union
+from .serialize import SerialFormats, decode_msg, normalize_msg
+from .serialize.schema_cbor import SchemaCBOR
+from ...schema import Schema
+
+__all__ = ["peek_msg"]
+Peeked = Tuple[dict, str, Callable[[], dict]]
+_json_decoder = json.JSONDecoder()
+_json_ws = " \t\n\r"
+
+
+def peek_msg(msg: Union[bytes, bytearray, memoryview, str], enc: SerialFormats, schema: Union[Schema, SchemaCBOR] = None) -> Peeked:
+    """
+    Decode the headers and message type of a raw serialized OpenC2 message
+    Formats without an incremental decoder are fully decoded
+    :param msg: raw serialized message
+    :param enc: serialization of the message
+    :param schema: schema of the content, see `decode_msg`
+    :return: headers, message type & body loader
+    """
+    enc = SerialFormats(enc.lower())
+    # the peekers don't convert schema Binary values, content decoded with a schema is fully decoded
+    if schema is None and (peeker := _peekers.get(enc)):
+        try:
+            if peeked := peeker(msg):
+                return peeked
+        except (IndexError, KeyError, TypeError, ValueError, cbor2.CBORDecodeError, msgpack.UnpackException):
+            pass
+    return _peek_decoded(decode_msg(msg, enc, raw=True, schema=schema))
+
+
+def _peek_decoded(msg: dict) -> Peeked:
+    """
+    Split a decoded message into headers, message type & body loader
+    """
+    if (body := msg.get("body", None)) is None:
+        raise KeyError("Message is not properly formatted, `body` key is required")
+    msg_type, content = next(iter(body["openc2"].items()))
+    return msg.get("headers", {}), msg_type, lambda: content
+
+
+def _loaded(enc: SerialFormats, headers: Optional[dict], msg_type: Optional[str], loader: Callable[[], dict]) -> Optional[Peeked]:
+    if msg_type is None:
+        return None
+    return normalize_msg(headers or {}, enc), msg_type, lambda: normalize_msg(loader(), enc)
+
+
+# JSON
+def _json_skip_ws(text: str, idx: int) -> int:
+    while text[idx] in _json_ws:
+        idx += 1
+    return idx
+
+
+def _json_expect(text: str, idx: int, char: str) -> int:
+    idx = _json_skip_ws(text, idx)
+    if text[idx] != char:
+        raise ValueError(f"Expected `{char}` at {idx}")
+    return idx + 1
+
+
+def _json_key(text: str, idx: int) -> Tuple[str, int]:
+    key, idx = scanstring(text, _json_expect(text, idx, '"'))
+    return key, _json_expect(text, idx, ":")
+
+
+def _peek_json(msg: Union[bytes, bytearray, memoryview, str]) -> Optional[Peeked]:
+    text = msg if isinstance(msg, str) else str(msg, "utf-8")
+    headers = msg_type = loader = None
+    idx = _json_expect(text, 0, "{")
+    while text[_json_skip_ws(text, idx)] != "}":
+        key, idx = _json_key(text, idx)
+        if key == "body" and headers is not None:
+            # headers already decoded, stop at the start of the content
+            key, idx = _json_key(text, _json_expect(text, idx, "{"))
+            if key != "openc2":
+                return None
+            msg_type, content_at = _json_key(text, _json_expect(text, idx, "{"))
+            loader = partial(_json_load, text, content_at)
+            break
+        value, idx = _json_decoder.raw_decode(text, _json_skip_ws(text, idx))
+        if key == "headers":
+            headers = value
+        elif key == "body":
+            _, msg_type, loader = _peek_decoded({"body": value})
+        if text[idx := _json_skip_ws(text, idx)] == ",":
+            idx += 1
+    return _loaded(SerialFormats.JSON, headers, msg_type, loader)
+
+
+def _json_load(text: str, offset: int) -> dict:
+    return _json_decoder.raw_decode(text, _json_skip_ws(text, offset))[0]
+
+
+# CBOR
+def _cbor_map_size(fp: BytesIO) -> int:
+    initial = fp.read(1)[0]
+    if initial >> 5 != 5:
+        raise ValueError("Expected a CBOR map")
+    if (info := initial & 0x1F) < 24:
+        return info
+    if info in (24, 25, 26, 27):
+        return int.from_bytes(fp.read(1 << (info - 24)), "big")
+    # indefinite length maps are fully decoded
+    raise ValueError("Unsupported CBOR map length")
+
+
+def _peek_cbor(msg: Union[bytes, bytearray, memoryview]) -> Optional[Peeked]:
+    fp = BytesIO(msg)
+    decoder = cbor2.CBORDecoder(fp)
+    headers = msg_type = loader = None
+    for _ in range(_cbor_map_size(fp)):
+        key = decoder.decode()
+        if key == "body" and headers is not None:
+            # headers already decoded, stop at the start of the content
+            if _cbor_map_size(fp) < 1 or decoder.decode() != "openc2" or _cbor_map_size(fp) < 1:
+                return None
+            msg_type = decoder.decode()
+            loader = partial(_cbor_load, msg, fp.tell())
+            break
+        value = decoder.decode()
+        if key == "headers":
+            headers = value
+        elif key == "body":
+            _, msg_type, loader = _peek_decoded({"body": value})
+    return _loaded(SerialFormats.CBOR, headers, msg_type, loader)
+
+
+def _cbor_load(msg: Union[bytes, bytearray, memoryview], offset: int) -> dict:
+    fp = BytesIO(msg)
+    fp.seek(offset)
+    return cbor2.CBORDecoder(fp).decode()
+
+
+# MessagePack
+def _peek_msgpack(msg: Union[bytes, bytearray, memoryview]) -> Optional[Peeked]:
+    unpacker = msgpack.Unpacker()
+    unpacker.feed(msg)
+    headers = msg_type = content_at = None
+    for _ in range(unpacker.read_map_header()):
+        key = unpacker.unpack()
+        if key == "headers":
+            headers = unpacker.unpack()
+        elif key == "body" and content_at is None:
+            body_size = unpacker.read_map_header()
+            if body_size < 1 or unpacker.unpack() != "openc2" or (openc2_size := unpacker.read_map_header()) < 1:
+                return None
+            msg_type = unpacker.unpack()
+            content_at = unpacker.tell()
+            if headers is not None:
+                break
+            # skip the rest of the body, the content is decoded later
+            for _ in range(1 + 2 * (openc2_size - 1) + 2 * (body_size - 1)):
+                unpacker.skip()
+        else:
+            unpacker.skip()
+
+    return _loaded(SerialFormats.MSGPACK, headers, msg_type, partial(_msgpack_load, msg, content_at))
+
+
+def _msgpack_load(msg: Union[bytes, bytearray, memoryview], offset: int) -> dict:
+    unpacker = msgpack.Unpacker()
+    unpacker.feed(memoryview(msg)[offset:])
+    return unpacker.unpack()
+
+
+_peekers: Dict[SerialFormats, Callable[[Union[bytes, bytearray, memoryview, str]], Optional[Peeked]]] = {
+    SerialFormats.CBOR: _peek_cbor,
+    SerialFormats.JSON: _peek_json,
+    SerialFormats.MSGPACK: _peek_msgpack
+}
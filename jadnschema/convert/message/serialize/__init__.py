@@ -11,22 +11,28 @@ import toml
 import ubjson
 import yaml
 
-from typing import Union
+from typing import Callable, Optional, Union
 from amazon.ion import simpleion as ion, simple_types as ion_types
-from . import pybinn, pysmile
-from .enums import SerialFormats
-from .helpers import bencode_encode, bencode_decode, sp_encode, sp_decode, xml_encode, xml_decode
-from ....utils import FrozenDict, default_encode, isBase64
+from . import pybinn, pysmile, schema_cbor
+from .compression import compress, decompress
+from .enums import Compression, SerialFormats, TransferEncoding
+from .helpers import bencode_encode, bencode_decode, null_encoders, sp_encode, sp_decode, xml_encode, xml_decode, xml_dump_stream, xml_load_stream
+from ....schema import Schema
+from ....utils import FrozenDict, default_encode, fromBase64
 
 try:
     from yaml import CLoader as Loader, CDumper as Dumper
 except ImportError:
     from yaml import Loader, Dumper
 __all__ = [
+    "Compression",
     "decode_msg",
     "encode_msg",
     "serializations",
-    "SerialFormats"
+    "SerialFormats",
+    "TransferEncoding",
+    "xml_dump_stream",
+    "xml_load_stream"
 ]
 
 
@@ -36,6 +42,7 @@ serializations = FrozenDict(
         bencode=bencode_encode,
         bson=bson.dumps,
         cbor=cbor2.dumps,
+        cbor_schema=schema_cbor.dumps,
         edn=edn_format.dumps,
         json=json.dumps,
         ion=lambda m: ion.dumps(m, binary=True),
@@ -52,6 +59,7 @@ serializations = FrozenDict(
         bencode=bencode_decode,
         bson=bson.loads,
         cbor=cbor2.loads,
+        cbor_schema=schema_cbor.loads,
         edn=edn_format.loads,
         json=json.loads,
         ion=ion.loads,
@@ -68,55 +76,180 @@ serializations = FrozenDict(
 extra_decoders = FrozenDict({
     # Builtin Types
     bytes: bytes.decode,
+    **null_encoders,
     # Serialization Types
-    ion_types.IonPyDict: dict,
+    ion_types.IonPyDict: lambda d: default_encode(dict(d), extra_decoders),  # nested values are also normalized
+    ion_types.IonPyNull: lambda n: None,
     edn_format.immutable_dict.ImmutableDict: dict
 })
 
+# `extra_decoders` that keep bytes, for the Binary values of schema-aware decoding
+binary_decoders = FrozenDict({
+    **extra_decoders,
+    bytes: bytes,
+    # nested values are also normalized, the content is located by key
+    ion_types.IonPyDict: lambda d: default_encode(dict(d), binary_decoders)
+})
+
+# Serializations that carry Binary values as native bytes in schema-aware mode
+native_binary = frozenset({
+    SerialFormats.BINN,
+    SerialFormats.BSON,
+    SerialFormats.CBOR,
+    SerialFormats.ION,
+    SerialFormats.MSGPACK,
+    SerialFormats.UBJSON
+})
 
-def encode_msg(msg: dict, enc: SerialFormats = SerialFormats.JSON, raw: bool = False) -> Union[bytes, str]:
+# Serializations with a null type, other serializations encode None as the string "None"
+null_types = frozenset({
+    SerialFormats.BINN,
+    SerialFormats.BSON,
+    SerialFormats.CBOR,
+    SerialFormats.CBOR_SCHEMA,
+    SerialFormats.EDN,
+    SerialFormats.ION,
+    SerialFormats.JSON,
+    SerialFormats.MSGPACK,
+    SerialFormats.UBJSON,
+    SerialFormats.XML,
+    SerialFormats.YAML
+})
+
+# Serializations whose decoder only produces types `default_encode` leaves unchanged, their output is not normalized
+native_decoders = frozenset({
+    SerialFormats.JSON
+})
+
+
+def encode_msg(msg: dict, enc: SerialFormats = SerialFormats.JSON, raw: bool = False, schema: Union[Schema, schema_cbor.SchemaCBOR] = None, compression: Compression = None, dictionary: Optional[bytes] = None) -> Union[bytes, str]:
     """
     Encode the given message using the serialization specified
+    The message is not copied before encoding, see `default_encode`
     :param msg: message to encode
     :param enc: serialization to encode
     :param raw: message is in raw form (bytes/string) or safe string (base64 bytes as string)
+    :param schema: schema of the message content, required by `cbor_schema`, Binary values are encoded as bytes by
+        binary serializations, a `schema_cbor.SchemaCBOR` gives the schema type of each message type
+    :param compression: compression of the encoded message, compressed messages are bytes, the compression is not
+        marked in the message so the receiver has to pass it to `decode_msg`
+    :param dictionary: zlib preset dictionary, see `compression.schema_dictionary`, the receiver has to register it
+    :return: encoded message
+    """
+    enc = serial_format(enc, serializations.encode)
+    return encode_with(serializations.encode[enc], msg, enc, raw, schema, compression, dictionary)
+
+
+def decode_msg(msg: Union[bytes, bytearray, memoryview, dict, str], enc: SerialFormats, raw: bool = False, transfer_encoding: TransferEncoding = None, schema: Union[Schema, schema_cbor.SchemaCBOR] = None, compression: Compression = None) -> dict:
+    """
+    Decode the given message using the serialization specified
+    :param msg: message to decode
+    :param enc: serialization to decode
+    :param raw: message is in raw form (bytes/string) or safe string (base64 bytes as string), see `transfer_encoding`
+    :param transfer_encoding: encoding of the message, defaults to `raw` if raw is set otherwise `auto`
+    :param schema: schema of the message content, required by `cbor_schema`, Binary values decoded as bytes are
+        converted to their string form, see `encode_msg`
+    :param compression: compression of the message, see `encode_msg`
+    :return: decoded message
+    """
+    if isinstance(msg, dict):
+        return msg
+    enc = serial_format(enc, serializations.decode)
+    transfer_encoding = transfer_encoding or (TransferEncoding.RAW if raw else TransferEncoding.AUTO)
+    return decode_with(serializations.decode[enc], msg, enc, transfer_encoding, schema, compression)
+
+
+# Shared by the single message functions and the batch classes, see `batch`
+def serial_format(enc: Union[SerialFormats, str], available: FrozenDict) -> SerialFormats:
+    """
+    Resolve the serialization of a message
+    :param enc: serialization name
+    :param available: serialization functions by name, `serializations.encode` or `serializations.decode`
+    :raise ReferenceError: unknown serialization
+    :return: serialization
+    """
+    name = (enc if isinstance(enc, str) else enc.value).lower()
+    if name not in available:
+        raise ReferenceError(f"Invalid encoding `{name}` specified, must be one of {', '.join(available.keys())}")
+    return SerialFormats(name)
+
+
+def encode_with(encoder: Callable[[dict], Union[bytes, str]], msg: dict, enc: SerialFormats, raw: bool = False, schema: Union[Schema, schema_cbor.SchemaCBOR] = None, compression: Compression = None, dictionary: Optional[bytes] = None) -> Union[bytes, str]:
+    """
+    Encode the given message with the encoder of its serialization, see `encode_msg`
+    :param encoder: function encoding a normalized message
     :return: encoded message
     """
     if not isinstance(msg, dict):
         raise TypeError(f"Message is not expected type {dict}, got {type(msg)}")
 
-    msg = default_encode(msg)
+    msg = default_encode(msg, null_encoders if enc in null_types else None)
     if len(msg.keys()) == 0:
         raise KeyError("Message should have at minimum one key")
 
-    enc = (enc if isinstance(enc, str) else enc.value).lower()
-    if encoder := serializations.encode.get(enc):
+    if enc == SerialFormats.CBOR_SCHEMA:
+        encoded = encoder(msg, schema)
+    else:
+        if schema is not None and enc in native_binary:
+            msg = schema_cbor.binary_content(msg, schema)
         encoded = encoder(msg)
-        if raw:
-            return encoded
-        return base64.b64encode(encoded).decode("utf-8") if isinstance(encoded, bytes) else encoded
-    raise ReferenceError(f"Invalid encoding `{enc}` specified, must be one of {', '.join(serializations.encode.keys())}")
+    if compression and compression != Compression.NONE:
+        encoded = compress(encoded, compression, dictionary)
+    if raw:
+        return encoded
+    return base64.b64encode(encoded).decode("utf-8") if isinstance(encoded, bytes) else encoded
 
 
-def decode_msg(msg: Union[bytes, dict, str], enc: SerialFormats, raw: bool = False) -> dict:
+def decode_with(decoder: Callable[[Union[bytes, str]], dict], msg: Union[bytes, bytearray, memoryview, dict, str], enc: SerialFormats, transfer_encoding: TransferEncoding, schema: Union[Schema, schema_cbor.SchemaCBOR] = None, compression: Compression = None) -> dict:
     """
-    Decode the given message using the serialization specified
-    :param msg: message to decode
-    :param enc: serialization to decode
-    :param raw: message is in raw form (bytes/string) or safe string (base64 bytes as string)
+    Decode the given message with the decoder of its serialization, see `decode_msg`
+    :param decoder: function decoding a raw message
     :return: decoded message
     """
     if isinstance(msg, dict):
         return msg
+    if not isinstance(msg, (bytes, bytearray, memoryview, str)):
+        raise TypeError(f"Message is not expected type {bytes}/{str}, got {type(msg)}")
+
+    msg = transfer_decode(msg, transfer_encoding)
+    if compression and compression != Compression.NONE:
+        msg = decompress(msg.encode("utf-8") if isinstance(msg, str) else msg, compression)
+        msg = msg if SerialFormats.is_binary(enc) else msg.decode("utf-8")
+    if isinstance(msg, (bytearray, memoryview)) and enc not in (SerialFormats.BINN, SerialFormats.CBOR, SerialFormats.MSGPACK):
+        # binary buffers are only copied when a decoder requires bytes
+        msg = bytes(msg)
 
-    if isinstance(msg, (bytes, str)):
-        if not raw and isBase64(msg):
-            msg = base64.b64decode(msg if isinstance(msg, bytes) else msg.encode())
-
-        msg = msg.encode("utf-8") if enc.is_binary(enc) and isinstance(msg, str) else msg
-        enc = (enc if isinstance(enc, str) else enc.value).lower()
-        if decoder := serializations.decode.get(enc):
-            msg = decoder(msg)
-            return default_encode(msg, extra_decoders)
-        raise ReferenceError(f"Invalid encoding `{enc}` specified, must be one of {', '.join(serializations.decode.keys())}")
-    raise TypeError(f"Message is not expected type {bytes}/{str}, got {type(msg)}")
+    msg = msg.encode("utf-8") if SerialFormats.is_binary(enc) and isinstance(msg, str) else msg
+    if enc == SerialFormats.CBOR_SCHEMA:
+        return normalize_msg(decoder(msg, schema), enc)
+    if schema is not None and enc in native_binary:
+        return schema_cbor.binary_content(default_encode(decoder(msg), binary_decoders), schema, to_bytes=False)
+    return normalize_msg(decoder(msg), enc)
+
+
+def transfer_decode(msg: Union[bytes, bytearray, memoryview, str], transfer_encoding: TransferEncoding) -> Union[bytes, bytearray, memoryview, str]:
+    """
+    Remove the transfer encoding of a serialized message
+    :param msg: message as transferred
+    :param transfer_encoding: encoding of the message, `auto` only decodes the message if it looks like base64
+    :return: raw serialized message
+    """
+    transfer_encoding = TransferEncoding(transfer_encoding)
+    if transfer_encoding == TransferEncoding.RAW:
+        return msg
+    if transfer_encoding == TransferEncoding.BASE64:
+        return base64.b64decode(msg)
+    decoded = fromBase64(msg)
+    return msg if decoded is None else decoded
+
+
+def normalize_msg(msg: dict, enc: SerialFormats) -> dict:
+    """
+    Normalize a decoded message to the default types, skipped for serializations that only decode to those types
+    :param msg: decoded message
+    :param enc: serialization the message was decoded from
+    :return: normalized message
+    """
+    if enc in native_decoders:
+        return msg
+    return default_encode(msg, extra_decoders)
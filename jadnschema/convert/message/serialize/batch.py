@@ -0,0 +1,272 @@
+"""
+Batch Message Serialization
+Encode/decode many messages with the same serialization, resolving the serialization and creating the encoder once
+"""
+import json
+import cbor2
+import msgpack
+
+from concurrent.futures import Executor
+from io import BytesIO
+from itertools import islice
+from struct import Struct
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Union
+from . import decode_with, encode_with, serial_format, serializations
+from .enums import Compression, SerialFormats, TransferEncoding
+from .pysmile.encode import SmileEncoder
+from ....schema import Schema
+
+__all__ = [
+    "BatchDecoder",
+    "BatchEncoder",
+    "decode_many",
+    "encode_many",
+    "iter_decode",
+    "iter_encode",
+    "iter_frames",
+    "write_frames"
+]
+Encoded = Union[bytes, str]
+# size of each message in a framed batch
+FRAME_SIZE = Struct("!I")
+
+
+# Reusable encoders
+def _cbor_encoder() -> Callable[[dict], bytes]:
+    fp = BytesIO()
+    encoder = cbor2.CBOREncoder(fp)
+
+    def encode(msg: dict) -> bytes:
+        fp.seek(0)
+        fp.truncate()
+        encoder.encode(msg)
+        return fp.getvalue()
+    return encode
+
+
+def _smile_encoder() -> Callable[[dict], bytes]:
+    encoder = SmileEncoder()
+
+    def encode(msg: dict) -> bytes:
+        encoder.reset()
+        return encoder.encode(msg)
+    return encode
+
+
+_encoders: Dict[SerialFormats, Callable[[], Callable[[dict], Encoded]]] = {
+    SerialFormats.CBOR: _cbor_encoder,
+    SerialFormats.JSON: lambda: json.JSONEncoder().encode,
+    SerialFormats.MSGPACK: lambda: msgpack.Packer(use_bin_type=True).pack,
+    SerialFormats.SMILE: _smile_encoder
+}
+
+
+class BatchEncoder:
+    """
+    Encode messages with a single serialization, reusing the encoder state between messages
+    """
+    enc: SerialFormats
+    raw: bool
+    schema: Optional[Schema]
+    compression: Optional[Compression]
+    dictionary: Optional[bytes]
+    _encoder: Callable[[dict], Encoded]
+
+    def __init__(self, enc: SerialFormats = SerialFormats.JSON, raw: bool = False, schema: Schema = None, compression: Compression = None, dictionary: bytes = None):
+        """
+        :param enc: serialization to encode
+        :param raw: message is in raw form (bytes/string) or safe string (base64 bytes as string)
+        :param schema: schema of the message content, see `encode_msg`
+        :param compression: compression of the encoded messages, see `encode_msg`
+        :param dictionary: zlib preset dictionary, see `compression.schema_dictionary`
+        """
+        self.enc = serial_format(enc, serializations.encode)
+        self.raw = raw
+        self.schema = schema
+        self.compression = compression
+        self.dictionary = dictionary
+        factory = _encoders.get(self.enc)
+        self._encoder = factory() if factory else serializations.encode[self.enc]
+
+    def encode(self, msg: dict) -> Encoded:
+        """
+        Encode the given message, see `encode_msg`
+        :param msg: message to encode
+        :return: encoded message
+        """
+        return encode_with(self._encoder, msg, self.enc, self.raw, self.schema, self.compression, self.dictionary)
+
+    def encode_all(self, msgs: Iterable[dict]) -> List[Encoded]:
+        return list(map(self.encode, msgs))
+
+
+class BatchDecoder:
+    """
+    Decode messages with a single serialization
+    """
+    enc: SerialFormats
+    transfer_encoding: TransferEncoding
+    schema: Optional[Schema]
+    compression: Optional[Compression]
+    _decoder: Callable[[Union[bytes, str]], dict]
+
+    def __init__(self, enc: SerialFormats = SerialFormats.JSON, raw: bool = False, transfer_encoding: TransferEncoding = None, schema: Schema = None, compression: Compression = None):
+        """
+        :param enc: serialization to decode
+        :param raw: message is in raw form (bytes/string) or safe string (base64 bytes as string), see `transfer_encoding`
+        :param transfer_encoding: encoding of the messages, defaults to `raw` if raw is set otherwise `auto`
+        :param schema: schema of the message content, see `decode_msg`
+        :param compression: compression of the messages, see `decode_msg`
+        """
+        self.enc = serial_format(enc, serializations.decode)
+        self.transfer_encoding = TransferEncoding(transfer_encoding or (TransferEncoding.RAW if raw else TransferEncoding.AUTO))
+        self.schema = schema
+        self.compression = compression
+        self._decoder = serializations.decode[self.enc]
+
+    def decode(self, msg: Union[bytes, bytearray, memoryview, str, dict]) -> dict:
+        """
+        Decode the given message, see `decode_msg`
+        :param msg: message to decode
+        :return: decoded message
+        """
+        return decode_with(self._decoder, msg, self.enc, self.transfer_encoding, self.schema, self.compression)
+
+    def decode_all(self, msgs: Iterable[Union[bytes, bytearray, memoryview, str]]) -> List[dict]:
+        return list(map(self.decode, msgs))
+
+
+# Framing
+def write_frames(encoded: Iterable[Encoded], fp: BinaryIO = None) -> Union[bytes, int]:
+    """
+    Write encoded messages as size prefixed frames
+    :param encoded: raw encoded messages
+    :param fp: file to write to, a single buffer is returned if not given
+    :return: framed messages or number of bytes written
+    """
+    out = BytesIO() if fp is None else fp
+    written = 0
+    for msg in encoded:
+        msg = msg.encode("utf-8") if isinstance(msg, str) else msg
+        out.write(FRAME_SIZE.pack(len(msg)))
+        out.write(msg)
+        written += FRAME_SIZE.size + len(msg)
+    return out.getvalue() if fp is None else written
+
+
+def iter_frames(data: Union[bytes, bytearray, memoryview, BinaryIO]) -> Iterator[memoryview]:
+    """
+    Iterate size prefixed frames, see `write_frames`
+    :param data: framed messages or a file of them
+    :return: raw encoded messages, buffers are sliced without copying
+    """
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        while prefix := data.read(FRAME_SIZE.size):
+            if len(prefix) != FRAME_SIZE.size:
+                raise ValueError("Framed message is truncated")
+            size = FRAME_SIZE.unpack(prefix)[0]
+            if len(frame := data.read(size)) != size:
+                raise ValueError("Framed message is truncated")
+            yield memoryview(frame)
+        return
+
+    view = memoryview(data)
+    offset = 0
+    while offset < len(view):
+        if offset + FRAME_SIZE.size > len(view):
+            raise ValueError("Framed message is truncated")
+        end = offset + FRAME_SIZE.size + FRAME_SIZE.unpack_from(view, offset)[0]
+        if end > len(view):
+            raise ValueError("Framed message is truncated")
+        yield view[offset + FRAME_SIZE.size:end]
+        offset = end
+
+
+# Batch APIs
+def iter_encode(msgs: Iterable[dict], enc: SerialFormats = SerialFormats.JSON, raw: bool = False, schema: Schema = None, compression: Compression = None, dictionary: bytes = None) -> Iterator[Encoded]:
+    """
+    Lazily encode the given messages using the serialization specified
+    :param msgs: messages to encode
+    :param enc: serialization to encode
+    :param raw: message is in raw form (bytes/string) or safe string (base64 bytes as string)
+    :param schema: schema of the message content, see `encode_msg`
+    :param compression: compression of the encoded messages, see `encode_msg`
+    :param dictionary: zlib preset dictionary, see `compression.schema_dictionary`
+    :return: encoded messages
+    """
+    return map(BatchEncoder(enc, raw, schema, compression, dictionary).encode, msgs)
+
+
+def iter_decode(msgs: Union[Iterable[Union[bytes, str]], bytes, bytearray, memoryview, BinaryIO], enc: SerialFormats, raw: bool = False, transfer_encoding: TransferEncoding = None, schema: Schema = None, compression: Compression = None) -> Iterator[dict]:
+    """
+    Lazily decode the given messages using the serialization specified
+    :param msgs: encoded messages or framed messages (see `encode_many`), framed messages are always raw
+    :param enc: serialization to decode
+    :param raw: message is in raw form (bytes/string) or safe string (base64 bytes as string)
+    :param transfer_encoding: encoding of the messages, see `decode_msg`
+    :param schema: schema of the message content, see `decode_msg`
+    :param compression: compression of the messages, see `decode_msg`
+    :return: decoded messages
+    """
+    if isinstance(msgs, (bytes, bytearray, memoryview)) or hasattr(msgs, "read"):
+        return map(BatchDecoder(enc, True, schema=schema, compression=compression).decode, iter_frames(msgs))
+    return map(BatchDecoder(enc, raw, transfer_encoding, schema, compression).decode, msgs)
+
+
+def encode_many(msgs: Iterable[dict], enc: SerialFormats = SerialFormats.JSON, raw: bool = False, framed: bool = False, executor: Executor = None, chunk_size: int = 256, schema: Schema = None, compression: Compression = None, dictionary: bytes = None) -> Union[List[Encoded], bytes]:
+    """
+    Encode the given messages using the serialization specified
+    :param msgs: messages to encode
+    :param enc: serialization to encode
+    :param raw: message is in raw form (bytes/string) or safe string (base64 bytes as string)
+    :param framed: return the raw messages as a single buffer of size prefixed frames
+    :param executor: thread/process pool to encode chunks of the messages with
+    :param chunk_size: number of messages per chunk submitted to the executor
+    :param schema: schema of the message content, see `encode_msg`
+    :param compression: compression of the encoded messages, see `encode_msg`
+    :param dictionary: zlib preset dictionary, see `compression.schema_dictionary`
+    :return: encoded messages or framed messages
+    """
+    args = (enc, raw or framed, schema, compression, dictionary)
+    if executor is None:
+        encoded = BatchEncoder(*args).encode_all(msgs)
+    else:
+        encoded = [m for chunk in executor.map(_encode_chunk, *_chunk_args(msgs, chunk_size, args)) for m in chunk]
+    return write_frames(encoded) if framed else encoded
+
+
+def decode_many(msgs: Union[Iterable[Union[bytes, str]], bytes, bytearray, memoryview], enc: SerialFormats, raw: bool = False, transfer_encoding: TransferEncoding = None, executor: Executor = None, chunk_size: int = 256, schema: Schema = None, compression: Compression = None) -> List[dict]:
+    """
+    Decode the given messages using the serialization specified
+    :param msgs: encoded messages or framed messages (see `encode_many`), framed messages are always raw
+    :param enc: serialization to decode
+    :param raw: message is in raw form (bytes/string) or safe string (base64 bytes as string)
+    :param transfer_encoding: encoding of the messages, see `decode_msg`
+    :param executor: thread/process pool to decode chunks of the messages with
+    :param chunk_size: number of messages per chunk submitted to the executor
+    :param schema: schema of the message content, see `decode_msg`
+    :param compression: compression of the messages, see `decode_msg`
+    :return: decoded messages
+    """
+    if isinstance(msgs, (bytes, bytearray, memoryview)):
+        # frames are copied, memoryviews cannot be sent to a process pool
+        msgs, transfer_encoding = [bytes(f) for f in iter_frames(msgs)] if executor else iter_frames(msgs), TransferEncoding.RAW
+    args = (enc, raw, transfer_encoding, schema, compression)
+    if executor is None:
+        return BatchDecoder(*args).decode_all(msgs)
+    return [m for chunk in executor.map(_decode_chunk, *_chunk_args(msgs, chunk_size, args)) for m in chunk]
+
+
+# Executor helpers, module level to allow use of process pools
+def _chunk_args(msgs: Iterable, chunk_size: int, args: tuple) -> tuple:
+    msgs = iter(msgs)
+    chunks = list(iter(lambda: list(islice(msgs, chunk_size)), []))
+    return chunks, [args] * len(chunks)
+
+
+def _encode_chunk(msgs: List[dict], args: tuple) -> List[Encoded]:
+    return BatchEncoder(*args).encode_all(msgs)
+
+
+def _decode_chunk(msgs: List[Union[bytes, str]], args: tuple) -> List[dict]:
+    return BatchDecoder(*args).decode_all(msgs)
@@ -0,0 +1,111 @@
+"""
+Message Compression
+zlib streams may use a preset dictionary, derived from a schema by `schema_dictionary`, the dictionary ID (adler32) is
+part of the zlib header so `decompress` finds the dictionary once the receiver registers it with `register_dictionary`
+Only the records of `Message.dumps` flag their compression, the receiver of `Message.serialize` or `encode_msg` output
+has to be given the compression, as it is not part of the message
+"""
+import lzma
+import zlib
+
+from typing import Callable, Dict, Iterator, Optional, Union
+from .enums import Compression, SerialFormats
+from ....schema import Schema
+
+__all__ = ["compress", "decompress", "register_dictionary", "schema_dictionary"]
+# keys of the OpenC2 message envelope, the most common strings are placed at the end of a dictionary
+ENVELOPE_KEYS = ("action", "target", "args", "status", "request", "response", "openc2", "body", "to", "from", "created", "request_id", "headers")
+# zlib window size, only the end of a longer dictionary is used
+MAX_DICTIONARY = 32 * 1024
+# record flags of each compression, see `Message.dumps`
+COMPRESSION_FLAGS = {Compression.NONE: 0x00, Compression.ZLIB: 0x01, Compression.LZMA: 0x02}
+_dictionaries: Dict[int, bytes] = {}
+
+
+def schema_dictionary(schema: Schema, serial: SerialFormats = SerialFormats.CBOR) -> bytes:
+    """
+    Create a zlib preset dictionary of the field names & enumerated values of a schema and the OpenC2 envelope keys
+    The words are serialized as strings, so the dictionary also matches the type & length bytes before them
+    The same schema always results in the same dictionary
+    :param schema: schema of the message content
+    :param serial: serialization of the compressed messages
+    :return: preset dictionary
+    """
+    words = dict.fromkeys(_schema_words(schema))
+    for key in ENVELOPE_KEYS:
+        words.pop(key, None)
+        words[key] = None
+    from . import serializations  # pylint: disable=import-outside-toplevel,cyclic-import
+    encoder = serializations.encode.get(SerialFormats(serial).value)
+    return b"".join(_encode_word(w, encoder) for w in words)[-MAX_DICTIONARY:]
+
+
+def register_dictionary(dictionary: bytes) -> int:
+    """
+    Register a preset dictionary for decompression, in the process of the receiver
+    Compressing with a dictionary does not register it
+    :param dictionary: preset dictionary
+    :return: ID of the dictionary, as written in the zlib header
+    """
+    dict_id = zlib.adler32(dictionary)
+    _dictionaries[dict_id] = dictionary
+    return dict_id
+
+
+def compress(data: Union[bytes, str], compression: Compression, dictionary: Optional[bytes] = None) -> bytes:
+    """
+    Compress a serialized message
+    :param data: serialized message
+    :param compression: compression to use
+    :param dictionary: zlib preset dictionary, the receiver has to register it, see `register_dictionary`
+    :return: compressed message
+    """
+    data = data.encode("utf-8") if isinstance(data, str) else data
+    compression = Compression(compression)
+    if compression == Compression.ZLIB:
+        if dictionary:
+            compressor = zlib.compressobj(zlib.Z_BEST_COMPRESSION, zdict=dictionary)
+        else:
+            compressor = zlib.compressobj(zlib.Z_BEST_COMPRESSION)
+        return compressor.compress(data) + compressor.flush()
+    if compression == Compression.LZMA:
+        return lzma.compress(data, preset=9 | lzma.PRESET_EXTREME)
+    return bytes(data)
+
+
+def decompress(data: Union[bytes, bytearray, memoryview], compression: Compression) -> bytes:
+    """
+    Decompress a serialized message, zlib preset dictionaries are found by the ID in the header
+    :param data: compressed message
+    :param compression: compression of the message
+    :raise KeyError: the preset dictionary of the message is not registered
+    :return: serialized message
+    """
+    compression = Compression(compression)
+    if compression == Compression.ZLIB:
+        # FDICT flag of the zlib header, followed by the dictionary ID
+        if len(data) >= 6 and data[1] & 0x20:
+            dict_id = int.from_bytes(data[2:6], "big")
+            if (dictionary := _dictionaries.get(dict_id)) is None:
+                raise KeyError(f"zlib preset dictionary {dict_id:#010x} is not registered, see `register_dictionary`")
+            decompressor = zlib.decompressobj(zdict=dictionary)
+            return decompressor.decompress(data) + decompressor.flush()
+        return zlib.decompress(data)
+    if compression == Compression.LZMA:
+        return lzma.decompress(data)
+    return bytes(data)
+
+
+def _encode_word(word: str, encoder: Optional[Callable[[str], Union[bytes, str]]]) -> bytes:
+    try:
+        encoded = encoder(word)
+    except Exception:  # pylint: disable=broad-except
+        # serializations that only encode a complete message
+        encoded = word
+    return encoded if isinstance(encoded, bytes) else encoded.encode("utf-8")
+
+
+def _schema_words(schema: Schema) -> Iterator[str]:
+    for type_def in schema.schema()["types"]:
+        for field in (type_def[4] if len(type_def) > 4 else []):
+            yield field[1]
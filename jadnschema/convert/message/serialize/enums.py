@@ -7,6 +7,7 @@ class SerialFormats(str, EnumBase):
     """
     # Binary Format
     CBOR = 'cbor'
+    CBOR_SCHEMA = 'cbor_schema'  # CBOR with the content encoded by its schema, the schema is given with the message, see `schema_cbor`
     # Text Format
     JSON = 'json'
     # Extra
@@ -31,4 +32,28 @@ class SerialFormats(str, EnumBase):
         Determine if the format is binary or text based
         :param fmt: Serialization
         """
-        return fmt in (cls.BINN, cls.BSON, cls.CBOR, cls.ION, cls.MSGPACK, cls.SMILE, cls.UBJSON)
+        return fmt in (cls.BINN, cls.BSON, cls.CBOR, cls.CBOR_SCHEMA, cls.ION, cls.MSGPACK, cls.SMILE, cls.UBJSON)
+
+
+class TransferEncoding(str, EnumBase):
+    """
+    The encoding of a serialized message in transit
+    """
+    # Serialized message as is
+    RAW = 'raw'
+    # Base64 encoded serialized message, safe string of a binary serialization
+    BASE64 = 'base64'
+    # Base64 if the message looks like base64, otherwise raw
+    AUTO = 'auto'
+
+
+class Compression(str, EnumBase):
+    """
+    The compression of a serialized message, see `compression.compress`
+    """
+    # Serialized message as is
+    NONE = 'none'
+    # zlib (deflate), with a preset dictionary if one is given, for small messages on constrained links
+    ZLIB = 'zlib'
+    # xz (LZMA2), for archival
+    LZMA = 'lzma'
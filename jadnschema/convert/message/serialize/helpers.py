@@ -1,13 +1,17 @@
 """
 Serialization encode/decode helper functions
 """
+import re
 import bencode
-import collections
 import sexpdata
-import xmltodict
 
-from typing import Any, Union
-from ....utils import check_values, default_encode, floatString
+from io import BytesIO
+from typing import Any, BinaryIO, Iterable, Iterator, Optional, Union
+from lxml import etree  # pylint: disable=E0611
+from ....utils import default_encode, floatString
+
+# `default_encode` encoders of serializations with a null type, None is kept rather than converted to a string
+null_encoders = {type(None): lambda n: n}
 
 
 # Message Conversion helpers for Bencode
@@ -61,40 +65,114 @@ def sp_decode(msg: str) -> dict:
 
 
 # Message Conversion helpers for XML
-def _xml_root(msg: dict) -> Union[dict, str]:
-    """
-    Get the message or determine the root key
-    :param msg: message to find the root
-    :return: root of message
-    """
-    if "command" in msg:
-        return msg.get("command", {})
-
-    if "response" in msg:
-        return msg.get("response", {})
-
-    if "action" in msg:
-        return "command"
-
-    if "status" in msg:
-        return "response"
-
-    return msg
-
-
-def _xml_to_dict(xml: dict) -> dict:
-    """
-    Convert XML data to a dict
-    :param xml: XML data to convert
-    :return: dict repr of given XML
-    """
-    tmp = {}
-    for k, v in xml.items():
-        k = k[1:] if k.startswith(("@", "#")) else k
-        if k in tmp:
-            raise KeyError(f"Duplicate key from `attr_prefix` or `cdata_key` - {k}")
-        tmp[k] = _xml_to_dict(v) if isinstance(v, collections.OrderedDict) else check_values(v)
-    return tmp
+_XML_BOOLS = {"true": True, "false": False}
+_XML_NUMBER = re.compile(r"(\d+)(\.\d+)?")
+_XML_PARSE_OPTS = {"resolve_entities": False, "no_network": True}
+# lists of zero or one item are marked with their length, repeated elements are read as a list otherwise
+_XML_NS = "urn:jadn:xml"
+_XML_LIST = f"{{{_XML_NS}}}list"
+_XML_PARSER = etree.XMLParser(**_XML_PARSE_OPTS)
+_XML_DECLARATION = b'<?xml version="1.0" encoding="utf-8"?>\n'
+
+
+def _xml_value(text: Optional[str]) -> Any:
+    """
+    Convert the text of a leaf element to a bool, int or float
+    Converting "false" to False is a behaviour fix, `safe_cast(bool)` of the previous decoder turned "false" into True
+    :param text: text of the element
+    :return: converted/original value
+    """
+    if text is None:
+        return None
+    if (val := _XML_BOOLS.get(text.lower())) is not None:
+        return val
+    if match := _XML_NUMBER.fullmatch(text):
+        return float(text) if match.group(2) else int(text)
+    return text
+
+
+def _xml_text(val: Any) -> str:
+    if isinstance(val, bool):
+        return "true" if val else "false"
+    return val if isinstance(val, str) else str(val)
+
+
+def _xml_write(xf: etree.xmlfile, key: str, val: Any) -> None:
+    """
+    Write the value as an element, lists are written as repeated elements
+    """
+    if isinstance(val, (list, tuple)):
+        if len(val) > 1:
+            for v in val:
+                _xml_write(xf, key, v)
+            return
+        # a single element can not be told from a value, mark the length
+        attrib, nsmap = {_XML_LIST: str(len(val))}, {"jadn": _XML_NS}
+        val = val[0] if val else None
+    else:
+        attrib, nsmap = {}, None
+    with xf.element(key, attrib, nsmap=nsmap):
+        if isinstance(val, dict):
+            for k, v in val.items():
+                _xml_write(xf, k, v)
+        elif val is not None:
+            xf.write(_xml_text(val))
+
+
+def _xml_add(parent: dict, key: str, val: Any) -> None:
+    if key not in parent:
+        parent[key] = val
+    elif isinstance(parent[key], list):
+        parent[key].append(val)
+    else:
+        parent[key] = [parent[key], val]
+
+
+def _xml_element(elem: etree.ElementBase) -> Any:
+    """
+    Convert a parsed XML element to its value, repeated child elements are converted to a list
+    :param elem: element to convert
+    :return: dict of the children & attributes or the value of a leaf element
+    """
+    attrib = [(k, v) for k, v in elem.attrib.items() if k != _XML_LIST]
+    if len(elem) == 0 and not attrib:
+        text = elem.text.strip() if elem.text else None
+        return _xml_value(text or None)
+    rtn = {}
+    for child in elem:
+        if not isinstance(child.tag, str):
+            continue
+        if (length := child.get(_XML_LIST)) is not None:
+            rtn[child.tag] = [_xml_element(child)] if length == "1" else []
+        else:
+            _xml_add(rtn, child.tag, _xml_element(child))
+    for key, val in attrib:
+        if key in rtn:
+            raise KeyError(f"Duplicate key from an attribute - {key}")
+        rtn[key] = _xml_value(val)
+    return rtn
+
+
+def _xml_iterparse(source: Union[BinaryIO, str], tag: str) -> Iterator[dict]:
+    """
+    Incrementally convert the outermost `tag` elements of an XML document, converted elements are released
+    :param source: file or path of the XML document
+    :param tag: tag of the elements to convert
+    :return: dict of each element
+    """
+    depth = 0
+    for event, elem in etree.iterparse(source, events=("start", "end"), tag=tag, **_XML_PARSE_OPTS):
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 0:
+            val = _xml_element(elem)
+            yield val if isinstance(val, dict) else {}
+            # release the converted element and the elements before it
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
 
 
 def xml_encode(msg: dict) -> str:
@@ -103,13 +181,49 @@ def xml_encode(msg: dict) -> str:
     :param msg: message to convert
     :return: XML formatted message
     """
-    return xmltodict.unparse({"message": msg})
+    buf = BytesIO(_XML_DECLARATION)
+    buf.seek(0, 2)
+    with etree.xmlfile(buf, encoding="utf-8") as xf:
+        _xml_write(xf, "message", msg)
+    return buf.getvalue().decode("utf-8")
 
 
-def xml_decode(msg: str) -> dict:
+def xml_decode(msg: Union[bytes, str]) -> dict:
     """
     Decode the given message to JSON format
     :param msg: message to convert
     :return: JSON formatted message
     """
-    return _xml_to_dict(xmltodict.parse(msg))["message"]
+    root = etree.fromstring(msg.encode("utf-8") if isinstance(msg, str) else msg, _XML_PARSER)
+    if root.tag != "message":
+        raise KeyError(f"XML message root should be `message`, not `{root.tag}`")
+    rtn = _xml_element(root)
+    return rtn if isinstance(rtn, dict) else {}
+
+
+def xml_dump_stream(msgs: Iterable[dict], fp: BinaryIO) -> int:
+    """
+    Write the messages to a single XML document of `message` elements, the messages are written as they are iterated
+    :param msgs: messages to write
+    :param fp: file to write to
+    :return: number of messages written
+    """
+    count = 0
+    fp.write(_XML_DECLARATION)
+    with etree.xmlfile(fp, encoding="utf-8") as xf:
+        with xf.element("messages"):
+            for msg in msgs:
+                _xml_write(xf, "message", default_encode(msg, null_encoders))
+                xf.flush()
+                count += 1
+    return count
+
+
+def xml_load_stream(fp: Union[BinaryIO, str]) -> Iterator[dict]:
+    """
+    Incrementally read the messages of an XML document, see `xml_dump_stream`
+    Only the message being read is held in memory
+    :param fp: file or path of the XML document
+    :return: messages in the document
+    """
+    return _xml_iterparse(fp, "message")
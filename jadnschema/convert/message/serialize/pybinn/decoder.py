@@ -1,132 +1,180 @@
 """
 Implementation of BINNDecoder
 """
-import io
-
 from datetime import datetime, timedelta
-from functools import partial
-from struct import unpack
 from typing import (
+    Any,
     Callable,
     Dict,
-    Union
+    Tuple
 )
 
 from . import datatypes as types
+from .encoder import FLOAT64, INT8, INT16, INT32, INT64, UINT16, UINT32, UINT64, VARINT32
+
+# BINN type byte -> precompiled struct for fixed size values
+_FIXED = {
+    types.BINN_INT8[0]: INT8,
+    types.BINN_UINT16[0]: UINT16,
+    types.BINN_INT16[0]: INT16,
+    types.BINN_UINT32[0]: UINT32,
+    types.BINN_INT32[0]: INT32,
+    types.BINN_UINT64[0]: UINT64,
+    types.BINN_INT64[0]: INT64,
+    types.BINN_FLOAT64[0]: FLOAT64
+}
+_CONSTANTS = {
+    types.BINN_TRUE[0]: True,
+    types.BINN_FALSE[0]: False,
+    types.BINN_NULL[0]: None
+}
+_UINT8 = types.BINN_UINT8[0]
+_STRING = types.BINN_STRING[0]
+_OBJECT = types.BINN_OBJECT[0]
+
+
+def _from_varint(buffer: memoryview, offset: int) -> Tuple[int, int]:
+    value = buffer[offset]
+    if value & 0x80:
+        return VARINT32.unpack_from(buffer, offset)[0] & 0x7FFFFFFF, offset + 4
+    return value, offset + 1
 
 
 class BINNDecoder:
     """
     BINN <https://github.com/liteserver/binn> decoder for Python
+    Values are unpacked directly from a memoryview of the data using an offset cursor
+    Given `fp`, the whole remainder of the stream is read into memory before decoding
     """
-    _decoders: Dict[bytes, Callable]
+    _decoders: Dict[int, Callable[['BINNDecoder', memoryview, int], Tuple[Any, int]]]
+    _offset: int
 
     def __init__(self, buffer=None, fp=None, *custom_decoders):  # pylint: disable=keyword-arg-before-vararg
         if buffer:
-            self._buffer = io.BytesIO(buffer)
+            self._buffer = memoryview(buffer)
         if fp:
-            self._buffer = fp
+            # the remainder of the stream is read once, consecutive `decode` calls continue from the cursor
+            self._buffer = memoryview(fp.read())
+        self._offset = 0
         self._custom_decoders = custom_decoders
 
-        self._decoders = {
-            types.BINN_STRING: self._decode_str,
-            types.BINN_UINT8: partial(self._unpack, 'B', 1),
-            types.BINN_INT8: partial(self._unpack, 'b', 1),
-            types.BINN_UINT16: partial(self._unpack, 'H', 2),
-            types.BINN_INT16:  partial(self._unpack, 'h', 2),
-            types.BINN_UINT32:  partial(self._unpack, 'I', 4),
-            types.BINN_INT32: partial(self._unpack, 'i', 4),
-            types.BINN_UINT64: partial(self._unpack, 'L', 8),
-            types.BINN_INT64: partial(self._unpack, 'l', 8),
-            types.BINN_FLOAT64: partial(self._unpack, 'd', 8),
-            types.BINN_BLOB:self._decode_bytes,
-            types.BINN_DATETIME: self._decode_datetime,
-            types.BINN_LIST: self._decode_list,
-            types.BINN_OBJECT: self._decode_dict,
-            types.BINN_MAP: self._decode_dict,
-            types.PYBINN_MAP: self._decode_dict,
-            types.BINN_TRUE: lambda: True,
-            types.BINN_FALSE: lambda: False,
-            types.BINN_NULL: lambda: None
-        }
-
     def decode(self):
         """
         Decode date from buffer
         """
-        binntype = self._buffer.read(1)
-        decoder = self._decoders.get(binntype, None)
-        if decoder and binntype in (types.BINN_OBJECT, types.BINN_MAP, types.PYBINN_MAP):
-            return decoder(binntype)
+        if self._offset >= len(self._buffer):
+            raise TypeError("Invalid data format: b''")
+        value, self._offset = self._decode(self._buffer, self._offset)
+        return value
 
-        if decoder:
-            return decoder()
+    def _decode(self, buffer: memoryview, offset: int) -> Tuple[Any, int]:
+        """
+        Decode the value starting at the given offset
+        :param buffer: data to decode
+        :param offset: position of the value type byte
+        :return: decoded value and position after the value
+        """
+        binntype = buffer[offset]
+        offset += 1
+        # Most common types first
+        if binntype == _STRING:
+            size = buffer[offset]
+            if size & 0x80:
+                size, offset = _from_varint(buffer, offset)
+            else:
+                offset += 1
+            # Skip null terminator byte to advance position
+            end = offset + size
+            return str(buffer[offset:end], 'utf8'), end + 1
+        if binntype == _UINT8:
+            return buffer[offset], offset + 1
+        if binntype == _OBJECT:
+            return self._decode_object(buffer, offset)
+        if codec := _FIXED.get(binntype):
+            return codec.unpack_from(buffer, offset)[0], offset + codec.size
+        if binntype in _CONSTANTS:
+            return _CONSTANTS[binntype], offset
+        if decoder := self._decoders.get(binntype):
+            return decoder(self, buffer, offset)
 
         # if type was not found, try using custom decoders
+        binntype = bytes((binntype, ))
         for decoder in self._custom_decoders:
             if not issubclass(type(decoder), CustomDecoder):
                 raise TypeError("Type {} is not CustomDecoder.")
             if binntype == decoder.datatype:
-                return self._decode_custom_type(decoder)
+                size, offset = _from_varint(buffer, offset)
+                return decoder.getobject(buffer[offset:offset + size].tobytes()), offset + size
 
         raise TypeError(f"Invalid data format: {binntype}")
 
-    def _decode_str(self):
-        size = self._from_varint()
-        value = self._buffer.read(size).decode('utf8')
-        # Ready null terminator byte to advance position
-        self._buffer.read(1)
-        return value
-
-    def _decode_bytes(self):
-        size = unpack('I', self._buffer.read(4))[0]
-        return self._buffer.read(size)
+    def _decode_bytes(self, buffer: memoryview, offset: int) -> Tuple[bytes, int]:
+        size = UINT32.unpack_from(buffer, offset)[0]
+        offset += UINT32.size
+        return buffer[offset:offset + size].tobytes(), offset + size
 
-    def _decode_datetime(self):
-        timestamp = float(unpack('d', self._buffer.read(8))[0])
+    def _decode_datetime(self, buffer: memoryview, offset: int) -> Tuple[datetime, int]:
+        timestamp = float(FLOAT64.unpack_from(buffer, offset)[0])
         # datetime.utcfromtimestamp method in python3.3 has rounding issue (https://bugs.python.org/issue23517)
-        return datetime(1970, 1, 1) + timedelta(seconds=timestamp)
+        return datetime(1970, 1, 1) + timedelta(seconds=timestamp), offset + FLOAT64.size
 
-    def _decode_list(self):
-        # read container size
-        self._from_varint()
-        count = self._from_varint()
+    def _decode_list(self, buffer: memoryview, offset: int) -> Tuple[list, int]:
+        # skip container size
+        _, offset = _from_varint(buffer, offset)
+        count, offset = _from_varint(buffer, offset)
         result = []
         for _ in range(count):
-            result.append(self.decode())
-        return result
-
-    def _decode_dict(self, binntype):
-        # read container size
-        self._from_varint()
-        count = self._from_varint()
+            value, offset = self._decode(buffer, offset)
+            result.append(value)
+        return result, offset
+
+    def _decode_object(self, buffer: memoryview, offset: int) -> Tuple[dict, int]:
+        # skip container size
+        _, offset = _from_varint(buffer, offset)
+        count, offset = _from_varint(buffer, offset)
         result = {}
+        decode = self._decode
         for _ in range(count):
-            if binntype == types.BINN_OBJECT:
-                key_size = unpack('B', self._buffer.read(1))[0]
-                key = self._buffer.read(key_size).decode('utf8')
-            if binntype == types.BINN_MAP:
-                key = unpack('I', self._buffer.read(4))[0]
-            if binntype == types.PYBINN_MAP:
-                key = self._buffer.read(types.PYBINN_MAP_SIZE)
-            result[key] = self.decode()
-        return result
-
-    def _decode_custom_type(self, decoder):
-        size = self._from_varint()
-        return decoder.getobject(self._buffer.read(size))
-
-    def _from_varint(self):
-        value = unpack('B', self._buffer.read(1))[0]
-        if value & 0x80:
-            self._buffer.seek(self._buffer.tell() - 1)
-            value = unpack('>I', self._buffer.read(4))[0]
-            value &= 0x7FFFFFFF
-        return value
-
-    # Switch Helpers
-    def _unpack(self, fmt: str, rb: int) -> Union[int, float]:
-        return unpack(fmt, self._buffer.read(rb))[0]
+            key_end = offset + 1 + buffer[offset]
+            key = str(buffer[offset + 1:key_end], 'utf8')
+            # inline short string values, the bulk of message members
+            if buffer[key_end] == _STRING and not buffer[key_end + 1] & 0x80:
+                offset = key_end + 2
+                end = offset + buffer[key_end + 1]
+                result[key] = str(buffer[offset:end], 'utf8')
+                offset = end + 1
+            else:
+                result[key], offset = decode(buffer, key_end)
+        return result, offset
+
+    def _decode_map(self, buffer: memoryview, offset: int) -> Tuple[dict, int]:
+        # skip container size
+        _, offset = _from_varint(buffer, offset)
+        count, offset = _from_varint(buffer, offset)
+        result = {}
+        for _ in range(count):
+            key = UINT32.unpack_from(buffer, offset)[0]
+            result[key], offset = self._decode(buffer, offset + UINT32.size)
+        return result, offset
+
+    def _decode_pymap(self, buffer: memoryview, offset: int) -> Tuple[dict, int]:
+        # skip container size
+        _, offset = _from_varint(buffer, offset)
+        count, offset = _from_varint(buffer, offset)
+        result = {}
+        for _ in range(count):
+            key_end = offset + types.PYBINN_MAP_SIZE
+            key = buffer[offset:key_end].tobytes()
+            result[key], offset = self._decode(buffer, key_end)
+        return result, offset
+
+    _decoders = {
+        types.BINN_BLOB[0]: _decode_bytes,
+        types.BINN_DATETIME[0]: _decode_datetime,
+        types.BINN_LIST[0]: _decode_list,
+        types.BINN_MAP[0]: _decode_map,
+        types.PYBINN_MAP[0]: _decode_pymap
+    }
 
 
 class CustomDecoder:
@@ -3,14 +3,38 @@ Implementation of BINNEncoder
 """
 from datetime import datetime, timedelta
 from io import BytesIO
-from struct import pack
+from struct import Struct
+from typing import List
 
 from . import datatypes as types
 
+# Precompiled value codecs, shared with the decoder
+UINT8 = Struct('B')
+INT8 = Struct('b')
+UINT16 = Struct('H')
+INT16 = Struct('h')
+UINT32 = Struct('I')
+INT32 = Struct('i')
+UINT64 = Struct('L')
+INT64 = Struct('l')
+FLOAT64 = Struct('d')
+VARINT32 = Struct('>I')
+
+# Single byte values are by far the most common, keep them fully encoded
+_UINT8_VALUES = tuple(types.BINN_UINT8 + UINT8.pack(i) for i in range(0x100))
+
+
+def _to_varint(value: int) -> bytes:
+    if value > 127:
+        return VARINT32.pack(value | 0x80000000)
+    return UINT8.pack(value)
+
 
 class BINNEncoder:
     """
     BINN <https://github.com/liteserver/binn> encoder for Python
+    Values are encoded in a single pass into a list of chunks, a container reserves its header slot and fills it
+    once the size of its items is known, so nested values are never encoded or copied more than once
     """
 
     def __init__(self, fp=None, *custom_encoders):  # pylint: disable=keyword-arg-before-vararg
@@ -30,168 +54,152 @@ class BINNEncoder:
         """
         Encode value to stream
         """
+        chunks = []
+        self._encode(value, chunks)
+        self._buffer.write(b''.join(chunks))
+
+    def _encode(self, value, chunks: List[bytes]) -> int:
+        """
+        Encode the value onto the chunk list
+        :param value: value to encode
+        :param chunks: encoded chunks of the message
+        :return: number of bytes encoded
+        """
+        if encoder := self._encoders.get(type(value)):
+            return encoder(self, value, chunks)
         if value is None:
-            self._buffer.write(types.BINN_NULL)
-            return
-        if isinstance(value, str):
-            self._encode_str(value)
-            return
-        if isinstance(value, int):
-            self._encode_int(value)
-            return
-        if isinstance(value, bool):
-            self._encode_bool(value)
-            return
-        if isinstance(value, float):
-            self._encode_float(value)
-            return
-        if isinstance(value, bytes):
-            self._encode_bytes(value)
-            return
-        if isinstance(value, list):
-            self._encode_list(value)
-            return
-        if isinstance(value, dict):
-            self._encode_dict(value)
-            return
-        if isinstance(value, datetime):
-            self._encode_datetime(value)
-            return
+            chunks.append(types.BINN_NULL)
+            return 1
+        # subclasses of the builtin types, same precedence as the type table
+        for base, encoder in self._encoders.items():
+            if isinstance(value, base):
+                return encoder(self, value, chunks)
         # try use custom encoders when none type was recognized
         for encoder in self._custom_encoders:
             if not issubclass(type(encoder), CustomEncoder):
                 raise TypeError(f"Type {type(encoder)} is not CustomerEncoder.")
             if isinstance(value, encoder.type):
-                self._encode_custom_type(value, encoder)
-                return
+                return self._encode_custom_type(value, encoder, chunks)
 
         raise TypeError(f"Invalid type for encode: {type(value)}")
 
-    def _encode_str(self, value, data_type=types.BINN_STRING):
-        size = len(value.encode('utf8'))
-        self._buffer.write(data_type)
-        self._buffer.write(self._to_varint(size))
-        self._buffer.write(value.encode('utf8') + b'\0')
-
-    def _encode_uint(self, value):
-        # unsigned char (byte)
-        if value < 0x100:
-            self._buffer.write(types.BINN_UINT8)
-            self._buffer.write(pack('B', value))
-            return
+    def _encode_str(self, value: str, chunks: List[bytes]) -> int:
+        data = value.encode('utf8')
+        chunk = types.BINN_STRING + _to_varint(len(data)) + data + b'\0'
+        chunks.append(chunk)
+        return len(chunk)
+
+    def _encode_int(self, value: int, chunks: List[bytes]) -> int:  # pylint: disable=too-many-return-statements
+        if 0 <= value < 0x100:
+            chunks.append(_UINT8_VALUES[value])
+            return 2
         # unsigned short
-        if value < 0x10000:
-            self._buffer.write(types.BINN_UINT16)
-            self._buffer.write(pack('H', value))
-            return
+        if 0 <= value < 0x10000:
+            return self._encode_fixed(types.BINN_UINT16, UINT16, value, chunks)
         # unsigned int
-        if value < 0x100000000:
-            self._buffer.write(types.BINN_UINT32)
-            self._buffer.write(pack('I', value))
-            return
+        if 0 <= value < 0x100000000:
+            return self._encode_fixed(types.BINN_UINT32, UINT32, value, chunks)
         # unsigned long
-        if value < 0x10000000000000000:
-            self._buffer.write(types.BINN_UINT64)
-            self._buffer.write(pack('L', value))
-            return
-        raise OverflowError(f"Value to big {value:x}.")
-
-    def _encode_int(self, value):
+        if 0 <= value < 0x10000000000000000:
+            return self._encode_fixed(types.BINN_UINT64, UINT64, value, chunks)
         if value >= 0:
-            self._encode_uint(value)
-            return
+            raise OverflowError(f"Value to big {value:x}.")
         # signed char
         if value >= -0x80:
-            self._buffer.write(types.BINN_INT8)
-            self._buffer.write(pack('b', value))
-            return
+            return self._encode_fixed(types.BINN_INT8, INT8, value, chunks)
         # short
         if value >= -0x8000:
-            self._buffer.write(types.BINN_INT16)
-            self._buffer.write(pack('h', value))
-            return
+            return self._encode_fixed(types.BINN_INT16, INT16, value, chunks)
         # int
         if value >= -0x80000000:
-            self._buffer.write(types.BINN_INT32)
-            self._buffer.write(pack('i', value))
-            return
+            return self._encode_fixed(types.BINN_INT32, INT32, value, chunks)
         # long
         if value >= -0x8000000000000000:
-            self._buffer.write(types.BINN_INT64)
-            self._buffer.write(pack('l', value))
-
-    def _encode_bool(self, value):
-        if value:
-            self._buffer.write(types.BINN_TRUE)
-        if not value:
-            self._buffer.write(types.BINN_FALSE)
-
-    def _encode_float(self, value, binn_type=None):
-        if binn_type is None:
-            binn_type = types.BINN_FLOAT64
-        self._buffer.write(binn_type)
-        self._buffer.write(pack('d', value))
-
-    def _encode_bytes(self, value):
-        self._buffer.write(types.BINN_BLOB)
-        self._buffer.write(pack('I', len(value)))
-        self._buffer.write(value)
-
-    def _encode_datetime(self, value):
-        timestamp = float((value - datetime(1970, 1, 1)) / timedelta(seconds=1))
-        self._encode_float(timestamp, types.BINN_DATETIME)
+            return self._encode_fixed(types.BINN_INT64, INT64, value, chunks)
+        raise OverflowError(f"Value to small -{-value:x}.")
+
+    def _encode_float(self, value: float, chunks: List[bytes]) -> int:
+        return self._encode_fixed(types.BINN_FLOAT64, FLOAT64, value, chunks)
 
-    def _encode_list(self, value):
-        with BytesIO() as buffer:
-            for item in value:
-                buffer.write(BINNEncoder().encode_bytes(item))
+    def _encode_bytes(self, value: bytes, chunks: List[bytes]) -> int:
+        chunks.append(types.BINN_BLOB + UINT32.pack(len(value)))
+        chunks.append(value)
+        return 1 + UINT32.size + len(value)
 
-            self._buffer.write(types.BINN_LIST)
-            self._buffer.write(BINNEncoder._to_varint(buffer.tell() + 3))
-            self._buffer.write(BINNEncoder._to_varint(len(value)))
-            self._buffer.write(buffer.getvalue())
+    def _encode_datetime(self, value: datetime, chunks: List[bytes]) -> int:
+        timestamp = float((value - datetime(1970, 1, 1)) / timedelta(seconds=1))
+        return self._encode_fixed(types.BINN_DATETIME, FLOAT64, timestamp, chunks)
 
-    def _encode_dict(self, value):
+    def _encode_list(self, value: list, chunks: List[bytes]) -> int:
+        header = len(chunks)
+        chunks.append(b'')
+        size = 0
+        for item in value:
+            size += self._encode(item, chunks)
+        return self._container_header(types.BINN_LIST, size, len(value), chunks, header)
+
+    def _encode_dict(self, value: dict, chunks: List[bytes]) -> int:
         # set initial BINN type to handle empty dictionaries
         container_type = types.BINN_OBJECT
-
-        with BytesIO() as buffer:
-            for key in value:
-                if isinstance(key, str):
-                    if len(key) > 255:
-                        raise OverflowError(f"Key '{key}' is to big. Max length is 255.")
-                    buffer.write(pack('B', len(key)))
-                    buffer.write(key.encode('utf8'))
-                    buffer.write(BINNEncoder().encode_bytes(value[key]))
-                elif isinstance(key, int):
-                    container_type = types.BINN_MAP
-                    buffer.write(pack('I', key))
-                    buffer.write(BINNEncoder().encode_bytes(value[key]))
-                elif isinstance(key, bytes):
-                    if len(key) != types.PYBINN_MAP_SIZE:
-                        raise OverflowError(f"Bytes key should be exactly {types.PYBINN_MAP_SIZE} bytes length.")
-                    container_type = types.PYBINN_MAP
-                    buffer.write(key)
-                    buffer.write(BINNEncoder().encode_bytes(value[key]))
-                else:
-                    raise TypeError(f"Cannot serialize dictionary with key of type '{type(key)}'")
-
-            self._buffer.write(container_type)
-            self._buffer.write(BINNEncoder._to_varint(buffer.tell() + 3))
-            self._buffer.write(BINNEncoder._to_varint(len(value)))
-            self._buffer.write(buffer.getvalue())
-
-    def _encode_custom_type(self, value, encoder):
+        header = len(chunks)
+        chunks.append(b'')
+        size = 0
+        for key, val in value.items():
+            if isinstance(key, str):
+                key = key.encode('utf8')
+                if len(key) > 255:
+                    raise OverflowError(f"Key '{key.decode('utf8')}' is to big. Max length is 255.")
+                chunks.append(UINT8.pack(len(key)) + key)
+                size += 1 + len(key)
+            elif isinstance(key, int):
+                container_type = types.BINN_MAP
+                chunks.append(UINT32.pack(key))
+                size += UINT32.size
+            elif isinstance(key, bytes):
+                if len(key) != types.PYBINN_MAP_SIZE:
+                    raise OverflowError(f"Bytes key should be exactly {types.PYBINN_MAP_SIZE} bytes length.")
+                container_type = types.PYBINN_MAP
+                chunks.append(key)
+                size += types.PYBINN_MAP_SIZE
+            else:
+                raise TypeError(f"Cannot serialize dictionary with key of type '{type(key)}'")
+            size += self._encode(val, chunks)
+        return self._container_header(container_type, size, len(value), chunks, header)
+
+    def _encode_custom_type(self, value, encoder: 'CustomEncoder', chunks: List[bytes]) -> int:
         data = encoder.getbytes(value)
-        self._buffer.write(encoder.datatype)
-        self._buffer.write(BINNEncoder._to_varint(len(data)))
-        self._buffer.write(data)
+        chunk = encoder.datatype + _to_varint(len(data)) + data
+        chunks.append(chunk)
+        return len(chunk)
 
+    # Helpers
     @staticmethod
-    def _to_varint(value):
-        if value > 127:
-            return pack('>I', value | 0x80000000)
-        return pack('B', value)
+    def _encode_fixed(binn_type: bytes, codec: Struct, value, chunks: List[bytes]) -> int:
+        chunks.append(binn_type + codec.pack(value))
+        return 1 + codec.size
+
+    @staticmethod
+    def _container_header(binn_type: bytes, size: int, count: int, chunks: List[bytes], idx: int) -> int:
+        """
+        Fill the reserved header slot of a container now that the size of its items is known
+        :return: number of bytes of the container, including the header
+        """
+        chunk = binn_type + _to_varint(size + 3) + _to_varint(count)
+        chunks[idx] = chunk
+        return len(chunk) + size
+
+    _to_varint = staticmethod(_to_varint)
+
+    # exact type -> encoder, the order is the precedence used for subclasses (bool is encoded as an int)
+    _encoders = {
+        str: _encode_str,
+        int: _encode_int,
+        float: _encode_float,
+        bytes: _encode_bytes,
+        list: _encode_list,
+        dict: _encode_dict,
+        datetime: _encode_datetime
+    }
 
 
 class CustomEncoder:
@@ -82,6 +82,14 @@ class SmileEncoder:
             None: self.write_null
         }
 
+    def reset(self) -> None:
+        """
+        Clear the encoded data and shared string references, allowing the encoder to be reused for another document
+        """
+        self.output = bytearray()
+        self.shared_keys = []
+        self.shared_values = []
+
     def write_header(self) -> None:
         """
         Method that can be called to explicitly write Smile document header.
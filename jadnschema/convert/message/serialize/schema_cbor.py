@@ -0,0 +1,106 @@
+"""
+Schema driven CBOR serialization
+The content of an OpenC2 message is encoded in the compact style of its schema type, field IDs as integer keys,
+Enumerated values as integers and Binary values as byte strings. Headers are encoded as plain CBOR
+The schema is given with each call, or bound to a `SchemaCBOR` serializer, there is no process wide schema
+"""
+import cbor2
+
+from typing import Dict, Optional, Union
+from ....schema import Schema
+from ....schema.codec import EncodingStyle
+
+__all__ = ["SchemaCBOR", "binary_content", "dumps", "loads", "serializer"]
+# message type -> schema type of the content, the defaults of the OpenC2 language schema
+CONTENT_TYPES = {
+    "request": "OpenC2-Command",
+    "response": "OpenC2-Response"
+}
+
+
+class SchemaCBOR:
+    """
+    CBOR serialization of OpenC2 messages driven by a schema
+    """
+    schema: Schema
+    types: Dict[str, str]
+
+    def __init__(self, schema: Schema, types: Dict[str, str] = None):
+        """
+        :param schema: schema of the message content
+        :param types: schema type of the content of each message type, defaults to the OpenC2 Command & Response if
+            the schema defines them
+        """
+        self.schema = schema
+        self.types = {k: v for k, v in CONTENT_TYPES.items() if v in schema.types}
+        self.types.update(types or {})
+
+    def dumps(self, msg: dict) -> bytes:
+        """
+        Encode the message, content with an unknown message type is encoded as plain CBOR
+        :param msg: message to encode
+        :return: encoded message
+        """
+        if (content := _content(msg)) and (type_ := self.types.get(content[0])):
+            msg = {**msg, "body": {"openc2": {content[0]: self.schema.codec.encode(content[1], type_, EncodingStyle.COMPACT, binary=True)}}}
+        return cbor2.dumps(msg)
+
+    def loads(self, msg: bytes) -> dict:
+        """
+        Decode the message, the content is restored to its verbose form
+        :param msg: message to decode
+        :return: decoded message
+        """
+        msg = cbor2.loads(msg)
+        if (content := _content(msg)) and (type_ := self.types.get(content[0])):
+            msg["body"]["openc2"][content[0]] = self.schema.codec.decode(content[1], type_)
+        return msg
+
+
+def serializer(schema: Union[Schema, SchemaCBOR, None]) -> SchemaCBOR:
+    """
+    Get the serializer of the schema
+    :param schema: schema of the message content, or a serializer with custom content types
+    :raise ReferenceError: no schema is given
+    :return: serializer of the schema
+    """
+    if schema is None:
+        raise ReferenceError("The `cbor_schema` serialization requires the schema of the message content")
+    return schema if isinstance(schema, SchemaCBOR) else SchemaCBOR(schema)
+
+
+def dumps(msg: dict, schema: Union[Schema, SchemaCBOR] = None) -> bytes:
+    return serializer(schema).dumps(msg)
+
+
+def loads(msg: bytes, schema: Union[Schema, SchemaCBOR] = None) -> dict:
+    return serializer(schema).loads(msg)
+
+
+def binary_content(msg: dict, schema: Union[Schema, SchemaCBOR], to_bytes: bool = True) -> dict:
+    """
+    Convert the Binary values of the message content between their string form and bytes, other values are unchanged
+    Content with an unknown message type is returned as is
+    :param msg: message to convert
+    :param schema: schema of the message content, or a serializer with custom content types
+    :param to_bytes: convert Binary values to bytes, otherwise to their string form
+    :raise ValueError: content does not match the structure of its type
+    :return: converted message
+    """
+    schema = serializer(schema)
+    if (content := _content(msg)) and (type_ := schema.types.get(content[0])):
+        if to_bytes:
+            content = schema.schema.codec.encode(content[1], type_, EncodingStyle.VERBOSE, binary=True)
+        else:
+            content = schema.schema.codec.decode(content[1], type_)
+        return {**msg, "body": {**msg["body"], "openc2": {_content(msg)[0]: content}}}
+    return msg
+
+
+# Helpers
+def _content(msg: dict) -> Optional[tuple]:
+    body = msg.get("body") if isinstance(msg, dict) else None
+    openc2 = body.get("openc2") if isinstance(body, dict) else None
+    if isinstance(openc2, dict) and len(openc2) == 1:
+        return next(iter(openc2.items()))
+    return None
@@ -0,0 +1,414 @@
+"""
+Append-only OpenC2 message log
+Messages are appended as framed records (see `Message.dumps`) to segment files, each segment has a fixed size entry index.
+Once a segment is sealed its entries are also written sorted by request_id and by created time, and the indexes are
+memory-mapped, lookups & range scans binary search the mapped files and only the active segment is indexed in memory.
+Bodies are decoded on `read`
+"""
+import mmap
+import os
+import uuid
+
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from struct import Struct, error as StructError
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+from .enums import MessageType
+from .message import EPOCH, RECORD_HEADER, RECORD_PREFIX, Message, record_size
+from .serialize import Compression
+from .serialize.compression import register_dictionary
+
+__all__ = [
+    "MessageStore",
+    "StoreEntry"
+]
+
+# request_id, created (microseconds since epoch), msg_type, offset & size of the record in the segment
+INDEX_ENTRY = Struct("!16sqBII")
+# request_id & position of the entry in the segment index, sorted
+REQUEST_ENTRY = Struct("!16sI")
+# created (microseconds since epoch) & position of the entry in the segment index, sorted
+CREATED_ENTRY = Struct("!qI")
+SEGMENT_SIZE = 64 * 1024 * 1024
+_MSG_TYPES = tuple(MessageType)
+
+
+class StoreEntry(NamedTuple):
+    """
+    Location and headers of a stored message
+    """
+    request_id: uuid.UUID
+    created: datetime
+    msg_type: MessageType
+    segment: int
+    offset: int
+    size: int
+
+
+class _SortedIndex:
+    """
+    Memory-mapped file of fixed size entries, sorted, for binary searching with `bisect`
+    """
+    __slots__ = ("_map", "_struct", "_len")
+
+    def __init__(self, path: str, struct: Struct, entries: Iterable[tuple], count: int):
+        """
+        Map the sorted index, writing it first if it is missing or doesn't match the segment
+        :param path: path of the index file
+        :param struct: format of the entries
+        :param entries: unsorted entries of the segment, only consumed when the file is written
+        :param count: number of entries in the segment
+        """
+        self._struct = struct
+        self._len = count
+        if not os.path.exists(path) or os.path.getsize(path) != count * struct.size:
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(b"".join(struct.pack(*e) for e in sorted(entries)))
+            os.replace(f"{path}.tmp", path)
+        self._map = b""
+        if count:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, idx: int) -> tuple:
+        return self._struct.unpack_from(self._map, idx * self._struct.size)
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+
+class _Segment:
+    """
+    A single log file and its indexes
+    """
+    number: int
+    log_path: str
+    idx_path: str
+    index: Union[bytearray, mmap.mmap]
+    by_request: Optional[_SortedIndex]
+    by_created: Optional[_SortedIndex]
+    size: int
+    _log_map: Optional[mmap.mmap]
+
+    __slots__ = ("number", "log_path", "idx_path", "index", "by_request", "by_created", "size", "_log_map")
+
+    def __init__(self, path: str, number: int):
+        self.number = number
+        self.log_path = os.path.join(path, f"{number:08d}.log")
+        self.idx_path = os.path.join(path, f"{number:08d}.idx")
+        self.index = bytearray()
+        self.by_request = None
+        self.by_created = None
+        self.size = 0
+        self._log_map = None
+
+    def __len__(self) -> int:
+        return len(self.index) // INDEX_ENTRY.size
+
+    def recover(self) -> None:
+        """
+        Load the index, dropping partially written entries and indexing records missing from it
+        A log tail that isn't a valid record, partially written or corrupt, is truncated
+        """
+        if not os.path.exists(self.log_path):
+            open(self.log_path, "wb").close()
+        self.size = os.path.getsize(self.log_path)
+        if os.path.exists(self.idx_path):
+            with open(self.idx_path, "rb") as f:
+                self.index = bytearray(f.read())
+        stored = len(self.index)
+        del self.index[len(self) * INDEX_ENTRY.size:]
+
+        indexed = 0
+        for idx, (*_, offset, size) in enumerate(INDEX_ENTRY.iter_unpack(self.index)):
+            if offset + size > self.size:
+                del self.index[idx * INDEX_ENTRY.size:]
+                break
+            indexed = offset + size
+
+        if indexed < self.size:
+            with open(self.log_path, "rb") as f:
+                f.seek(indexed)
+                tail = memoryview(f.read())
+            offset = 0
+            while offset + RECORD_PREFIX.size <= len(tail):
+                try:
+                    end = offset + RECORD_PREFIX.size + record_size(tail[offset:offset + RECORD_PREFIX.size])
+                    if end > len(tail):
+                        break
+                    entry = _index_entry(tail[offset:end], indexed + offset)
+                except (StructError, ValueError):
+                    break
+                self.index += entry
+                offset = end
+            # drop a partially written or corrupt tail
+            if indexed + offset < self.size:
+                os.truncate(self.log_path, indexed + offset)
+                self.size = indexed + offset
+
+        if len(self.index) != stored or not os.path.exists(self.idx_path):
+            with open(self.idx_path, "wb") as f:
+                f.write(self.index)
+
+    def seal(self) -> None:
+        """
+        Memory-map the indexes of a segment that is no longer appended to, writing the sorted indexes if needed
+        """
+        if self.by_request is not None:
+            return
+        count = len(self)
+        base = self.idx_path[:-4]
+        entries = INDEX_ENTRY.iter_unpack(self.index)
+        self.by_request = _SortedIndex(f"{base}.rid", REQUEST_ENTRY, ((e[0], i) for i, e in enumerate(entries)), count)
+        entries = INDEX_ENTRY.iter_unpack(self.index)
+        self.by_created = _SortedIndex(f"{base}.tim", CREATED_ENTRY, ((e[1], i) for i, e in enumerate(entries)), count)
+        if count:
+            with open(self.idx_path, "rb") as f:
+                self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def lookup(self, request_id: bytes) -> Iterator[int]:
+        """
+        Positions of the entries with the given request_id, in the order stored
+        :param request_id: request_id of the messages
+        :return: positions in the segment index
+        """
+        idx = bisect_left(self.by_request, (request_id, ))
+        while idx < len(self.by_request) and (item := self.by_request[idx])[0] == request_id:
+            yield item[1]
+            idx += 1
+
+    def between(self, low: int, high: int) -> List[int]:
+        """
+        Positions of the entries created in the given range, in the order stored
+        :param low: earliest created time, inclusive
+        :param high: latest created time, exclusive
+        :return: positions in the segment index
+        """
+        start = bisect_left(self.by_created, (low, ))
+        end = bisect_left(self.by_created, (high, ), lo=start)
+        return sorted(self.by_created[i][1] for i in range(start, end))
+
+    def entry(self, idx: int) -> StoreEntry:
+        request_id, created, msg_type, offset, size = INDEX_ENTRY.unpack_from(self.index, idx * INDEX_ENTRY.size)
+        return StoreEntry(
+            request_id=uuid.UUID(bytes=request_id),
+            created=EPOCH + timedelta(microseconds=created),
+            msg_type=_MSG_TYPES[msg_type],
+            segment=self.number,
+            offset=offset,
+            size=size
+        )
+
+    def record(self, offset: int, size: int) -> memoryview:
+        if self._log_map is None or len(self._log_map) < offset + size:
+            self.close_log()
+            with open(self.log_path, "rb") as f:
+                self._log_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._log_map)[offset:offset + size]
+
+    def close_log(self) -> None:
+        if self._log_map is not None:
+            try:
+                self._log_map.close()
+            except BufferError:
+                # records are still referenced, the map is released with them
+                pass
+            self._log_map = None
+
+    def close(self) -> None:
+        self.close_log()
+        if isinstance(self.index, mmap.mmap):
+            self.index.close()
+        for sorted_index in (self.by_request, self.by_created):
+            if sorted_index is not None:
+                sorted_index.close()
+
+
+class MessageStore:
+    """
+    Append-only, segmented message log with an index by request_id, created time and msg_type
+    A store directory must only be opened by a single writer at a time
+    """
+    path: str
+    segment_size: int
+    sync: bool
+    compression: Compression
+    dictionary: Optional[bytes]
+    _segments: List[_Segment]
+    # request_id -> positions of the entries with the id in the active segment, bounded by the segment size
+    _active: Dict[bytes, List[int]]
+
+    def __init__(self, path: str, segment_size: int = SEGMENT_SIZE, sync: bool = False, compression: Compression = Compression.NONE, dictionary: bytes = None):
+        """
+        Open or create a message store
+        :param path: directory of the store
+        :param segment_size: size, in bytes, after which a new segment is started
+        :param sync: fsync the log and index after each append
+        :param compression: compression of the content of appended messages, see `Message.dumps`
+        :param dictionary: zlib preset dictionary, it is registered to read the stored messages
+        """
+        self.path = path
+        self.segment_size = segment_size
+        self.sync = sync
+        self.compression = Compression(compression)
+        self.dictionary = dictionary
+        if dictionary:
+            register_dictionary(dictionary)
+        os.makedirs(path, exist_ok=True)
+
+        numbers = sorted(int(f[:-4]) for f in os.listdir(path) if f.endswith(".log") and f[:-4].isdigit())
+        self._segments = []
+        for number in numbers or [0]:
+            segment = _Segment(path, number)
+            segment.recover()
+            self._segments.append(segment)
+        self._open_active()
+
+    def __enter__(self) -> "MessageStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return sum(map(len, self._segments))
+
+    def __iter__(self) -> Iterator[StoreEntry]:
+        return self.scan()
+
+    def append(self, msg: Message) -> StoreEntry:
+        """
+        Append the message to the log
+        :param msg: message to store
+        :return: index entry of the stored message
+        """
+        record = msg.dumps(self.compression, self.dictionary)
+        segment = self._segments[-1]
+        if segment.size > 0 and segment.size + len(record) > self.segment_size:
+            self._roll()
+            segment = self._segments[-1]
+
+        entry = _index_entry(memoryview(record), segment.size)
+        self._log.write(record)
+        self._idx.write(entry)
+        if self.sync:
+            for f in (self._log, self._idx):
+                f.flush()
+                os.fsync(f.fileno())
+        segment.size += len(record)
+        self._active.setdefault(entry[:16], []).append(len(segment))
+        segment.index += entry
+        return segment.entry(len(segment) - 1)
+
+    def extend(self, msgs: Iterable[Message]) -> List[StoreEntry]:
+        """
+        Append the messages to the log
+        :param msgs: messages to store
+        :return: index entries of the stored messages
+        """
+        return list(map(self.append, msgs))
+
+    def lookup(self, request_id: Union[str, uuid.UUID]) -> List[StoreEntry]:
+        """
+        Find all messages with the given request_id, i.e. a command and its responses
+        :param request_id: request_id of the messages
+        :return: index entries in the order stored
+        """
+        request_id = (request_id if isinstance(request_id, uuid.UUID) else uuid.UUID(request_id)).bytes
+        entries = [segment.entry(idx) for segment in self._segments[:-1] for idx in segment.lookup(request_id)]
+        active = self._segments[-1]
+        entries.extend(active.entry(idx) for idx in self._active.get(request_id, []))
+        return entries
+
+    def scan(self, start: datetime = None, end: datetime = None, msg_type: MessageType = None) -> Iterator[StoreEntry]:
+        """
+        Iterate the stored messages, in the order stored, optionally limited by created time and type
+        :param start: earliest created time, inclusive
+        :param end: latest created time, exclusive
+        :param msg_type: type of message
+        :return: index entries of the matching messages
+        """
+        low = -(1 << 63) if start is None else _micros(start)
+        high = (1 << 63) - 1 if end is None else _micros(end)
+        type_code = None if msg_type is None else _MSG_TYPES.index(msg_type)
+        ranged = start is not None or end is not None
+        for segment in self._segments:
+            if ranged and segment.by_created is not None:
+                positions: Iterable[int] = segment.between(low, high)
+            else:
+                positions = range(len(segment))
+            for idx in positions:
+                _, created, code, *_ = INDEX_ENTRY.unpack_from(segment.index, idx * INDEX_ENTRY.size)
+                if low <= created < high and type_code in (None, code):
+                    yield segment.entry(idx)
+
+    def read(self, entry: StoreEntry) -> Message:
+        """
+        Load the stored message
+        :param entry: index entry of the message
+        :return: stored message
+        """
+        return Message.loads(self.read_record(entry))
+
+    def read_record(self, entry: StoreEntry) -> memoryview:
+        """
+        Get the framed record of the stored message without decoding it
+        :param entry: index entry of the message
+        :return: framed message, see `Message.dumps`
+        """
+        if self._segments[-1].number == entry.segment:
+            self._log.flush()
+        segment = self._segments[entry.segment - self._segments[0].number]
+        return segment.record(entry.offset, entry.size)
+
+    def close(self) -> None:
+        self._log.close()
+        self._idx.close()
+        for segment in self._segments:
+            segment.close()
+
+    # Helpers
+    def _open_active(self) -> None:
+        segment = self._segments[-1]
+        for sealed in self._segments[:-1]:
+            sealed.seal()
+        self._active = {}
+        for idx, (request_id, *_) in enumerate(INDEX_ENTRY.iter_unpack(segment.index)):
+            self._active.setdefault(request_id, []).append(idx)
+        self._log = open(segment.log_path, "ab")  # pylint: disable=consider-using-with
+        self._idx = open(segment.idx_path, "ab")  # pylint: disable=consider-using-with
+
+    def _roll(self) -> None:
+        self._log.close()
+        self._idx.close()
+        self._segments.append(_Segment(self.path, self._segments[-1].number + 1))
+        self._segments[-1].recover()
+        self._open_active()
+
+
+def _micros(value: datetime) -> int:
+    """
+    Microseconds since epoch of a naive UTC or timezone aware time
+    :param value: time to convert
+    :return: microseconds since epoch
+    """
+    if value.tzinfo:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _index_entry(record: memoryview, offset: int) -> bytes:
+    """
+    Create the index entry of a framed record from its headers, the content is not decoded
+    :param record: framed message, see `Message.dumps`
+    :param offset: position of the record in the segment
+    :return: index entry
+    """
+    created, request_id, msg_type_size, *_ = RECORD_HEADER.unpack_from(record, RECORD_PREFIX.size)
+    msg_type_start = RECORD_PREFIX.size + RECORD_HEADER.size
+    msg_type = MessageType(str(record[msg_type_start:msg_type_start + msg_type_size], "utf-8"))
+    return INDEX_ENTRY.pack(request_id, created, _MSG_TYPES.index(msg_type), offset, len(record))
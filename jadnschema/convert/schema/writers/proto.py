@@ -10,7 +10,8 @@ from .baseWriter import BaseWriter
 from .utils import TableFormat, TableStyle
 from ..enums import CommentLevels
 from ....schema import Schema
-from ....schema.definitions import Array, ArrayOf, Choice, Enumerated, Map, MapOf, Record, Primitive
+from ....schema.codec import TypeTable
+from ....schema.definitions import Definition, Array, ArrayOf, Choice, Enumerated, Map, MapOf, Record, Primitive
 from ....utils import FrozenDict
 
 FormatStyles = FrozenDict(
@@ -25,6 +26,10 @@ def uri_to_revid(uri: str) -> str:
 
 # Conversion Class
 class JADNtoProto3(BaseWriter):
+    """
+    Messages & fields follow the type tables of the schema codec, so the `.proto` describes the wire format of
+    `Schema.protobuf`; ArrayOf & MapOf are messages of a repeated field 1, fields with multiple values are repeated
+    """
     format = "proto"
     comment_multi = ("/*", "*/")
     comment_single = "//"
@@ -36,15 +41,17 @@ class JADNtoProto3(BaseWriter):
         "Null": "string",
         "String": "string"
     }
-    _proto_imports: List[str] = []
+    # data types written as messages
+    _messageTypes = ("Array", "ArrayOf", "Choice", "Map", "MapOf", "Record")
+    # scalar types valid as the key of a proto3 map
+    _mapKeys = ("bool", "int64", "string")
 
     def dumps(self, **kwargs) -> str:
         """
         Converts the JADN schema to ProtoBuf3
         :return: Protobuf3 schema
         """
-        imports = "".join([f"import \"{imp}\";\n" for imp in self._proto_imports])
-        return f"{self.makeHeader()}{imports}{self._makeStructuresString(default='')}\n"
+        return f"{self.makeHeader()}{self._makeStructuresString(default='')}\n"
 
     def makeHeader(self):
         """
@@ -53,7 +60,7 @@ class JADNtoProto3(BaseWriter):
         """
         def mkrow(k, v) -> str:
             if k == "package":
-                return f"package {uri_to_revid(info[k])};"
+                return f"package {'.'.join(map(self.formatStr, uri_to_revid(info[k]).split('.')))};"
             return f"{self.comment_single} {k:>{FormatStyles.info}}: {json.dumps(v)}"
 
         info = self._schema.info.schema()
@@ -64,137 +71,170 @@ class JADNtoProto3(BaseWriter):
 
         return f"{header}\n\n"
 
+    def formatStr(self, s: str) -> str:
+        """
+        Format a name as a protobuf identifier
+        :param s: string to format
+        :return: formatted string
+        """
+        if s == "*":
+            return "unknown"
+        s = re.sub(r"\W", "_", s)
+        return f"_{s}" if s[:1].isdigit() else s
+
     # Structure Formats
-    def _formatArray(self, itm: Array, **kwargs) -> str:  # TODO: what should this do??
-        return self._formatCustom(itm)
+    def _formatArray(self, itm: Array, **kwargs) -> str:
+        return self._formatRecord(itm)
 
-    def _formatArrayOf(self, itm: ArrayOf, **kwargs) -> str:  # TODO: what should this do??
-        return self._formatCustom(itm)
+    def _formatArrayOf(self, itm: ArrayOf, **kwargs) -> str:
+        return self._formatMessage(itm, [], self._collectionFields(self._schema.codec.table(itm.name), []))
 
     def _formatChoice(self, itm: Choice, **kwargs) -> str:
-        rows = []
-        for field in itm.__fields__.values():
-            info = field.field_info
-            opts = {"type": info.extra["type"]}
-            if ops := info.extra["options"].dict(exclude_unset=True):
-                opts["options"] = ops
-
-            rows.append([
-                self._fieldType(info.extra["type"]),
-                f"{self.formatStr(field.alias)} =",
-                f"{info.extra['id']};",
-                self._formatComment(info.description, jadn_opts=opts)
-            ])
-
-        properties = self._space_start.sub(self._indent, self._makeTable(
-            rows=rows,
-            table=TableFormat.Ascii,
-            style=TableStyle.STYLE_NONE
-        ))
+        table = self._schema.codec.table(itm.name)
+        nested: List[str] = []
+        rows = self._fieldRows(itm, table, nested, oneof=True)
+        # repeated fields are not valid within a oneof, they are written as fields of the message
+        choices = [r for r, f in zip(rows, table.fields) if not f.array]
+        repeated = [r for r, f in zip(rows, table.fields) if f.array]
+        oneof = ""
+        if choices:
+            oneof = f"oneof {self.formatStr(itm.name)} {{\n{self._indented(self._table(choices))}\n}}"
+        return self._formatMessage(itm, nested, oneof, self._table(repeated) if repeated else "")
 
+    def _formatEnumerated(self, itm: Enumerated, **kwargs) -> str:
+        table = self._schema.codec.table(itm.name)
+        if table.opts.get("pointer"):
+            return self._formatCustom(itm)
+        descriptions = {f.value.extra["id"]: f.value.description for f in itm.__enums__}
         comment = f"\n{self.comment_single} {itm.description}" if itm.description else ""
         jadn_comment = self._formatComment(type=itm.data_type, jadn_opts=itm.__options__.dict(exclude_unset=True))
         jadn_comment = f"  {jadn_comment}" if jadn_comment else ""
-        return self._wrapAsRecord(f"{comment}\noneof {self.formatStr(itm.name)} {{{jadn_comment}\n{properties}\n}}")
+        return f"{comment}\n{self._enum(self.formatStr(itm.name), table, descriptions, jadn_comment)}"
 
-    def _formatEnumerated(self, itm: Enumerated, **kwargs) -> str:
-        rows = []
-        default = True
-        for field in itm.__enums__:
-            f_id = field.value.extra["id"]
-            if f_id == 0:
-                default = False
-            rows.append([
-                f"{self.formatStr(field.value.default or f'Unknown_{self.formatStr(field.value.default)}_{f_id}')} =",
-                f"{f_id};",
-                self._formatComment(field.value.description)
-            ])
+    def _formatMap(self, itm: Map, **kwargs) -> str:
+        return self._formatRecord(itm)
 
-        if default:
-            rows.insert(0, [
-                f"Unknown_{itm.name.replace('-', '_')} =",
-                "0;",
-                f"{self.comment_single} required starting enum number for protobuf3\n"
-            ])
+    def _formatMapOf(self, itm: MapOf, **kwargs) -> str:
+        nested: List[str] = []
+        return self._formatMessage(itm, nested, self._collectionFields(self._schema.codec.table(itm.name), nested))
 
-        properties = self._space_start.sub(self._indent, self._makeTable(
-            rows=rows,
-            table=TableFormat.Ascii,
-            style=TableStyle.STYLE_NONE
-        ))
+    def _formatRecord(self, itm: Union[Array, Map, Record], **kwargs) -> str:
+        nested: List[str] = []
+        rows = self._fieldRows(itm, self._schema.codec.table(itm.name), nested)
+        return self._formatMessage(itm, nested, self._table(rows))
+
+    def _formatCustom(self, itm: Union[Primitive, Enumerated], **kwargs) -> str:
+        custom_proto = self._formatComment(itm.description)
+        custom_proto = f"{custom_proto}\n" if custom_proto else ""
+        return f"\n{custom_proto}{self.comment_single} ${itm.name}({itm.data_type}) {itm.__options__.dict(exclude_unset=True)}"
+
+    # Helper Functions
+    def _formatMessage(self, itm: Definition, *body: Union[List[str], str]) -> str:
+        """
+        Format a message of the nested definitions & fields of the type
+        :param itm: type definition
+        :param body: nested definitions & field declarations
+        :return: message definition
+        """
+        lines = self._indented("\n".join(b if isinstance(b, str) else "\n".join(b) for b in body if b))
+        lines = f"\n{lines}" if lines else ""
         comment = f"\n{self.comment_single} {itm.description}" if itm.description else ""
         jadn_comment = self._formatComment(type=itm.data_type, jadn_opts=itm.__options__.dict(exclude_unset=True))
         jadn_comment = f"  {jadn_comment}" if jadn_comment else ""
-        return f"{comment}\nenum {self.formatStr(itm.name)} {{{jadn_comment}\n{properties}\n}}"
-
-    def _formatMap(self, itm: Map, **kwargs) -> str:
-        return self._formatRecord(itm)
+        return f"{comment}\nmessage {self.formatStr(itm.name)} {{{jadn_comment}{lines}\n}}"
 
-    def _formatMapOf(self, itm: MapOf, **kwargs) -> str:  # TODO: what should this do??
-        return self._formatCustom(itm)
-
-    def _formatRecord(self, itm: Record, **kwargs) -> str:
+    def _fieldRows(self, itm: Definition, table: TypeTable, nested: List[str], oneof: bool = False) -> List[List[str]]:
+        """
+        Field declarations of the fields of a type, in the order of the type table
+        """
+        infos = {f.field_info.extra["id"]: (f.alias, f.field_info) for f in itm.__fields__.values()}
         rows = []
-        for field in itm.__fields__.values():
-            info = field.field_info
+        for field in table.fields:
+            name, info = infos[field.id]
             opts = {"type": info.extra["type"]}
             if ops := info.extra["options"].dict(exclude_unset=True):
                 opts["options"] = ops
-
+            field_table = self._schema.codec.field_table(field)
+            if field.array:
+                label = "repeated "
+            elif oneof or field_table.data_type in self._messageTypes:
+                label = ""
+            else:
+                # explicit presence, so values equal to the proto3 default are kept
+                label = "optional "
             rows.append([
-                self._fieldType(info.extra["type"]),
-                f"{self.formatStr(field.alias)} =",
-                f"{info.extra['id']};",
+                f"{label}{self._fieldType(field_table, name, nested)}",
+                f"{self.formatStr(name)} =",
+                f"{field.id};",
                 self._formatComment(info.description, jadn_opts=opts)
             ])
+        return rows
 
-        properties = self._space_start.sub(self._indent, self._makeTable(
-            rows=rows,
-            table=TableFormat.Ascii,
-            style=TableStyle.STYLE_NONE
-        ))
-        comment = f"\n{self.comment_single} {itm.description}" if itm.description else ""
-        jadn_comment = self._formatComment(type=itm.data_type, jadn_opts=itm.__options__.dict(exclude_unset=True))
-        jadn_comment = f"  {jadn_comment}" if jadn_comment else ""
-        return f"{comment}\nmessage {self.formatStr(itm.name)} {{{jadn_comment}\n{properties}\n}}"
-
-    def _formatCustom(self, itm: Union[Primitive, ArrayOf, MapOf], **kwargs) -> str:
-        custom_proto = self._formatComment(itm.description)
-        custom_proto = f"{custom_proto}\n" if custom_proto else ""
-        return f"\n{custom_proto}{self.comment_single} ${itm.name}({itm.data_type}) {itm.__options__.dict(exclude_unset=True)}"
-
-    # Helper Functions
-    def _fieldType(self, f):
+    def _collectionFields(self, table: TypeTable, nested: List[str]) -> str:
+        """
+        Field 1 of an ArrayOf or MapOf message, the values of the instance
         """
-        Determines the field type for the schema
-        :param f: current type
+        codec = self._schema.codec
+        vtype = self._fieldType(codec.option_table(table, "vtype"), "value", nested)
+        if table.data_type == "ArrayOf":
+            return f"repeated {vtype} values = 1;"
+        ktype = codec.option_table(table, "ktype")
+        key = self._fieldType(ktype, "key", nested)
+        if key in self._mapKeys and ktype.data_type not in self._messageTypes:
+            return f"map<{key}, {vtype}> values = 1;"
+        # keys that are not valid map keys use entry messages, the wire format of a map
+        entry = self._indented(f"{key} key = 1;\n{vtype} value = 2;")
+        nested.append(f"message Entry {{\n{entry}\n}}")
+        return "repeated Entry values = 1;"
+
+    def _fieldType(self, table: TypeTable, name: str, nested: List[str]) -> str:
+        """
+        Determines the protobuf type of a value, anonymous types are added to the nested definitions
+        :param table: type table of the value
+        :param name: name of the field, names the nested definition of anonymous types
+        :param nested: nested definitions of the message
         :return: type mapped to the schema
         """
-        rtn = "string"
-        if re.search(r"(datetime|date|time)", f):
-            if "google/protobuf/timestamp.proto" not in self._proto_imports:
-                self._proto_imports.append("google/protobuf/timestamp.proto")
-            rtn = "google.protobuf.Timestamp"
-
-        if f in self._customFields:
-            rtn = self.formatStr(f)
-
-        elif f in self._fieldMap:
-            rtn = self.formatStr(self._fieldMap.get(f, f))
-        return rtn
-
-    def _wrapAsRecord(self, itm: str) -> str:
+        if table.data_type == "Enumerated" and table.opts.get("pointer"):
+            return "string"
+        if table.data_type not in self._messageTypes and table.data_type != "Enumerated":
+            return self._fieldMap.get(table.data_type, "string")
+        if table.name in self._customFields:
+            return self.formatStr(table.name)
+        # anonymous type, defined by the field options
+        anon = f"{self.formatStr(name)}_{table.data_type}"
+        if table.data_type == "Enumerated":
+            nested.append(self._enum(anon, table))
+        else:
+            inner: List[str] = []
+            fields = self._collectionFields(table, inner) if table.data_type in ("ArrayOf", "MapOf") else ""
+            body = self._indented("\n".join([*inner, fields]))
+            nested.append(f"message {anon} {{\n{body}\n}}")
+        return anon
+
+    def _enum(self, name: str, table: TypeTable, descriptions: Dict[int, str] = None, comment: str = "") -> str:
         """
-        wraps the given item as a record for the schema
-        :param itm: item to wrap
-        :return: item wrapped as a record for the schema
+        Format an enum, value names are prefixed with the enum name as enum values share the scope of the enum
         """
-        lines = list(filter(None, itm.split("\n")))
-        if len(lines) > 1:
-            n = re.search(r"\s[\w\d_]+\s", lines[0]).group()[1:-1]
-            lines = "\n".join(f"{self._indent}{l}" for l in lines)
-            return f"\nmessage {self.formatStr(n)} {{\n{lines}\n}}\n"
-        return ""
+        descriptions = descriptions or {}
+        rows = [[f"{name}_{self.formatStr(f.name)} =", f"{f.id};", self._formatComment(descriptions.get(f.id))] for f in table.fields]
+        if 0 not in table.ids:
+            rows.insert(0, [
+                f"Unknown_{name} =",
+                "0;",
+                f"{self.comment_single} required starting enum number for protobuf3"
+            ])
+        return f"enum {name} {{{comment}\n{self._indented(self._table(rows))}\n}}"
+
+    def _table(self, rows: List[List[str]]) -> str:
+        return self._space_start.sub("", self._makeTable(
+            rows=rows,
+            table=TableFormat.Ascii,
+            style=TableStyle.STYLE_NONE
+        ))
+
+    def _indented(self, lines: str) -> str:
+        return "\n".join(f"{self._indent}{l}" if l else l for l in lines.split("\n"))
 
 
 # Writer Functions
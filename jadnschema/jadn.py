@@ -55,7 +55,7 @@ def dumps(schema: dict, indent: int = 2, strip_com: bool = False, width: int = 0
     return Schema.parse_obj(schema).dumps(indent)
 
 
-def load(file_name: Union[str, BinaryIO, TextIO], extensions: Set[str] = None) -> Schema:
+def load(file_name: Union[str, BinaryIO, TextIO], extensions: Set[str] = None, repository: str = None) -> Schema:
     """
     Load a JADN schema from a file
     :param file_name: JADN schema file to load
@@ -65,14 +65,17 @@ def load(file_name: Union[str, BinaryIO, TextIO], extensions: Set[str] = None) -
         * DerivedEnum:     Replace all derived and pointer enumerations with explicit Enumerated type definitions
         * MapOfEnum:       Replace all MapOf types with listed keys with explicit Map type definitions
         * Link:            Replace Key and Link fields with explicit types
+    :param repository: directory of the packages to resolve the namespaced type references against
     :return: loaded schema
     """
+    if repository is not None:
+        return Schema.load(file_name, repository).simplify(extensions)
     if isinstance(file_name, str):
         return Schema.parse_file(file_name).simplify(extensions)
     return Schema.parse_raw(file_name.read()).simplify(extensions)
 
 
-def loads(schema: Union[bytes, dict, str], extensions: Set[str] = None) -> Schema:
+def loads(schema: Union[bytes, dict, str], extensions: Set[str] = None, repository: str = None) -> Schema:
     """
     load a JADN schema from a string
     :param schema: JADN schema to load
@@ -82,8 +85,11 @@ def loads(schema: Union[bytes, dict, str], extensions: Set[str] = None) -> Schem
         * DerivedEnum:     Replace all derived and pointer enumerations with explicit Enumerated type definitions
         * MapOfEnum:       Replace all MapOf types with listed keys with explicit Map type definitions
         * Link:            Replace Key and Link fields with explicit types
+    :param repository: directory of the packages to resolve the namespaced type references against
     :return: loaded schema
     """
+    if repository is not None:
+        return Schema.loads(schema, repository).simplify(extensions)
     if isinstance(schema, dict):
         return Schema.parse_obj(schema).simplify(extensions)
     return Schema.parse_raw(schema).simplify(extensions)
@@ -2,6 +2,7 @@
 JADN Schema definition objects
 """
 from pydantic import Field
+from .codec import EncodingStyle
 from .info import Information
 from .schema import Schema
 from .definitions.primitives import Binary, Boolean, Integer, Number, String
@@ -10,6 +11,7 @@ from .definitions.structures import Array, ArrayOf, Choice, Map, Enumerated, Map
 
 __all__ = [
     "Schema",
+    "EncodingStyle",
     "Information",
     # Definitions
     "Binary",
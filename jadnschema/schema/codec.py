@@ -0,0 +1,419 @@
+"""
+JADN Schema Codec
+Convert instances of schema types between the verbose, compact & concise JSON encodings
+"""
+import base64
+import binascii
+import re
+
+from ipaddress import IPv4Address, IPv6Address
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+from .consts import PRIMITIVE_TYPES
+from .definitions import Options
+from ..utils import EnumBase
+
+__all__ = ["ARRAY_FORMATS", "EncodingStyle", "FieldTable", "SchemaCodec", "TypeTable", "check_type"]
+# type options that define an anonymous type when given as field options
+_ANONYMOUS_OPTIONS = ("enum", "pointer", "ktype", "vtype", "id", "format")
+
+
+def _from_base64(val: str) -> bytes:
+    # base64url without padding, standard base64 is also accepted
+    return base64.urlsafe_b64decode(val.translate(_B64_STANDARD) + "=" * (-len(val) % 4))
+
+
+def _to_base64(val: bytes) -> str:
+    return base64.urlsafe_b64encode(val).rstrip(b"=").decode("ascii")
+
+
+_B64_STANDARD = str.maketrans("+/", "-_", "=")
+# Binary format -> (string to bytes, bytes to string)
+_BINARY_FORMATS: Dict[str, Tuple[Callable[[str], bytes], Callable[[bytes], str]]] = {
+    "x": (bytes.fromhex, lambda b: b.hex().upper()),
+    "eui": (lambda v: bytes.fromhex(re.sub(r"[-:.]", "", v)), lambda b: "-".join(f"{o:02X}" for o in b)),
+    "ipv4-addr": (lambda v: IPv4Address(v).packed, lambda b: str(IPv4Address(b))),
+    "ipv6-addr": (lambda v: IPv6Address(v).packed, lambda b: str(IPv6Address(b)))
+}
+# Array format -> string to fields, the string form is `address[/prefix]`
+ARRAY_FORMATS: Dict[str, Callable[[str], list]] = {
+    "ipv4-net": lambda v: [v.split("/")[0], *(int(p) for p in v.split("/")[1:2])],
+    "ipv6-net": lambda v: [v.split("/")[0], *(int(p) for p in v.split("/")[1:2])]
+}
+
+
+class EncodingStyle(str, EnumBase):
+    """
+    Encoding of a schema type instance
+    """
+    VERBOSE = "verbose"  #: Records & Maps keyed by field name, Enumerated as names
+    COMPACT = "compact"  #: Records as arrays, Maps keyed by field ID, Enumerated as IDs
+    CONCISE = "concise"  #: Records as arrays, Maps keyed by field name, Enumerated as names
+
+
+class _Style(NamedTuple):
+    """
+    Encoding flags of a style
+    """
+    arrays: bool  # Records as arrays
+    ids: bool     # Field IDs as keys & Enumerated as IDs
+    binary: bool  # Binary values as bytes
+
+
+class FieldTable:
+    """
+    Precomputed field of a type table, `array` is set for fields with multiple values
+    """
+    id: int
+    name: str
+    type: str
+    array: bool
+
+    __slots__ = ("id", "name", "type", "array")
+
+    def __init__(self, id_: int, name: str, type_: str, array: bool = False):
+        self.id = id_
+        self.name = name
+        self.type = type_
+        self.array = array
+
+
+class TypeTable:
+    """
+    Precomputed type table, fields are indexed by position, name & ID
+    """
+    name: str
+    data_type: str
+    opts: Dict[str, Any]
+    fields: List[FieldTable]
+    names: Dict[str, FieldTable]
+    ids: Dict[int, FieldTable]
+    positions: Dict[str, int]
+
+    __slots__ = ("name", "data_type", "opts", "fields", "names", "ids", "positions")
+
+    def __init__(self, name: str, data_type: str, opts: Dict[str, Any], fields: List[FieldTable] = None):
+        self.name = name
+        self.data_type = data_type
+        self.opts = opts
+        self.fields = fields or []
+        self.names = {f.name: f for f in self.fields}
+        self.ids = {f.id: f for f in self.fields}
+        self.positions = {f.name: i for i, f in enumerate(self.fields)}
+
+    def field(self, key: Union[int, str]) -> FieldTable:
+        """
+        Find the field by name or ID, IDs may be strings as JSON object keys are strings
+        :param key: field name or ID
+        :raise ValueError: field is not defined
+        :return: field
+        """
+        if field := self.names.get(key) if isinstance(key, str) else None:
+            return field
+        if isinstance(key, int) or (isinstance(key, str) and key.isdigit()):
+            if field := self.ids.get(int(key)):
+                return field
+        raise ValueError(f"{self.name} does not have a field `{key}`")
+
+
+class SchemaCodec:
+    """
+    Encode and decode type instances of a schema, the type tables are computed once when the codec is created
+    """
+    _types: Dict[str, TypeTable]
+
+    def __init__(self, types: List[list]):
+        """
+        :param types: JADN formatted type definitions
+        """
+        self._types = {t: TypeTable(t, t, {}) for t in PRIMITIVE_TYPES}
+        for type_def in types:
+            name, data_type, opts, *rest = type_def
+            fields = rest[1] if len(rest) > 1 else []
+            self._types[name] = self._make_type(name, data_type, Options.list2dict(opts), fields)
+
+        # derived enumerations, including anonymous ones, use the fields of the type they are derived from
+        for type_ in list(self._types.values()):
+            if type_.data_type == "Enumerated" and (ref := type_.opts.get("enum")) and (ref_type := self._types.get(ref)):
+                self._types[type_.name] = TypeTable(type_.name, "Enumerated", type_.opts, [FieldTable(f.id, f.name, "") for f in ref_type.fields])
+
+    def encode(self, value: Any, type_: str, style: EncodingStyle = EncodingStyle.VERBOSE, binary: bool = False) -> Any:
+        """
+        Encode an instance, given in the verbose (API) form, of the type
+        :param value: instance to encode
+        :param type_: name of the type
+        :param style: encoding style
+        :param binary: encode Binary values as bytes rather than their string form, for binary serializations
+        :raise ValueError: instance does not match the structure of the type
+        :return: encoded instance
+        """
+        style = EncodingStyle(style)
+        return self._encode(value, self.table(type_), _Style(style != EncodingStyle.VERBOSE, style == EncodingStyle.COMPACT, binary))
+
+    def decode(self, value: Any, type_: str) -> Any:
+        """
+        Decode an instance of the type to the verbose (API) form, any of the encoding styles are accepted
+        Binary values given as bytes are converted to their string form
+        :param value: encoded instance
+        :param type_: name of the type
+        :raise ValueError: instance does not match the structure of the type
+        :return: decoded instance
+        """
+        return self._decode(value, self.table(type_))
+
+    def table(self, name: str) -> TypeTable:
+        """
+        Type table of a schema or primitive type, including the anonymous types of fields
+        :param name: name of the type
+        :raise ValueError: type is not defined
+        :return: type table
+        """
+        if type_ := self._types.get(name):
+            return type_
+        raise ValueError(f"{name} is not a valid type within the schema")
+
+    def field_table(self, field: FieldTable) -> TypeTable:
+        """
+        Type table of a field, fields of undefined types, e.g. pointers, are Strings
+        :param field: field of a type table
+        :return: type table
+        """
+        return self._types.get(field.type) or self._types["String"]
+
+    def option_table(self, type_: TypeTable, opt: str) -> TypeTable:
+        """
+        Type table of a type option, e.g. `ktype` or `vtype`, undefined types are Strings
+        :param type_: type table with the option
+        :param opt: name of the option
+        :return: type table
+        """
+        return self._types.get(type_.opts.get(opt)) or self._types["String"]
+
+    # Helpers
+
+    def _make_type(self, name: str, data_type: str, opts: Dict[str, Any], fields: list) -> TypeTable:
+        if data_type == "Enumerated":
+            return TypeTable(name, data_type, opts, [FieldTable(f[0], f[1], "") for f in fields])
+
+        type_fields = []
+        for f_id, f_name, f_type, f_opts, *_ in fields:
+            f_opts = Options.list2dict(f_opts)
+            # anonymous types, type options given as field options
+            if type_opts := {o: v for o, v in f_opts.items() if o in _ANONYMOUS_OPTIONS}:
+                anon = f"{name}${f_name}"
+                self._types[anon] = TypeTable(anon, f_type, type_opts)
+                f_type = anon
+            type_fields.append(FieldTable(f_id, f_name, f_type, f_opts.get("maxc", 1) != 1 and "ktype" not in f_opts and "vtype" not in f_opts))
+        return TypeTable(name, data_type, opts, type_fields)
+
+    def _field_type(self, field: FieldTable) -> Optional[TypeTable]:
+        return self._types.get(field.type)
+
+    def _encode(self, value: Any, type_: TypeTable, style: _Style) -> Any:
+        if encoder := self._encoders.get(type_.data_type):
+            return encoder(self, value, type_, style)
+        return value
+
+    def _encode_field(self, value: Any, field: FieldTable, style: _Style) -> Any:
+        if (field_type := self._field_type(field)) is None:
+            return value
+        if field.array and isinstance(value, list):
+            return [self._encode(v, field_type, style) for v in value]
+        return self._encode(value, field_type, style)
+
+    def _encode_binary(self, value: Union[bytes, str], type_: TypeTable, style: _Style) -> Union[bytes, str]:
+        if not style.binary or isinstance(value, (bytes, bytearray)):
+            return value
+        check_type(value, str, type_)
+        to_bytes, _ = _BINARY_FORMATS.get(type_.opts.get("format"), (_from_base64, None))
+        try:
+            return to_bytes(value)
+        except (binascii.Error, ValueError) as e:
+            raise ValueError(f"{type_.name} is not a valid Binary value, {e}") from e
+
+    def _encode_enumerated(self, value: Union[int, str], type_: TypeTable, style: _Style) -> Union[int, str]:
+        if type_.opts.get("pointer") or type_.opts.get("id"):
+            return value
+        field = type_.field(value)
+        return field.id if style.ids else field.name
+
+    def _encode_choice(self, value: dict, type_: TypeTable, style: _Style) -> dict:
+        check_type(value, dict, type_)
+        if len(value) != 1:
+            raise ValueError(f"{type_.name} should have a single key, not {len(value)}")
+        return self._encode_map(value, type_, style)
+
+    def _encode_map(self, value: dict, type_: TypeTable, style: _Style) -> dict:
+        check_type(value, dict, type_)
+        rtn = {}
+        for key, val in value.items():
+            field = type_.field(key)
+            rtn[field.id if style.ids or type_.opts.get("id") else field.name] = self._encode_field(val, field, style)
+        return rtn
+
+    def _encode_record(self, value: dict, type_: TypeTable, style: _Style) -> Union[dict, list]:
+        if not style.arrays:
+            return self._encode_map(value, type_, style)
+        check_type(value, dict, type_)
+        rtn = [None] * len(type_.fields)
+        for key, val in value.items():
+            field = type_.field(key)
+            rtn[type_.positions[field.name]] = self._encode_field(val, field, style)
+        # optional fields at the end of the record are omitted
+        while rtn and rtn[-1] is None:
+            rtn.pop()
+        return rtn
+
+    def _encode_array(self, value: Union[list, str], type_: TypeTable, style: _Style) -> Union[list, str]:
+        if isinstance(value, str) and type_.opts.get("format") in ARRAY_FORMATS:
+            # string form of a formatted Array, split into its fields for binary serializations
+            if not style.binary:
+                return value
+            value = ARRAY_FORMATS[type_.opts["format"]](value)
+        check_type(value, (list, tuple), type_)
+        if len(value) > len(type_.fields):
+            raise ValueError(f"{type_.name} has {len(type_.fields)} fields, not {len(value)}")
+        return [None if v is None else self._encode_field(v, f, style) for v, f in zip(value, type_.fields)]
+
+    def _encode_arrayof(self, value: list, type_: TypeTable, style: _Style) -> list:
+        check_type(value, (list, set, tuple), type_)
+        if (vtype := self._types.get(type_.opts.get("vtype"))) is None:
+            return list(value)
+        return [self._encode(v, vtype, style) for v in value]
+
+    def _encode_mapof(self, value: Union[dict, list], type_: TypeTable, style: _Style) -> Union[dict, list]:
+        ktype, vtype = self._mapof_types(type_)
+        pairs = [
+            (k if ktype is None else self._encode(k, ktype, style), v if vtype is None else self._encode(v, vtype, style))
+            for k, v in _pairs(value, type_)
+        ]
+        if ktype is None or ktype.data_type in ("String", "Enumerated"):
+            return dict(pairs)
+        # keys that are not strings are encoded as an array of alternating keys and values
+        return [i for p in pairs for i in p]
+
+    def _decode(self, value: Any, type_: TypeTable) -> Any:
+        if decoder := self._decoders.get(type_.data_type):
+            return decoder(self, value, type_)
+        return value
+
+    def _decode_field(self, value: Any, field: FieldTable) -> Any:
+        if (field_type := self._field_type(field)) is None:
+            return value
+        if field.array and isinstance(value, list):
+            return [self._decode(v, field_type) for v in value]
+        return self._decode(value, field_type)
+
+    def _decode_binary(self, value: Union[bytes, str], type_: TypeTable) -> str:
+        if isinstance(value, (bytes, bytearray)):
+            _, to_str = _BINARY_FORMATS.get(type_.opts.get("format"), (None, _to_base64))
+            return to_str(bytes(value))
+        return value
+
+    def _decode_enumerated(self, value: Union[int, str], type_: TypeTable) -> Union[int, str]:
+        if type_.opts.get("pointer"):
+            return value
+        field = type_.field(value)
+        return field.id if type_.opts.get("id") else field.name
+
+    def _decode_choice(self, value: dict, type_: TypeTable) -> dict:
+        check_type(value, dict, type_)
+        if len(value) != 1:
+            raise ValueError(f"{type_.name} should have a single key, not {len(value)}")
+        return self._decode_map(value, type_)
+
+    def _decode_map(self, value: dict, type_: TypeTable) -> dict:
+        check_type(value, dict, type_)
+        rtn = {}
+        for key, val in value.items():
+            field = type_.field(key)
+            rtn[field.id if type_.opts.get("id") else field.name] = self._decode_field(val, field)
+        return rtn
+
+    def _decode_record(self, value: Union[dict, list], type_: TypeTable) -> dict:
+        if isinstance(value, dict):
+            return self._decode_map(value, type_)
+        check_type(value, (list, tuple), type_)
+        if len(value) > len(type_.fields):
+            raise ValueError(f"{type_.name} has {len(type_.fields)} fields, not {len(value)}")
+        return {f.name: self._decode_field(v, f) for v, f in zip(value, type_.fields) if v is not None}
+
+    def _decode_array(self, value: Union[list, str], type_: TypeTable) -> Union[list, str]:
+        if isinstance(value, str) and type_.opts.get("format") in ARRAY_FORMATS:
+            return value
+        check_type(value, (list, tuple), type_)
+        if len(value) > len(type_.fields):
+            raise ValueError(f"{type_.name} has {len(type_.fields)} fields, not {len(value)}")
+        rtn = [None if v is None else self._decode_field(v, f) for v, f in zip(value, type_.fields)]
+        if type_.opts.get("format") in ARRAY_FORMATS and any(isinstance(v, (bytes, bytearray)) for v in value):
+            # split by a binary serialization, restore the string form
+            return "/".join(str(v) for v in rtn if v is not None)
+        return rtn
+
+    def _decode_arrayof(self, value: list, type_: TypeTable) -> list:
+        check_type(value, (list, tuple), type_)
+        if (vtype := self._types.get(type_.opts.get("vtype"))) is None:
+            return list(value)
+        return [self._decode(v, vtype) for v in value]
+
+    def _decode_mapof(self, value: Union[dict, list], type_: TypeTable) -> dict:
+        ktype, vtype = self._mapof_types(type_)
+        if isinstance(value, list):
+            if len(value) % 2:
+                raise ValueError(f"{type_.name} should have a value for each key")
+            value = list(zip(value[::2], value[1::2]))
+        return {
+            k if ktype is None else _hashable(self._decode(k, ktype)): v if vtype is None else self._decode(v, vtype)
+            for k, v in _pairs(value, type_)
+        }
+
+    def _mapof_types(self, type_: TypeTable) -> Tuple[Optional[TypeTable], Optional[TypeTable]]:
+        return self._types.get(type_.opts.get("ktype")), self._types.get(type_.opts.get("vtype"))
+
+    # data_type -> codec method
+    _encoders: Dict[str, Callable[..., Any]] = {
+        "Array": _encode_array,
+        "ArrayOf": _encode_arrayof,
+        "Binary": _encode_binary,
+        "Choice": _encode_choice,
+        "Enumerated": _encode_enumerated,
+        "Map": _encode_map,
+        "MapOf": _encode_mapof,
+        "Record": _encode_record
+    }
+    _decoders: Dict[str, Callable[..., Any]] = {
+        "Array": _decode_array,
+        "ArrayOf": _decode_arrayof,
+        "Binary": _decode_binary,
+        "Choice": _decode_choice,
+        "Enumerated": _decode_enumerated,
+        "Map": _decode_map,
+        "MapOf": _decode_mapof,
+        "Record": _decode_record
+    }
+
+
+def check_type(value: Any, types: Union[type, Tuple[type, ...]], type_: TypeTable) -> None:
+    """
+    Check the Python type of an instance
+    :param value: instance to check
+    :param types: valid Python types
+    :param type_: type table of the instance
+    :raise ValueError: instance is not one of the types
+    """
+    if not isinstance(value, types):
+        raise ValueError(f"{type_.name} is not a valid {type_.data_type}, got {type(value).__name__}")
+
+
+def _pairs(value: Union[dict, list], type_: TypeTable) -> List[Tuple[Any, Any]]:
+    if isinstance(value, dict):
+        return list(value.items())
+    check_type(value, (list, tuple), type_)
+    return [tuple(p) for p in value]
+
+
+def _hashable(key: Any) -> Any:
+    if isinstance(key, list):
+        return tuple(_hashable(k) for k in key)
+    if isinstance(key, dict):
+        return tuple((k, _hashable(v)) for k, v in key.items())
+    return key
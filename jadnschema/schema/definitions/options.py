@@ -52,7 +52,7 @@ class Options(BaseModel):
             if inspect.isclass(arg) or isinstance(arg, Options):
                 keys = [*self.__fields__, *self.__custom__]
                 data.update({k: getattr(arg, k) for k in keys if getattr(arg, k, None) not in NULL_ARGS})
-            elif isinstance(arg, list):
+            elif isinstance(arg, (list, tuple)):
                 data.update(self.list2dict(arg))
             elif isinstance(arg, dict):
                 data.update(arg)
@@ -1,91 +1,121 @@
 """
 JADN Schema Extension removal functions
+Type definitions are unfolded on a lightweight representation with plain option dicts, the requested extensions are
+applied in a single traversal of the fields followed by a single traversal of the types
 """
 import os
-import inflect
 
-from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Dict, Generator, List, NoReturn, Optional, Set, Tuple, Union
 from .definitions import Options
-from .consts import CORE_TYPES, DEF_ORDER_FILE_NAMES, EXTENSIONS, ID_OPTIONS, OPTION_ID
+from .consts import CORE_TYPES, DEF_ORDER_FILE_NAMES, EXTENSIONS, FIELD_OPTION_KEYS, OPTION_ID, OPTIONS
 from ..exceptions import SchemaException
 __all__ = ["unfold_extensions"]
 
+# Types
+OptionDict = Dict[str, Union[bool, int, float, str]]
+
 
-@dataclass
 class EnumField:
+    __slots__ = ("id", "value", "description")
     id: int
     value: str
-    description: str = ""
+    description: str
+
+    def __init__(self, id: int, value: str, description: str = ""):  # pylint: disable=redefined-builtin
+        self.id = id
+        self.value = value
+        self.description = description
+
+    def enum(self) -> "EnumField":
+        return self
 
     def list(self) -> list:
         return [self.id, self.value, self.description]
 
 
-@dataclass
 class DefField:
+    __slots__ = ("id", "name", "type", "options", "description")
     id: int
     name: str
     type: str
-    options: Options = field(default_factory=Options)
-    description: str = ""
+    options: OptionDict
+    description: str
 
-    def __post_init__(self):
-        self.options = Options(self.options)
+    def __init__(self, id: int, name: str, type: str, options: Union[List[str], OptionDict] = None, description: str = ""):  # pylint: disable=redefined-builtin
+        self.id = id
+        self.name = name
+        self.type = type
+        self.options = to_dict(options)
+        self.description = description
 
     def enum(self) -> EnumField:
-        return EnumField(id=self.id, value=self.name, description=self.description)
+        return EnumField(self.id, self.name, self.description)
+
+    def split(self) -> Tuple[OptionDict, OptionDict]:
+        """
+        Split the options into Field options and Type options
+        :return: Tuple of Field & Type options
+        """
+        field_opts, type_opts = {}, {}
+        for opt, val in self.options.items():
+            (field_opts if opt in FIELD_KEYS else type_opts)[opt] = val
+        return field_opts, type_opts
 
     def list(self) -> list:
-        return [self.id, self.name, self.type, self.options, self.description]
+        return [self.id, self.name, self.type, to_list(self.options), self.description]
 
 
-@dataclass
 class DefType:
+    __slots__ = ("name", "type", "options", "description", "fields")
     name: str
     type: str
-    options: Options = field(default_factory=Options)
-    description: str = ""
-    fields: Optional[Union[List[DefField], List[EnumField]]] = field(default_factory=list)
-
-    def __post_init__(self):
-        self.options = Options(self.options)
-        Field = EnumField if self.type == "Enumerated" else DefField
-        fields = []
-        for f in self.fields:
-            if isinstance(f, Field):
-                fields.append(f)
-            else:
-                fields.append(Field(*f))
-        self.fields = fields
-
-    def enumerated(self) -> "DefType":
-        if self.type == "Enumerated":
-            return self
-        return DefType(self.name, self.type, self.options, self.description, [f.enum() for f in self.fields])
+    options: OptionDict
+    description: str
+    fields: Union[List[DefField], List[EnumField]]
+
+    def __init__(self, name: str, type: str, options: Union[List[str], OptionDict] = None, description: str = "", fields: list = None):  # pylint: disable=redefined-builtin
+        self.name = name
+        self.type = type
+        self.options = to_dict(options)
+        self.description = description
+        Field = EnumField if type == "Enumerated" else DefField
+        self.fields = [f if isinstance(f, (EnumField, DefField)) else Field(*f) for f in fields or ()]
 
     def list(self) -> list:
-        return [self.name, self.type, self.options, self.description, [f.list() for f in self.fields]]
+        return [self.name, self.type, to_list(self.options), self.description, [f.list() for f in self.fields]]
 
 
-# Types
 DefinitionDict = Dict[str, DefType]
 # Consts
 ENUM_ID = OPTION_ID["enum"]
+POINTER_ID = OPTION_ID["pointer"]
+FIELD_KEYS = frozenset(FIELD_OPTION_KEYS)
+OPTION_ORDER = {v[0]: v[2] for v in OPTIONS.values()}
 
 
 # Helpers
-def epx(opts: Options) -> Union[str, None]:
-    ex = opts.enum
-    return ex if ex is not None else opts.pointer
+def to_dict(opts: Union[List[str], OptionDict, None]) -> OptionDict:
+    if opts is None:
+        return {}
+    return dict(opts) if isinstance(opts, dict) else Options.list2dict(opts)
+
+
+def to_list(opts: OptionDict) -> List[str]:
+    return Options.dict2list({k: opts[k] for k in sorted(opts, key=OPTION_ORDER.get)})
+
+
+def epx(opts: OptionDict) -> Union[str, None]:
+    ex = opts.get("enum")
+    return ex if ex is not None else opts.get("pointer")
 
 
-def enum_pointer_name(opts: Options, sys: str) -> Union[str, None]:
+def enum_pointer_name(opts: OptionDict, sys: str) -> Union[str, None]:
     val = epx(opts)
     if val is None:
         return None
-    oname = "Enum" if opts.enum else "Pointer"
-    return f"{val}{sys}{oname}{'-Id' if opts.id else ''}"
+    oname = "Enum" if opts.get("enum") else "Pointer"
+    return f"{val}{sys}{oname}{'-Id' if opts.get('id') else ''}"
 
 
 def get_def_order(basedir: str = os.path.curdir) -> Tuple[str, ...]:
@@ -97,204 +127,216 @@ def get_def_order(basedir: str = os.path.curdir) -> Tuple[str, ...]:
     return ()
 
 
-# Extension unfolding/simplify
-def unfold_link(defs: DefinitionDict, sys: str) -> NoReturn:
+@lru_cache(maxsize=1)
+def inflect_engine() -> "inflect.engine":
+    # inflect is slow to import, only load it once a multi-valued field needs a name
+    import inflect  # pylint: disable=import-outside-toplevel
+    return inflect.engine()
+
+
+@lru_cache(maxsize=4096)
+def array_name(type_name: str, sys: str, field_name: str) -> str:
     """
-    Replace Key and Link options with explicit types
-    :param defs:
-    :param sys:
-    :return:
+    Name of the ArrayOf definition for a multi-valued field, shared across schemas
+    :param type_name: name of the type the field is defined in
+    :param sys: character used to denote a system defined definition
+    :param field_name: name of the field
+    :return: name of the ArrayOf definition
     """
-    ltypes = []     # Types that have links
-    keys = {}       # Key names for types that have keys
+    p = inflect_engine()
+    return array_plural_name(type_name, sys, p.plural(field_name) if p.get_count(field_name) == 1 else field_name)
 
+
+def array_plural_name(type_name: str, sys: str, plural: str) -> str:
+    return "".join(map(str.capitalize, [type_name, sys, plural]))
+
+
+def field_types(defs: DefinitionDict) -> Generator[DefType, None, None]:
     for type_def in tuple(defs.values()):
-        if len(type_def.fields) > 0 and type_def.type != "Enumerated":
-            for field_def in type_def.fields:
-                field_opts, type_opts = field_def.options.split()
-                if field_opts.key:
-                    delattr(field_opts, "key")
-                    new_name = f"{type_def.name}{sys}{field_def.name}"
-                    if new_name not in defs:
-                        defs[new_name] = DefType(
-                            name=new_name,
-                            type=field_def.type,
-                            options=type_opts,
-                            description=field_def.description
-                        )
-                    # Redirect field to explicit type definition
-                    field_def.update(
-                        type=new_name,
-                        options=field_opts
-                    )
-                    keys.update({type_def.name: new_name})
-                elif field_opts.link and type_def.name not in ltypes:
-                    ltypes.append(type_def.name)
-
-    for type_name in ltypes:
-        type_def = defs.get(type_name)
-        for field_def in type_def.fields:
-            field_opts, type_opts = field_def.options.split()
-            if field_opts.link:
-                delattr(field_def.options, "link")
-                if key_type := keys.get(field_def.type):
-                    field_def.type = key_type
-                else:
-                    raise SchemaException(f'{type_def.name}/{field_def.name}: "{field_def.type}" has no primary key')
+        if type_def.fields and type_def.type != "Enumerated":
+            yield type_def
 
 
-def unfold_multiplicity(defs: DefinitionDict, sys: str) -> NoReturn:
+# Extension unfolding/simplify
+def unfold_link(defs: DefinitionDict, sys: str) -> NoReturn:
     """
-    Replace field multiplicity with explicit ArrayOf type definitions
-    :param defs:
-    :param sys:
-    :return:
+    Replace Key and Link options with explicit types
+    :param defs: type definitions to unfold
+    :param sys: character used to denote a system defined definition
     """
-    p = inflect.engine()
-    for type_def in tuple(defs.values()):
-        if len(type_def.fields) > 0 and type_def.type != "Enumerated":
-            for field_def in type_def.fields:
-                field_opts, type_opts = field_def.options.split()
-                if field_opts.maxc is not None and field_opts.maxc != 1:
-                    minc = field_opts.get("minc", 1) or 1
-                    new_name = [type_def.name, sys, p.plural(field_def.name) if p.get_count(field_def.name) == 1 else field_def.name]
-                    new_name = "".join(map(str.capitalize, new_name))
-                    # Point existing field to new ArrayOf
-                    if new_name not in defs:
-                        defs[new_name] = DefType(
-                            name=new_name,
-                            type="ArrayOf",
-                            options=Options(
-                                vtype=field_def.type if field_def.type != "ArrayOf" else type_opts.vtype,
-                                minv=max(minc, 1),  # Don't allow empty ArrayOf
-                                **({"maxv": field_opts.maxc} if field_opts.maxc > 1 else {}),  # maxv defaults to 0
-                                **({"unique": True} if type_opts.unique else {})  # Move unique option to ArrayOf
-                            ),
-                            description=field_def.description
-                        )
-                    delattr(field_opts, "maxc")
-                    field_def.type = new_name
-                    field_def.options = field_opts
-
-
-def unfold_anonymous_types(defs: DefinitionDict, sys: str) -> NoReturn:
+    links = []  # Fields that have links
+    keys = {}   # Key names for types that have keys
+
+    for type_def in field_types(defs):
+        for field_def in type_def.fields:
+            if field_def.options.get("key"):
+                field_opts, type_opts = field_def.split()
+                del field_opts["key"]
+                if field_def.type not in CORE_TYPES:  # Key is already a defined type, don't alias it
+                    new_name = field_def.type
+                    field_opts.update(type_opts)
+                else:
+                    new_name = f"{type_def.name}{sys}{field_def.name}"
+                if new_name not in defs:
+                    defs[new_name] = DefType(new_name, field_def.type, type_opts, field_def.description)
+                # Redirect field to explicit type definition
+                field_def.type = new_name
+                field_def.options = field_opts
+                keys[type_def.name] = new_name
+            elif field_def.options.get("link"):
+                links.append((type_def, field_def))
+
+    for type_def, field_def in links:
+        del field_def.options["link"]
+        if key_type := keys.get(field_def.type):
+            field_def.type = key_type
+        else:
+            raise SchemaException(f'{type_def.name}/{field_def.name}: "{field_def.type}" has no primary key')
+
+
+def unfold_fields(defs: DefinitionDict, sys: str, multiplicity: bool, anonymous: bool, plurals: Dict[str, str] = None) -> NoReturn:
     """
-    Replace anonymous types in fields with explicit type definitions
-    :param defs:
-    :param sys:
-    :return:
+    Replace field multiplicity with explicit ArrayOf type definitions and anonymous types in fields with explicit type
+    definitions, in a single traversal of the fields
+    ArrayOf definitions are added before the anonymous definitions, and take precedence over them, so the result is the
+    same as unfolding multiplicity over all fields before the anonymous types
+    :param defs: type definitions to unfold
+    :param sys: character used to denote a system defined definition
+    :param multiplicity: replace field multiplicity
+    :param anonymous: replace anonymous types
+    :param plurals: plural names of multi-valued fields, fields not given are named using inflect
     """
-    for type_def in tuple(defs.values()):
-        if len(type_def.fields) > 0 and type_def.type != "Enumerated":
-            for field_def in type_def.fields:
-                # If FieldOptions contains a type option, create an explicit type
-                field_opts, type_opts = field_def.options.split()
-                if type_opts.dict(exclude_unset=True):
-                    # Move all type options to new type
-                    name = enum_pointer_name(type_opts, sys)  # If enum/pointer option, use derived enum typename
-                    new_name = [name] if name else [type_def.name, sys, field_def.name]
-                    new_name = "".join(map(str.capitalize, new_name)).replace("_", "-")
-                    if new_name not in defs:
-                        new_type = field_def.type if epx(type_opts) is None else "Enumerated"
-                        if new_type not in CORE_TYPES:  # Don't create a bad type definition
-                            raise SchemaException(f"{type_def.name}.{field_def.name} -> {new_type} is not a built in type")
-                        defs[new_name] = DefType(
-                            name=new_name,
-                            type=new_type,
-                            options=type_opts,
-                            description=field_def.description
-                        )
-                    # Redirect field to explicit type definition
-                    field_def.type = new_name
-                    field_def.options = field_opts
-
-
-def unfold_derived_enum(defs: DefinitionDict, sys: str) -> NoReturn:
+    arrays: DefinitionDict = {}
+    anonymous_types: DefinitionDict = {}
+    plurals = plurals or {}
+
+    for type_def in field_types(defs):
+        for field_def in type_def.fields:
+            if not field_def.options:
+                continue
+            field_opts, type_opts = field_def.split()
+            maxc = field_opts.get("maxc")
+            if multiplicity and maxc is not None and maxc != 1:
+                minc = field_opts.get("minc", 1) or 1
+                if plural := plurals.get(field_def.name):
+                    new_name = array_plural_name(type_def.name, sys, plural)
+                else:
+                    new_name = array_name(type_def.name, sys, field_def.name)
+                # Point existing field to new ArrayOf
+                if new_name not in defs and new_name not in arrays:
+                    opts = {
+                        "vtype": field_def.type if field_def.type != "ArrayOf" else type_opts.get("vtype"),
+                        "minv": max(minc, 1)  # Don't allow empty ArrayOf
+                    }
+                    if maxc > 1:  # maxv defaults to 0
+                        opts["maxv"] = maxc
+                    if type_opts.get("unique"):  # Move unique option to ArrayOf
+                        opts["unique"] = True
+                    arrays[new_name] = DefType(new_name, "ArrayOf", opts, field_def.description)
+                del field_opts["maxc"]
+                field_def.type = new_name
+                field_def.options = field_opts
+            elif anonymous and type_opts:
+                # Move all type options to new type
+                name = enum_pointer_name(type_opts, sys)  # If enum/pointer option, use derived enum typename
+                new_name = [name] if name else [type_def.name, sys, field_def.name]
+                new_name = "".join(map(str.capitalize, new_name)).replace("_", "-")
+                if new_name not in defs and new_name not in anonymous_types:
+                    new_type = field_def.type if epx(type_opts) is None else "Enumerated"
+                    if new_type not in CORE_TYPES:  # Don't create a bad type definition
+                        raise SchemaException(f"{type_def.name}.{field_def.name} -> {new_type} is not a built in type")
+                    anonymous_types[new_name] = DefType(new_name, new_type, type_opts, field_def.description)
+                # Redirect field to explicit type definition
+                field_def.type = new_name
+                field_def.options = field_opts
+
+    defs.update(arrays)
+    defs.update({k: v for k, v in anonymous_types.items() if k not in arrays})
+
+
+def unfold_types(defs: DefinitionDict, sys: str, derived_enum: bool, mapof_enum: bool) -> NoReturn:
     """
-    Generate Enumerated list of fields or JSON Pointers
-    :param defs:
-    :param sys:
-    :return:
+    Generate Enumerated list of fields or JSON Pointers and replace MapOf(enumerated key) with explicit Map, in a single
+    traversal of the ArrayOf/MapOf types once the Enumerated types are expanded
+    :param defs: type definitions to unfold
+    :param sys: character used to denote a system defined definition
+    :param derived_enum: generate derived enumerations
+    :param mapof_enum: replace MapOf with explicit Map
     """
     def enum_items(def_name: str) -> List[EnumField]:
-        if (def_type := defs.get(def_name)) and len(def_type.fields) > 0:
-            return [f.enum_field() for f in def_type.fields]
+        if (def_type := defs.get(def_name)) and def_type.fields:
+            return [f.enum() for f in def_type.fields]
         return []
 
-    def pointer_items(def_name: str) -> List[EnumField]:
-        def pathnames(d_name: str, base="") -> Generator[list, None, None]:  # Walk subfields of referenced type
-            if def_type := defs.get(d_name):
-                if len(def_type.fields) > 0:
-                    for f in def_type.fields:
-                        if f.options.dir:
-                            yield from pathnames(f.type, f"{f.name}/")
-                        else:
-                            yield [f.id, f"{base}{f.name}", f.description]
+    pointer_paths: Dict[str, List[EnumField]] = {}  # JSON Pointers of each walked type, relative to the type
+    walking: List[str] = []  # Types being walked, to detect cycles
+
+    def pointer_items(def_name: str) -> List[EnumField]:  # Walk subfields of referenced type
+        if (items := pointer_paths.get(def_name)) is not None:
+            return list(items)
+        if def_name in walking:
+            cycle = " -> ".join(walking[walking.index(def_name):] + [def_name])
+            raise SchemaException(f"{def_name} contains itself through pointer directories: {cycle}")
+        if (def_type := defs.get(def_name)) is None:
+            raise SchemaException(f"{def_name} does not exists within the schema")
+
+        walking.append(def_name)
+        items = []
+        for f in def_type.fields:
+            if isinstance(f, DefField) and f.options.get("dir"):
+                items.extend(EnumField(i.id, f"{f.name}/{i.value}", i.description) for i in pointer_items(f.type))
             else:
-                raise SchemaException(f"{d_name} does not exists within the schema")
-        return [EnumField(*f) for f in pathnames(def_name)]
-
-    def update_eref(enums: dict, opts: Options, optname: str) -> NoReturn:
-        if optVal := getattr(opts, optname):
-            tmp_opts = Options([optVal] if optVal[0] in ID_OPTIONS else [])
-            if name := enum_pointer_name(tmp_opts, sys):
-                if name in enums:  # Reference existing Enumerated type
-                    setattr(opts, optname, enums[name])
-                else:  # Make new Enumerated type
-                    make_items = enum_items if opts.enum else pointer_items
-                    setattr(opts, optname, name)
-                    defs[name] = DefType(
-                        name=name,
-                        type="Enumerated",
-                        description="",
-                        fields=make_items(name.rsplit(sys, maxsplit=1)[0])
-                    )
+                items.append(f.enum())
+        walking.pop()
+        pointer_paths[def_name] = items
+        return list(items)
+
+    def update_eref(opts: OptionDict, optname: str) -> NoReturn:
+        if (optVal := opts.get(optname)) and optVal[0] in (ENUM_ID, POINTER_ID):
+            tmp_opts = Options.list2dict([optVal])
+            name = enum_pointer_name(tmp_opts, sys)
+            if name in new_enums:  # Reference existing Enumerated type
+                opts[optname] = new_enums[name]
+            else:  # Make new Enumerated type
+                make_items = enum_items if tmp_opts.get("enum") else pointer_items
+                opts[optname] = name
+                defs[name] = DefType(name, "Enumerated", fields=make_items(epx(tmp_opts)))
 
     new_enums = {}
-    # Replace enum/pointer options in Enumerated types with explicit items
-    for type_def in tuple(defs.values()):
-        if type_def.type == "Enumerated":
-            if ep_name := enum_pointer_name(type_def.options, sys):
-                optx = type_def.options.enum or type_def.options.pointer
-                items = enum_items if type_def.options.enum else pointer_items
-                type_def.fields = items(optx)
-                delattr(type_def.options, "enum")
-                delattr(type_def.options, "pointer")
+    if derived_enum:
+        # Replace enum/pointer options in Enumerated types with explicit items
+        for type_def in tuple(defs.values()):
+            if type_def.type == "Enumerated" and (ep_name := enum_pointer_name(type_def.options, sys)):
+                opts = type_def.options
+                items = enum_items if opts.get("enum") else pointer_items
+                type_def.fields = items(epx(opts))
+                opts.pop("enum", None)
+                opts.pop("pointer", None)
                 new_enums[ep_name] = type_def.name
 
-    # Create new Enumerated enum/pointer types if they don't already exist
-    for type_def in tuple(defs.values()):
-        if type_def.type in ("ArrayOf", "MapOf"):
-            update_eref(new_enums, type_def.options, "vtype")
-            update_eref(new_enums, type_def.options, "ktype")
-
-
-def unfold_mapOf_enum(defs: DefinitionDict) -> NoReturn:
-    """
-    Replace MapOf(enumerated key) with explicit Map
-    :param defs:
-    :return:
-    """
     for type_name, type_def in tuple(defs.items()):
-        if type_def.type == "MapOf":
-            ktype = type_def.options.ktype
+        if type_def.type not in ("ArrayOf", "MapOf"):
+            continue
+        opts = type_def.options
+        if derived_enum:  # Create new Enumerated enum/pointer types if they don't already exist
+            update_eref(opts, "vtype")
+            update_eref(opts, "ktype")
+        if mapof_enum and type_def.type == "MapOf":
+            ktype = opts.get("ktype", "")
             ktype = ktype[1:] if ktype.startswith(ENUM_ID) else ktype
-            if key_type := defs.get(ktype):
-                key_type = key_type.enumerated()
-                value_type = type_def.options.vtype
-                if key_type.type == "Enumerated":
-                    delattr(type_def.options, "ktype")
-                    delattr(type_def.options, "vtype")
-                    defs[type_name] = DefType(
-                        name=type_def.name,
-                        type="Map",
-                        options=type_def.options,
-                        description=type_def.description,
-                        fields=[DefField(id=f.id, name=f.value, type=value_type, options=Options(minc=0), description=f.description) for f in key_type.fields]
-                    )
-
-
-def unfold_extensions(types: list, sys: str, extensions: Set[str] = None) -> list:
+            if (key_type := defs.get(ktype)) and key_type.type == "Enumerated":
+                value_type = opts.pop("vtype", None)
+                opts.pop("ktype", None)
+                defs[type_name] = DefType(
+                    name=type_def.name,
+                    type="Map",
+                    options=opts,
+                    description=type_def.description,
+                    fields=[DefField(f.id, f.value, value_type, {"minc": 0}, f.description) for f in key_type.fields]
+                )
+
+
+def unfold_extensions(types: list, sys: str, extensions: Set[str] = None, plurals: Dict[str, str] = None) -> list:
     """
     Return a schema with listed extensions or all extensions removed
     :param types: list of type definitions  to unfold
@@ -305,6 +347,7 @@ def unfold_extensions(types: list, sys: str, extensions: Set[str] = None) -> lis
         * DerivedEnum:     Replace all derived and pointer enumerations with explicit Enumerated type definitions
         * MapOfEnum:       Replace all MapOf types with listed keys with explicit Map type definitions
         * Link:            Replace Key and Link fields with explicit types
+    :param plurals: plural names of multi-valued fields, used to name their ArrayOf definitions
     :return: simplified type definitions
     """
     exts = EXTENSIONS.union(extensions) if extensions else EXTENSIONS
@@ -312,12 +355,8 @@ def unfold_extensions(types: list, sys: str, extensions: Set[str] = None) -> lis
 
     if "Link" in exts:  # Replace Key and Link options with explicit types
         unfold_link(defs, sys)
-    if "Multiplicity" in exts:  # Expand repeated types into ArrayOf definitions
-        unfold_multiplicity(defs, sys)
-    if "AnonymousType" in exts:  # Expand inline definitions into named type definitions
-        unfold_anonymous_types(defs, sys)
-    if "DerivedEnum" in exts:  # Generate Enumerated list of fields or JSON Pointers
-        unfold_derived_enum(defs, sys)
-    if "MapOfEnum" in exts:  # Generate explicit Map from MapOf
-        unfold_mapOf_enum(defs)
+    if "Multiplicity" in exts or "AnonymousType" in exts:  # Expand repeated & inline definitions into named definitions
+        unfold_fields(defs, sys, "Multiplicity" in exts, "AnonymousType" in exts, plurals)
+    if "DerivedEnum" in exts or "MapOfEnum" in exts:  # Generate Enumerated list of fields/JSON Pointers and explicit Map
+        unfold_types(defs, sys, "DerivedEnum" in exts, "MapOfEnum" in exts)
     return [d.list() for d in defs.values()]
@@ -0,0 +1,134 @@
+"""
+JADN Schema dependency graph
+"""
+from typing import Dict, FrozenSet, Iterable, List, Set
+from .consts import CORE_TYPES, OPTION_ID
+__all__ = ["DependencyGraph", "jadn_dependencies"]
+# type options referencing a type, derived enumerations are prefixed by their option
+_REF_OPTIONS = (OPTION_ID["vtype"], OPTION_ID["ktype"], OPTION_ID["enum"], OPTION_ID["pointer"])
+_DERIVED_OPTIONS = "".join((OPTION_ID["enum"], OPTION_ID["pointer"]))
+
+
+class DependencyGraph:
+    """
+    Dependency graph of the types of a schema
+    Strongly connected components are found with Tarjan's algorithm, iteratively so deep schemas don't exceed the
+    recursion limit, and are listed with the dependencies of each component before it
+    """
+    __slots__ = ("forward", "reverse", "undefined", "sccs", "order", "depth")
+    #: names of the types each type references, only the defined types
+    forward: Dict[str, FrozenSet[str]]
+    #: names of the types that reference each type, including the undefined types
+    reverse: Dict[str, FrozenSet[str]]
+    #: names of the referenced types that are not defined, by the type referencing them
+    undefined: Dict[str, FrozenSet[str]]
+    #: strongly connected components, dependencies before dependents
+    sccs: List[List[str]]
+    #: type names, dependencies before dependents
+    order: List[str]
+    #: length of the longest dependency chain of each type, types in a cycle share a depth
+    depth: Dict[str, int]
+
+    def __init__(self, deps: Dict[str, Iterable[str]]):
+        """
+        :param deps: names of the types each type references
+        """
+        self.forward, self.undefined = {}, {}
+        reverse: Dict[str, Set[str]] = {name: set() for name in deps}
+        for name, refs in deps.items():
+            refs = set(refs)
+            self.forward[name] = frozenset(r for r in refs if r in deps)
+            if undefined := refs - self.forward[name]:
+                self.undefined[name] = frozenset(undefined)
+            for ref in refs:
+                reverse.setdefault(ref, set()).add(name)
+        self.reverse = {k: frozenset(v) for k, v in reverse.items()}
+        self.sccs = self._tarjan()
+        self.order = [name for scc in self.sccs for name in scc]
+        scc_of = {name: idx for idx, scc in enumerate(self.sccs) for name in scc}
+
+        self.depth = {}
+        for idx, scc in enumerate(self.sccs):
+            dep_sccs = {scc_of[r] for name in scc for r in self.forward[name]} - {idx}
+            depth = 1 + max((self.depth[self.sccs[d][0]] for d in dep_sccs), default=-1)
+            self.depth.update(dict.fromkeys(scc, depth))
+
+    def _tarjan(self) -> List[List[str]]:
+        index: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        sccs = []
+
+        for root in self.forward:
+            if root in index:
+                continue
+            work = [(root, iter(sorted(self.forward[root])))]
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, refs = work[-1]
+                for ref in refs:
+                    if ref not in index:
+                        index[ref] = low[ref] = len(index)
+                        stack.append(ref)
+                        on_stack.add(ref)
+                        work.append((ref, iter(sorted(self.forward[ref]))))
+                        break
+                    if ref in on_stack:
+                        low[node] = min(low[node], index[ref])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        scc = []
+                        while True:
+                            name = stack.pop()
+                            on_stack.discard(name)
+                            scc.append(name)
+                            if name == node:
+                                break
+                        sccs.append(scc[::-1])
+        return sccs
+
+    @property
+    def cycles(self) -> List[List[str]]:
+        """
+        Types that reference themselves, directly or through other types
+        """
+        return [scc for scc in self.sccs if len(scc) > 1 or scc[0] in self.forward[scc[0]]]
+
+    def reachable(self, roots: Iterable[str]) -> Set[str]:
+        """
+        Types reachable from the given types, including them
+        :param roots: names of the types to start from
+        :return: names of the reachable defined types
+        """
+        seen = set()
+        pending = [r for r in roots if r in self.forward]
+        while pending:
+            if (name := pending.pop()) not in seen:
+                seen.add(name)
+                pending.extend(self.forward[name] - seen)
+        return seen
+
+
+def jadn_dependencies(types: Iterable[list]) -> Dict[str, Set[str]]:
+    """
+    Names of the types each JADN type definition references, by the type & field options and field types
+    The definitions are not compiled, so the dependencies are known before a schema is loaded
+    :param types: JADN type definitions
+    :return: referenced type names, the core types are not included
+    """
+    deps = {}
+    for type_name, base_type, opts, *rest in types:
+        refs = {o[1:] for o in opts if o[:1] in _REF_OPTIONS}
+        if len(rest) > 1 and base_type != "Enumerated":
+            for field in rest[1]:
+                refs.add(field[2])
+                refs.update(o[1:] for o in field[3] if o[:1] in _REF_OPTIONS)
+        deps[type_name] = {r.lstrip(_DERIVED_OPTIONS) for r in refs} - set(CORE_TYPES)
+    return deps
@@ -0,0 +1,86 @@
+"""
+JADN Schema lookup indexes
+"""
+from typing import Dict, Iterable, List, Tuple
+from .definitions import Options
+from .graph import DependencyGraph
+__all__ = ["SchemaIndex"]
+
+
+class SchemaIndex:
+    """
+    Indexes of the types of a schema, built in one pass over the JADN type definitions
+    Each index lists the type names in schema order
+    """
+    __slots__ = ("references", "fields", "formats", "options")
+    #: names of the types that reference each type
+    references: Dict[str, Tuple[str, ...]]
+    #: names of the types with a field or enumerated item of each name
+    fields: Dict[str, Tuple[str, ...]]
+    #: names of the types with the type or a field using each format
+    formats: Dict[str, Tuple[str, ...]]
+    #: names of the types with the type or a field using each option, by option name
+    options: Dict[str, Tuple[str, ...]]
+
+    def __init__(self, types: Iterable[list], graph: DependencyGraph):
+        """
+        :param types: JADN type definitions
+        :param graph: dependency graph of the types
+        """
+        order: Dict[str, int] = {}
+        fields: Dict[str, Dict[str, None]] = {}
+        formats: Dict[str, Dict[str, None]] = {}
+        options: Dict[str, Dict[str, None]] = {}
+
+        def add(idx: Dict[str, Dict[str, None]], key: str, name: str) -> None:
+            idx.setdefault(key, {})[name] = None
+
+        for type_name, base_type, type_opts, *rest in types:
+            order[type_name] = len(order)
+            opts = [Options.list2dict(type_opts)]
+            for field in (rest[1] if len(rest) > 1 else []):
+                add(fields, field[1], type_name)
+                if base_type != "Enumerated":
+                    opts.append(Options.list2dict(field[3]))
+            for opt in opts:
+                for key, val in opt.items():
+                    add(options, key, type_name)
+                    if key == "format":
+                        add(formats, val, type_name)
+
+        self.references = {k: tuple(sorted(v, key=order.get)) for k, v in graph.reverse.items() if v}
+        self.fields = {k: tuple(v) for k, v in fields.items()}
+        self.formats = {k: tuple(v) for k, v in formats.items()}
+        self.options = {k: tuple(v) for k, v in options.items()}
+
+    def referencing(self, name: str) -> List[str]:
+        """
+        Types that reference the given type directly
+        :param name: name of the referenced type
+        :return: names of the referencing types
+        """
+        return list(self.references.get(name, ()))
+
+    def with_field(self, name: str) -> List[str]:
+        """
+        Types that have a field or enumerated item with the given name
+        :param name: name of the field
+        :return: names of the types
+        """
+        return list(self.fields.get(name, ()))
+
+    def with_format(self, fmt: str) -> List[str]:
+        """
+        Types that use the given format, on the type or a field
+        :param fmt: name of the format
+        :return: names of the types
+        """
+        return list(self.formats.get(fmt, ()))
+
+    def with_option(self, option: str) -> List[str]:
+        """
+        Types that use the given option, on the type or a field
+        :param option: name of the option, e.g. `minv`
+        :return: names of the types
+        """
+        return list(self.options.get(option, ()))
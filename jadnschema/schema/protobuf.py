@@ -0,0 +1,298 @@
+"""
+JADN Schema Protobuf Codec
+Encode and decode type instances in the protobuf wire format of the `.proto` created by the proto writer,
+field numbers are the JADN field IDs
+"""
+from typing import Any, Callable, Dict, List, Tuple, Union
+from .codec import ARRAY_FORMATS, FieldTable, SchemaCodec, TypeTable, check_type
+
+__all__ = ["ProtobufCodec"]
+# Wire types
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LEN = 2
+WIRE_FIXED32 = 5
+_INT64 = 1 << 64
+# data types encoded as varints, may be packed when repeated
+_VARINT_TYPES = frozenset({"Boolean", "Enumerated", "Integer"})
+# data types encoded as a nested message, the values of ArrayOf & MapOf are the repeated field 1 of the message
+_MESSAGE_TYPES = frozenset({"Array", "ArrayOf", "Choice", "Map", "MapOf", "Record"})
+Buffer = Union[bytes, bytearray, memoryview]
+# field number -> wire values in the order read, ordered by the last value read
+Parsed = Dict[int, List[Tuple[int, Union[int, memoryview]]]]
+
+
+# Wire format
+def _write_varint(out: bytearray, val: int) -> None:
+    val &= _INT64 - 1
+    while val > 0x7F:
+        out.append(val & 0x7F | 0x80)
+        val >>= 7
+    out.append(val)
+
+
+def _read_varint(buf: memoryview, pos: int) -> Tuple[int, int]:
+    val = shift = 0
+    while True:
+        if pos >= len(buf) or shift > 63:
+            raise ValueError("Protobuf varint is truncated or too long")
+        byte = buf[pos]
+        val |= (byte & 0x7F) << shift
+        pos += 1
+        if not byte & 0x80:
+            return val, pos
+        shift += 7
+
+
+def _write_key(out: bytearray, num: int, wire_type: int) -> None:
+    _write_varint(out, num << 3 | wire_type)
+
+
+def _write_len(out: bytearray, num: int, val: Buffer) -> None:
+    _write_key(out, num, WIRE_LEN)
+    _write_varint(out, len(val))
+    out += val
+
+
+def _parse(buf: Buffer) -> Parsed:
+    """
+    Split a message into its fields, nested messages are not parsed
+    :param buf: encoded message
+    :return: wire values of each field number
+    """
+    buf = memoryview(buf)
+    fields: Parsed = {}
+    pos = 0
+    while pos < len(buf):
+        key, pos = _read_varint(buf, pos)
+        num, wire_type = key >> 3, key & 0x7
+        if wire_type == WIRE_VARINT:
+            val, pos = _read_varint(buf, pos)
+        elif wire_type == WIRE_LEN:
+            size, pos = _read_varint(buf, pos)
+            if pos + size > len(buf):
+                raise ValueError("Protobuf field is truncated")
+            val, pos = buf[pos:pos + size], pos + size
+        elif wire_type in (WIRE_FIXED64, WIRE_FIXED32):
+            size = 8 if wire_type == WIRE_FIXED64 else 4
+            val, pos = int.from_bytes(buf[pos:pos + size], "little"), pos + size
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+        # fields are ordered by their last value, the last field of a oneof is the one set
+        fields[num] = fields.pop(num, [])
+        fields[num].append((wire_type, val))
+    return fields
+
+
+def _signed(val: int) -> int:
+    return val - _INT64 if val >= 1 << 63 else val
+
+
+class ProtobufCodec:
+    """
+    Protobuf wire codec of the types of a schema, uses the type tables of the schema codec
+    Binary, Number & Null are strings as in the generated `.proto`, ArrayOf & MapOf are messages of a repeated
+    field 1 and MapOf entries are messages of the key (1) and value (2), as a proto3 `map`
+    """
+    codec: SchemaCodec
+
+    def __init__(self, codec: SchemaCodec):
+        """
+        :param codec: codec of the schema types
+        """
+        self.codec = codec
+
+    def encode(self, value: Any, type_: str) -> bytes:
+        """
+        Encode an instance, given in the verbose (API) form, of the type
+        Types that are not messages are encoded as field 1 of a message
+        :param value: instance to encode
+        :param type_: name of the type
+        :raise ValueError: instance does not match the structure of the type
+        :return: encoded message
+        """
+        type_ = self.codec.table(type_)
+        out = bytearray()
+        if type_.data_type in _MESSAGE_TYPES:
+            self._encode_message(out, value, type_)
+        else:
+            self._encode_value(out, 1, value, type_)
+        return bytes(out)
+
+    def decode(self, data: Buffer, type_: str) -> Any:
+        """
+        Decode a message of the type to the verbose (API) form
+        :param data: encoded message
+        :param type_: name of the type
+        :raise ValueError: message does not match the structure of the type
+        :return: decoded instance
+        """
+        type_ = self.codec.table(type_)
+        if type_.data_type in _MESSAGE_TYPES:
+            return self._decode_message(memoryview(data), type_)
+        return self._decode_value(_parse(data).get(1, []), type_)
+
+    # Encoding
+    def _encode_value(self, out: bytearray, num: int, value: Any, type_: TypeTable, repeated: bool = False) -> None:
+        """
+        Write the value as field `num`, lists of repeated fields are written as repeated fields
+        """
+        if repeated and isinstance(value, (list, tuple, set)):
+            self._encode_repeated(out, num, value, type_)
+        elif type_.data_type in _MESSAGE_TYPES:
+            msg = bytearray()
+            self._encode_message(msg, value, type_)
+            _write_len(out, num, msg)
+        elif type_.data_type in _VARINT_TYPES and not type_.opts.get("pointer"):
+            _write_key(out, num, WIRE_VARINT)
+            _write_varint(out, self._encode_varint(value, type_))
+        else:
+            _write_len(out, num, self._encode_string(value, type_))
+
+    def _encode_repeated(self, out: bytearray, num: int, values: Any, type_: TypeTable) -> None:
+        if type_.data_type in _VARINT_TYPES and not type_.opts.get("pointer"):
+            # packed, as proto3 does for repeated scalars
+            packed = bytearray()
+            for val in values:
+                _write_varint(packed, self._encode_varint(val, type_))
+            _write_len(out, num, packed)
+        else:
+            for val in values:
+                self._encode_value(out, num, val, type_)
+
+    def _encode_message(self, out: bytearray, value: Any, type_: TypeTable) -> None:
+        if type_.data_type == "ArrayOf":
+            check_type(value, (list, set, tuple), type_)
+            self._encode_repeated(out, 1, value, self.codec.option_table(type_, "vtype"))
+            return
+        if type_.data_type == "MapOf":
+            ktype, vtype = (self.codec.option_table(type_, o) for o in ("ktype", "vtype"))
+            for key, val in (value.items() if isinstance(value, dict) else value):
+                entry = bytearray()
+                self._encode_value(entry, 1, key, ktype)
+                self._encode_value(entry, 2, val, vtype)
+                _write_len(out, 1, entry)
+            return
+        if type_.data_type == "Array":
+            if isinstance(value, str) and type_.opts.get("format") in ARRAY_FORMATS:
+                value = ARRAY_FORMATS[type_.opts["format"]](value)
+            check_type(value, (list, tuple), type_)
+            if len(value) > len(type_.fields):
+                raise ValueError(f"{type_.name} has {len(type_.fields)} fields, not {len(value)}")
+            items = [(f, v) for f, v in zip(type_.fields, value) if v is not None]
+        else:
+            check_type(value, dict, type_)
+            if type_.data_type == "Choice" and len(value) != 1:
+                raise ValueError(f"{type_.name} should have a single key, not {len(value)}")
+            items = [(type_.field(k), v) for k, v in value.items()]
+        for field, val in items:
+            self._encode_value(out, field.id, val, self.codec.field_table(field), field.array)
+
+    @staticmethod
+    def _encode_varint(value: Union[bool, int, str], type_: TypeTable) -> int:
+        if type_.data_type == "Enumerated":
+            return type_.field(value).id
+        if type_.data_type == "Boolean":
+            check_type(value, bool, type_)
+            return int(value)
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"{type_.name} is not a valid Integer, got {type(value).__name__}")
+        return value
+
+    @staticmethod
+    def _encode_string(value: Any, type_: TypeTable) -> bytes:
+        if type_.data_type == "Null":
+            return b""
+        if type_.data_type == "Number":
+            check_type(value, (float, int), type_)
+            return repr(value).encode("utf-8")
+        check_type(value, str, type_)
+        return value.encode("utf-8")
+
+    # Decoding
+    def _decode_value(self, values: list, type_: TypeTable, repeated: bool = False) -> Any:
+        """
+        Read the wire values of a field, the last value is used for fields that are not repeated
+        """
+        if repeated:
+            return self._decode_repeated(values, type_)
+        if not values:
+            raise ValueError(f"{type_.name} is missing from the message")
+        wire_type, val = values[-1]
+        if type_.data_type in _MESSAGE_TYPES:
+            return self._decode_message(_expect(val, WIRE_LEN, type_, wire_type), type_)
+        if type_.data_type in _VARINT_TYPES and not type_.opts.get("pointer"):
+            return self._decode_varint(_expect(val, WIRE_VARINT, type_, wire_type), type_)
+        return self._decode_string(bytes(_expect(val, WIRE_LEN, type_, wire_type)), type_)
+
+    def _decode_repeated(self, values: list, type_: TypeTable) -> list:
+        if type_.data_type in _VARINT_TYPES and not type_.opts.get("pointer"):
+            rtn = []
+            for wire_type, val in values:
+                if wire_type == WIRE_LEN:
+                    # packed
+                    pos = 0
+                    while pos < len(val):
+                        item, pos = _read_varint(val, pos)
+                        rtn.append(self._decode_varint(item, type_))
+                else:
+                    rtn.append(self._decode_varint(_expect(val, WIRE_VARINT, type_, wire_type), type_))
+            return rtn
+        return [self._decode_value([v], type_) for v in values]
+
+    def _decode_message(self, buf: memoryview, type_: TypeTable) -> Any:
+        parsed = _parse(buf)
+        if type_.data_type == "ArrayOf":
+            return self._decode_repeated(parsed.get(1, []), self.codec.option_table(type_, "vtype"))
+        if type_.data_type == "MapOf":
+            ktype, vtype = (self.codec.option_table(type_, o) for o in ("ktype", "vtype"))
+            rtn = {}
+            for wire_type, entry in parsed.get(1, []):
+                entry = _parse(_expect(entry, WIRE_LEN, type_, wire_type))
+                key = self._decode_value(entry.get(1, []), ktype)
+                rtn[tuple(key) if isinstance(key, list) else key] = self._decode_value(entry.get(2, []), vtype)
+            return rtn
+        if type_.data_type == "Array":
+            rtn = [None] * len(type_.fields)
+            for idx, field in enumerate(type_.fields):
+                if field.id in parsed:
+                    rtn[idx] = self._decode_value(parsed[field.id], self.codec.field_table(field), field.array)
+            while rtn and rtn[-1] is None:
+                rtn.pop()
+            if type_.opts.get("format") in ARRAY_FORMATS:
+                return "/".join(str(v) for v in rtn if v is not None)
+            return rtn
+
+        fields = [type_.ids[n] for n in parsed if n in type_.ids]
+        if type_.data_type == "Choice" and fields:
+            # oneof, the last field set is used
+            fields = fields[-1:]
+        key: Callable[[FieldTable], Union[int, str]] = (lambda f: f.id) if type_.opts.get("id") else (lambda f: f.name)
+        return {key(f): self._decode_value(parsed[f.id], self.codec.field_table(f), f.array) for f in fields}
+
+    @staticmethod
+    def _decode_varint(value: int, type_: TypeTable) -> Union[bool, int, str]:
+        if type_.data_type == "Enumerated":
+            field = type_.field(value)
+            return field.id if type_.opts.get("id") else field.name
+        if type_.data_type == "Boolean":
+            return bool(value)
+        return _signed(value)
+
+    @staticmethod
+    def _decode_string(value: bytes, type_: TypeTable) -> Any:
+        if type_.data_type == "Null":
+            return None
+        val = value.decode("utf-8")
+        if type_.data_type == "Number":
+            try:
+                return float(val)
+            except ValueError as e:
+                raise ValueError(f"{type_.name} is not a valid Number, got {val!r}") from e
+        return val
+
+
+def _expect(value: Union[int, memoryview], wire_type: int, type_: TypeTable, actual: int = None) -> Any:
+    if (actual is not None and actual != wire_type) or isinstance(value, memoryview) != (wire_type == WIRE_LEN):
+        raise ValueError(f"{type_.name} has an invalid protobuf wire type")
+    return value
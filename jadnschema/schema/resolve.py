@@ -0,0 +1,196 @@
+"""
+JADN namespace resolution
+Namespaced type references, `nsid:TypeName`, are resolved against the packages of a local schema repository and the
+referenced definitions are merged into the schema as `nsid:TypeName` types
+"""
+import json
+import os
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple, Union
+from .consts import CORE_TYPES, OPTION_ID
+from ..exceptions import SchemaException
+__all__ = ["resolve_imports"]
+
+# Consts
+PACKAGE_WORKERS = 8
+REF_OPTIONS = (OPTION_ID["vtype"], OPTION_ID["ktype"], OPTION_ID["enum"], OPTION_ID["pointer"])
+DERIVED_OPTIONS = (OPTION_ID["enum"], OPTION_ID["pointer"])
+
+
+class Package(NamedTuple):
+    path: str
+    mtime: int
+    uri: Optional[str]
+    namespaces: Dict[str, str]
+    types: Dict[str, list]
+
+
+# Parsed packages by path, shared by every schema loaded in this process
+_packages: Dict[str, Package] = {}
+
+
+# Helpers
+def load_package(path: str) -> Package:
+    """
+    Load a package, reusing the parsed package while the file is unchanged
+    :param path: path of the package file
+    :raise SchemaException: the file is not a valid JADN package
+    :return: parsed package
+    """
+    mtime = os.stat(path).st_mtime_ns
+    if (pkg := _packages.get(path)) and pkg.mtime == mtime:
+        return pkg
+    try:
+        with open(path, "r", encoding="UTF-8") as f:
+            schema = json.load(f)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise SchemaException(f"{path} is not a valid JADN package, {e}") from e
+    if not isinstance(schema, dict):
+        raise SchemaException(f"{path} is not a valid JADN package, expected an object")
+    info = schema.get("info", {})
+    pkg = _packages[path] = Package(
+        path=path,
+        mtime=mtime,
+        uri=info.get("package"),
+        namespaces=info.get("namespaces", {}),
+        types={td[0]: td for td in schema.get("types", [])}
+    )
+    return pkg
+
+
+def package_index(repository: str) -> Dict[str, Package]:
+    """
+    Index the packages of a repository by package URI, loading new & changed packages concurrently
+    Files that are not valid packages are skipped, a schema referencing them fails as the package is not found
+    :param repository: directory containing the JADN packages
+    :return: packages by URI
+    """
+    paths = []
+    for root, _, files in os.walk(repository):
+        paths.extend(os.path.join(root, f) for f in sorted(files) if f.endswith(".jadn"))
+    with ThreadPoolExecutor(max_workers=PACKAGE_WORKERS) as pool:
+        packages = list(pool.map(_try_load_package, paths))
+    return {pkg.uri: pkg for pkg in packages if pkg and pkg.uri}
+
+
+def _try_load_package(path: str) -> Optional[Package]:
+    try:
+        return load_package(path)
+    except SchemaException:
+        return None
+
+
+def split_ref(ref: str) -> Tuple[Optional[str], str]:
+    nsid, sep, name = ref.partition(":")
+    return (nsid, name) if sep else (None, ref)
+
+
+def freeze(val: Any) -> Any:
+    return tuple(freeze(v) for v in val) if isinstance(val, list) else val
+
+
+@lru_cache(maxsize=4096)
+def qualify(path: str, mtime: int, name: str, prefix: str, ns_prefixes: Tuple[Tuple[str, str], ...]) -> Tuple[tuple, Tuple[Tuple[str, str], ...]]:
+    """
+    Rewrite a type definition of a package with the references qualified by the namespace prefixes of the schema
+    The rewrite is cached and shared by all schemas using the same prefixes for the package, so it is frozen to tuples,
+    copy the definition to edit it
+    :param path: path of the package file
+    :param mtime: modification time of the loaded package, a changed package is qualified again
+    :param name: name of the type
+    :param prefix: namespace prefix of the package
+    :param ns_prefixes: namespace prefix of each package imported by the package, by the package's nsid
+    :return: the qualified definition & the referenced (package URI, type name) pairs
+    """
+    pkg = _packages[path]
+    nsids = dict(ns_prefixes)
+    refs = []
+
+    def ref(type_name: str) -> str:
+        if type_name in CORE_TYPES:
+            return type_name
+        nsid, base = split_ref(type_name)
+        if nsid is None:
+            refs.append((pkg.uri, base))
+            return f"{prefix}:{base}"
+        if nsid not in pkg.namespaces:
+            raise SchemaException(f"{pkg.uri}: {type_name} has an unknown namespace")
+        refs.append((pkg.namespaces[nsid], base))
+        return f"{nsids[nsid]}:{base}"
+
+    def opt(option: str) -> str:
+        if option[0] not in REF_OPTIONS:
+            return option
+        val = option[1:]
+        derived = val[0] if val[:1] in DERIVED_OPTIONS and option[0] not in DERIVED_OPTIONS else ""
+        return f"{option[0]}{derived}{ref(val[len(derived):])}"
+
+    type_name, base_type, opts, *rest = pkg.types[name]
+    type_def = [f"{prefix}:{type_name}", base_type, [opt(o) for o in opts], *rest]
+    if len(rest) > 1 and base_type != "Enumerated":
+        type_def[4] = [[f[0], f[1], ref(f[2]), [opt(o) for o in f[3]], *f[4:]] for f in rest[1]]
+    return freeze(type_def), tuple(refs)
+
+
+def resolve_imports(schema: dict, repository: str) -> dict:
+    """
+    Merge the definitions referenced through the schema namespaces, and their dependencies, into the schema
+    Packages are found by their `package` URI in the repository, the imported definitions are named with the namespace
+    prefix of the schema, packages the schema doesn't import directly use the prefix of the package importing them
+    :param schema: JADN schema to resolve
+    :param repository: directory containing the JADN packages
+    :raise SchemaException: a package or type definition cannot be found
+    :return: resolved JADN schema, the imported definitions are frozen & shared, see `qualify`
+    """
+    namespaces = schema.get("info", {}).get("namespaces", {})
+    if not namespaces:
+        return schema
+    packages = package_index(repository)
+    prefixes = {uri: nsid for nsid, uri in namespaces.items()}
+
+    def package(uri: str) -> Package:
+        if pkg := packages.get(uri):
+            return pkg
+        raise SchemaException(f"package {uri} is not within the repository {repository}")
+
+    def pkg_prefixes(pkg: Package) -> Tuple[Tuple[str, str], ...]:
+        taken = set(prefixes.values())
+        for nsid, uri in sorted(pkg.namespaces.items()):
+            if uri not in prefixes:
+                prefix, n = nsid, 1
+                while prefix in taken:
+                    prefix, n = f"{nsid}{n}", n + 1
+                prefixes[uri] = prefix
+                taken.add(prefix)
+        return tuple((nsid, prefixes[uri]) for nsid, uri in sorted(pkg.namespaces.items()))
+
+    pending: Deque[Tuple[str, str]] = deque()
+    for type_def in schema.get("types", []):
+        refs = [o[1:] for o in type_def[2] if o[:1] in REF_OPTIONS]
+        if len(type_def) > 4 and type_def[1] != "Enumerated":
+            for field in type_def[4]:
+                refs.append(field[2])
+                refs.extend(o[1:] for o in field[3] if o[:1] in REF_OPTIONS)
+        for r in refs:
+            nsid, name = split_ref(r.lstrip("".join(DERIVED_OPTIONS)))
+            if nsid is not None:
+                if nsid not in namespaces:
+                    raise SchemaException(f"{type_def[0]}: {r} has an unknown namespace")
+                pending.append((namespaces[nsid], name))
+
+    merged: Dict[Tuple[str, str], tuple] = {}
+    while pending:
+        uri, name = key = pending.popleft()
+        if key in merged:
+            continue
+        pkg = package(uri)
+        if name not in pkg.types:
+            raise SchemaException(f"{name} is not defined within the package {uri}")
+        merged[key], refs = qualify(pkg.path, pkg.mtime, name, prefixes[uri], pkg_prefixes(pkg))
+        pending.extend(refs)
+
+    types: List[Union[list, tuple]] = [*schema.get("types", []), *merged.values()]
+    return {**schema, "types": types}
@@ -1,27 +1,40 @@
 """
 JADN Schema Class
 """
+import hashlib
 import json
 import os
+import weakref
 
+from collections import OrderedDict
 from io import BufferedIOBase, TextIOBase
 from numbers import Number
 from pathlib import Path
-from typing import Any, Callable, Dict, List, NoReturn, Optional, Set, Union, get_args
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, NoReturn, Optional, Set, Tuple, Union, get_args
 from pydantic import Field
 from pydantic.main import ModelMetaclass, PrivateAttr  # pylint: disable=no-name-in-module
 from .baseModel import BaseModel
+from .codec import EncodingStyle, SchemaCodec
 from .consts import EXTENSIONS, OPTION_ID
+from .protobuf import ProtobufCodec
 from .info import Information
 from .definitions import DefTypes, Definition, DefinitionBase, make_def
 from .definitions.field import getFieldType
 from .extensions import unfold_extensions
 from .formats import ValidationFormats
+from .graph import DependencyGraph, jadn_dependencies
+from .index import SchemaIndex
+from .resolve import resolve_imports
 from ..exceptions import FormatError, SchemaException
 __pdoc__ = {
     "Schema.info": "Information about this package",
     "Schema.types": "Types defined in this package"
 }
+SimplifyKey = Tuple[str, FrozenSet[str], FrozenSet[Tuple[str, str]]]
+# Simplified schemas by (schema fingerprint, extensions), held while in use elsewhere & the most recent few kept alive
+SIMPLIFY_CACHE_SIZE = 8
+_simplify_cache: "weakref.WeakValueDictionary[SimplifyKey, Schema]" = weakref.WeakValueDictionary()
+_simplify_recent: "OrderedDict[SimplifyKey, Schema]" = OrderedDict()
 
 
 def update_types(types: Union[dict, list], formats: Dict[str, Callable] = None) -> dict:
@@ -35,6 +48,66 @@ def update_types(types: Union[dict, list], formats: Dict[str, Callable] = None)
     return types
 
 
+def recompile_types(types: dict, defs: Dict[str, list], removed: Set[str], dependents: Dict[str, Set[str]], formats: Dict[str, Callable] = None) -> dict:
+    """
+    Compile the given type definitions and recompile the types that embed them, reusing all other compiled types
+    ArrayOf/MapOf look up their key/value types by name when validating, so only types with fields are recompiled
+    :param types: compiled types to update
+    :param defs: JADN type definitions to add or replace, by name
+    :param removed: names of the types to remove
+    :param dependents: names of the types that reference each type
+    :param formats: format validation functions
+    :raise SchemaException: a recompiled type references a type that is not defined
+    :return: updated compiled types
+    """
+    new_types = {k: v for k, v in types.items() if k not in removed}
+    recompile = dict(defs)
+    changed = [*defs, *removed]
+    while changed:
+        for name in dependents.get(changed.pop(), ()):
+            def_cls = new_types.get(name)
+            if name in recompile or def_cls is None or def_cls.data_type in ("ArrayOf", "MapOf"):
+                continue
+            if def_cls.has_fields() and "__root__" not in def_cls.__fields__:
+                recompile[name] = def_cls.schema()
+                changed.append(name)
+
+    for name, type_def in recompile.items():
+        new_types[name] = make_def(type_def, formats)
+    cls_defs = {d.__name__: d for d in new_types.values()}
+    cls_defs.update(DefTypes)
+    for name in recompile:
+        try:
+            new_types[name].update_forward_refs(**cls_defs)
+        except NameError as err:
+            raise SchemaException(f"{name} references an undefined type, {err}") from err
+    return new_types
+
+
+def _prune(graph: DependencyGraph, names: List[str], roots: Optional[List[str]], exports: List[str]) -> Tuple[List[str], Set[str], Dict[str, List[str]]]:
+    """
+    Find the types reachable from the roots, or the exports, see `Schema.prune`
+    :param graph: dependency graph of the types
+    :param names: names of the types, in schema order
+    :param roots: names of the types to keep
+    :param exports: exported types, the roots when none are given
+    :raise SchemaException: no roots given and the schema has no exports
+    :return: roots, names of the reachable types & report of the kept, removed and undefined types
+    """
+    if not (roots := list(roots or exports)):
+        raise SchemaException("No roots given and the schema has no exports to prune from")
+    oids = (OPTION_ID["enum"], OPTION_ID["pointer"])
+    roots = [r[1:] if r[:1] in oids else r for r in roots]
+    reachable = graph.reachable(roots)
+    undefined = {r for r in roots if r not in graph.forward}
+    undefined.update(*(graph.undefined.get(name, ()) for name in reachable))
+    return roots, reachable, {
+        "kept": [n for n in names if n in reachable],
+        "removed": [n for n in names if n not in reachable],
+        "undefined": sorted(undefined)
+    }
+
+
 class SchemaMeta(ModelMetaclass):
     def __new__(mcs, name, bases, attrs, **kwargs):  # pylint: disable=bad-classmethod-argument
         new_namespace = {
@@ -51,9 +124,16 @@ class Schema(BaseModel, metaclass=SchemaMeta):  # pylint: disable=invalid-metacl
     """
     JADN Schema
     """
+    __slots__ = ("__weakref__", )  # simplified schemas are cached weakly
     info: Optional[Information] = Field(default_factory=Information)
     types: dict = Field(default_factory=dict)  # Dict[str, Definition]
     _info: bool = PrivateAttr(False)
+    _codec: Optional[SchemaCodec] = PrivateAttr(None)
+    _protobuf: Optional[ProtobufCodec] = PrivateAttr(None)
+    _simplified: Optional["Schema"] = PrivateAttr(None)  # Last simplified schema, base of incremental simplify
+    _graph: Optional[DependencyGraph] = PrivateAttr(None)
+    _index: Optional[SchemaIndex] = PrivateAttr(None)
+    _unfolded: Optional[Tuple[Optional[dict], tuple, Dict[str, list]]] = PrivateAttr(None)  # Source of a simplified schema
     __formats__: Dict[str, Callable] = ValidationFormats
 
     def __init__(self, **kwargs):
@@ -99,11 +179,119 @@ class Schema(BaseModel, metaclass=SchemaMeta):  # pylint: disable=invalid-metacl
                 print("Type is not a valid exported definition")
         if cls := self.types.get(type_):
             if isinstance(value, dict) and all(str(k).isdigit() for k in value.keys()):
-                value = cls.expandCompact(value)
+                value = self.decode(value, type_)
 
             return cls.validate(value)
         raise SchemaException(f"{type_} is not a valid type within the schema")
 
+    # Encoding
+    def encode(self, value: Any, type_: str, style: EncodingStyle = EncodingStyle.VERBOSE, binary: bool = False) -> Any:
+        """
+        Encode an instance of a type, given in verbose form, in the given style
+        :param value: instance to encode
+        :param type_: name of the type
+        :param style: encoding style; verbose, compact or concise
+        :param binary: encode Binary values as bytes, for binary serializations
+        :raise ValueError: instance does not match the structure of the type
+        :return: encoded instance
+        """
+        return self.codec.encode(value, type_, style, binary)
+
+    def decode(self, value: Any, type_: str) -> Any:
+        """
+        Decode an instance of a type, in any encoding style, to verbose form
+        :param value: encoded instance
+        :param type_: name of the type
+        :raise ValueError: instance does not match the structure of the type
+        :return: decoded instance
+        """
+        return self.codec.decode(value, type_)
+
+    @property
+    def codec(self) -> SchemaCodec:
+        """
+        Codec of the schema types, created on first use
+        """
+        if self._codec is None:
+            self._codec = SchemaCodec([d.schema() for d in self.types.values()])
+        return self._codec
+
+    @property
+    def graph(self) -> DependencyGraph:
+        """
+        Dependency graph of the schema types, created on first use
+        """
+        if self._graph is None:
+            type_deps = self._dependencies()
+            oids = (OPTION_ID["enum"], OPTION_ID["pointer"])
+            for name, def_cls in self.types.items():  # Derived enumerations depend on the type they are derived from
+                type_deps[name].update(filter(None, (def_cls.__options__.get("enum"), def_cls.__options__.get("pointer"))))
+            self._graph = DependencyGraph({k: {r[1:] if r[:1] in oids else r for r in v} for k, v in type_deps.items()})
+        return self._graph
+
+    @property
+    def index(self) -> SchemaIndex:
+        """
+        Indexes of the referencing types, field names, formats & options of the schema types, created on first use
+        """
+        if self._index is None:
+            self._index = SchemaIndex([d.schema() for d in self.types.values()], self.graph)
+        return self._index
+
+    @property
+    def protobuf(self) -> ProtobufCodec:
+        """
+        Protobuf wire codec of the schema types, field numbers are the field IDs as in the generated `.proto`
+        """
+        if self._protobuf is None:
+            self._protobuf = ProtobufCodec(self.codec)
+        return self._protobuf
+
+    def update_type(self, type_def: Union[list, tuple]) -> NoReturn:
+        """
+        Add or replace a type definition, recompiling only it and the types that embed it
+        :param type_def: JADN type definition, a frozen definition of resolved JADN is compiled without copying it
+        """
+        self._update_types({type_def[0]: type_def}, set())
+
+    def remove_type(self, name: str) -> NoReturn:
+        """
+        Remove a type definition, recompiling only the types that embed it
+        :param name: name of the type
+        :raise SchemaException: type is not within the schema
+        """
+        if name not in self.types:
+            raise SchemaException(f"{name} is not a valid type within the schema")
+        self._update_types({}, {name})
+
+    def _update_types(self, defs: Dict[str, list], removed: Set[str]) -> NoReturn:
+        """
+        Update the type definitions in place
+        :param defs: JADN type definitions to add or replace, by name
+        :param removed: names of the types to remove
+        """
+        types = recompile_types(self.types, defs, removed, self.graph.reverse, self.__formats__)
+        self.types.clear()
+        self.types.update(types)
+        self._codec = None
+        self._protobuf = None
+        self._graph = None
+        self._index = None
+        self._unfolded = None
+        # A cached simplified schema no longer matches its key once edited
+        for cache in (_simplify_cache, _simplify_recent):
+            for key in [k for k, v in cache.items() if v is self]:
+                del cache[key]
+
+    def fingerprint(self, schema: Dict[str, Any] = None) -> str:
+        """
+        Hash of the canonical JADN of the schema, equal for schemas with the same info & type definitions
+        :param schema: JADN of this schema, if already formatted
+        :return: hex digest of the schema
+        """
+        canonical = json.dumps(self.schema() if schema is None else schema, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
     # Helpers
     def _dumps(self, val: Union[dict, float, int, str, tuple, Number], indent: int = 2, _level: int = 0) -> str:
         """
@@ -113,25 +301,52 @@ class Schema(BaseModel, metaclass=SchemaMeta):  # pylint: disable=invalid-metacl
         :param _level: current indent level
         :return: Formatted JADN schema
         """
-        if isinstance(val, (Number, str)):
-            return json.dumps(val)
+        return "".join(self._iterdumps(val, indent, _level))
 
-        _indent = indent - 1 if indent % 2 == 1 else indent
-        _indent += (_level * 2)
-        ind, ind_e = " " * _indent, " " * (_indent - 2)
+    @staticmethod
+    def _iterdumps(val: Union[dict, float, int, str, tuple, Number], indent: int = 2, _level: int = 0) -> Iterator[str]:
+        """
+        Format a JADN schema in chunks, iteratively so deeply nested values don't exceed the recursion limit
+        :param val: value to format
+        :param indent: spaces to indent
+        :param _level: starting indent level
+        :return: chunks of the formatted JADN schema
+        """
+        stack: List[Union[str, Tuple[Any, int]]] = [(val, _level)]
+        while stack:
+            if isinstance(item := stack.pop(), str):
+                yield item
+                continue
+            val, _level = item
+            if isinstance(val, (Number, str)):
+                yield json.dumps(val)
+                continue
 
-        if isinstance(val, dict):
-            lines = ",\n".join(f"{ind}\"{k}\": {self._dumps(v, indent, _level+1)}" for k, v in val.items())
-            return f"{{\n{lines}\n{ind_e}}}"
+            _indent = indent - 1 if indent % 2 == 1 else indent
+            _indent += (_level * 2)
+            ind, ind_e = " " * _indent, " " * (_indent - 2)
+            chunks: List[Union[str, Tuple[Any, int]]] = []
 
-        if isinstance(val, (list, tuple)):
-            nested = val and isinstance(val[0], (list, tuple))  # Not an empty list
-            lvl = _level+1 if nested and isinstance(val[-1], (list, tuple)) else _level
-            lines = [self._dumps(v, indent, lvl) for v in val]
-            if nested:
-                return f"[\n{ind}" + f",\n{ind}".join(lines) + f"\n{ind_e}]"
-            return f"[{', '.join(lines)}]"
-        return "???"
+            if isinstance(val, dict):
+                chunks.append("{\n")
+                for idx, (k, v) in enumerate(val.items()):
+                    if idx:
+                        chunks.append(",\n")
+                    chunks.extend((f"{ind}\"{k}\": ", (v, _level+1)))
+                chunks.append(f"\n{ind_e}}}")
+            elif isinstance(val, (list, tuple)):
+                nested = val and isinstance(val[0], (list, tuple))  # Not an empty list
+                lvl = _level+1 if nested and isinstance(val[-1], (list, tuple)) else _level
+                sep = f",\n{ind}" if nested else ", "
+                chunks.append(f"[\n{ind}" if nested else "[")
+                for idx, v in enumerate(val):
+                    if idx:
+                        chunks.append(sep)
+                    chunks.append((v, lvl))
+                chunks.append(f"\n{ind_e}]" if nested else "]")
+            else:
+                chunks.append("???")
+            stack.extend(reversed(chunks))
 
     def _dependencies(self) -> Dict[str, Set[str]]:
         """
@@ -191,20 +406,52 @@ class Schema(BaseModel, metaclass=SchemaMeta):  # pylint: disable=invalid-metacl
             nsp = name.split(':')[0]
             return nsp if nsp in nsids else name
 
-        type_deps = self._dependencies()
+        graph = self.graph
         imports = getattr(self.info.namespaces, "value", lambda: {})()
         exports = getattr(self.info.exports, "value", lambda: [])()
 
-        defs = set(type_deps) | set(imports)
-        refs = {ns(r, imports) for d in type_deps.values() for r in d} | set(exports)
-        oids = (OPTION_ID['enum'], OPTION_ID['pointer'])
-        refs = {r[1:] if r[0] in oids else r for r in refs}  # Reference base type for derived enums/pointers
+        defs = set(graph.forward) | set(imports)
+        refs = {ns(r, imports) for r, deps in graph.reverse.items() if deps} | set(exports)
         return {
             "unreferenced": list(map(str, defs - refs)),
             "undefined": list(map(str, refs - defs)),
-            "cycles": [],
+            "cycles": graph.cycles,
         }
 
+    def prune(self, roots: List[str] = None) -> Tuple["Schema", Dict[str, List[str]]]:
+        """
+        Remove the types not reachable from the given roots, or the exported types
+        The kept types are reused as compiled, nothing is recompiled, and the roots are the exports of the pruned schema
+        This only reduces the memory and writer output of a loaded schema, see `prune_jadn` to prune before compiling
+        :param roots: names of the types to keep, with their dependencies
+        :raise SchemaException: no roots given and the schema has no exports
+        :return: pruned schema & report of the kept, removed and undefined types
+        """
+        exports = getattr(self.info.exports, "value", lambda: [])()
+        roots, reachable, report = _prune(self.graph, list(self.types), roots, exports)
+        schema = {"types": {k: v for k, v in self.types.items() if k in reachable}}
+        if self._info:
+            schema["info"] = {**self.info.schema(), "exports": [r for r in roots if r in reachable]}
+        return Schema(**schema), report
+
+    @classmethod
+    def prune_jadn(cls, schema: dict, roots: List[str] = None) -> Tuple[dict, Dict[str, List[str]]]:
+        """
+        Remove the types not reachable from the given roots, or the exported types, from a JADN schema before it is
+        compiled, so only the kept types are compiled when it is loaded, see `prune`
+        :param schema: JADN schema to prune
+        :param roots: names of the types to keep, with their dependencies
+        :raise SchemaException: no roots given and the schema has no exports
+        :return: pruned JADN schema & report of the kept, removed and undefined types
+        """
+        types = schema.get("types", [])
+        info = schema.get("info")
+        roots, reachable, report = _prune(DependencyGraph(jadn_dependencies(types)), [t[0] for t in types], roots, (info or {}).get("exports", []))
+        pruned = {**schema, "types": [t for t in types if t[0] in reachable]}
+        if info is not None:
+            pruned["info"] = {**info, "exports": [r for r in roots if r in reachable]}
+        return pruned, report
+
     def dump(self, fname: Union[str, Path, BufferedIOBase, TextIOBase], indent: int = 2) -> NoReturn:
         """
         Write the JADN to a file
@@ -213,11 +460,11 @@ class Schema(BaseModel, metaclass=SchemaMeta):  # pylint: disable=invalid-metacl
         :return: Formatted JADN schema in the given file
         """
         if isinstance(fname, (BufferedIOBase, TextIOBase)):
-            fname.write(self.dumps(indent))
+            fname.writelines(self._iterdumps(self.schema(), indent))
         else:
             output = fname if fname.endswith(".jadn") else f"{fname}.jadn"
             with open(output, "w", encoding="UTF-8") as f:
-                f.write(self.dumps(indent))
+                f.writelines(self._iterdumps(self.schema(), indent))
 
     def dumps(self, indent: int = 2) -> str:
         """
@@ -228,33 +475,48 @@ class Schema(BaseModel, metaclass=SchemaMeta):  # pylint: disable=invalid-metacl
         return self._dumps(self.schema(), indent=indent)
 
     @classmethod
-    def load(cls, fname: Union[str, BufferedIOBase, TextIOBase]) -> "Schema":
+    def load(cls, fname: Union[str, BufferedIOBase, TextIOBase], repository: str = None, roots: List[str] = None) -> "Schema":
         """
         Load a JADN schema from a file
         :param fname: JADN schema file to load
+        :param repository: directory of the packages to resolve the namespaced type references against
+        :param roots: names of the types to load, with their dependencies, the other types are not compiled
         :return: Loaded schema
         """
         if isinstance(fname, (BufferedIOBase, TextIOBase)):
-            return cls.parse_raw(fname.read())
+            return cls.loads(fname.read(), repository, roots)
 
         if isinstance(fname, str):
             if os.path.isfile(fname):
-                return cls.parse_file(fname)
+                if repository is None and roots is None:
+                    return cls.parse_file(fname)
+                with open(fname, "rb") as f:
+                    return cls.loads(f.read(), repository, roots)
             raise FileNotFoundError(f"Schema file not found - '{fname}'")
         raise TypeError("fname is not valid")
 
     @classmethod
-    def loads(cls, schema: Union[bytes, bytearray, dict, str]) -> "Schema":
+    def loads(cls, schema: Union[bytes, bytearray, dict, str], repository: str = None, roots: List[str] = None) -> "Schema":
         """
         load a JADN schema from a string
         :param schema: JADN schema to load
+        :param repository: directory of the packages to resolve the namespaced type references against
+        :param roots: names of the types to load, with their dependencies, the other types are not compiled,
+            see `prune_jadn`
         :return: Loaded schema
         """
+        if repository is not None or roots is not None:
+            schema = schema if isinstance(schema, dict) else json.loads(schema)
+            if repository is not None:
+                schema = resolve_imports(schema, repository)
+            if roots is not None:
+                schema = cls.prune_jadn(schema, roots)[0]
+            return cls.parse_obj(schema)
         if isinstance(schema, dict):
             return cls.parse_obj(schema)
         return cls.parse_raw(schema)
 
-    def simplify(self, extensions: Set[str] = None) -> "Schema":
+    def simplify(self, extensions: Set[str] = None, plurals: Dict[str, str] = None) -> "Schema":
         """
         Simplify the schema with schema extensions removed
         :param extensions: the options to simplify
@@ -263,9 +525,36 @@ class Schema(BaseModel, metaclass=SchemaMeta):  # pylint: disable=invalid-metacl
             * DerivedEnum:     Replace all derived and pointer enumerations with explicit Enumerated type definitions
             * MapOfEnum:       Replace all MapOf types with listed keys with explicit Map type definitions
             * Link:            Replace Key and Link fields with explicit types
-        :return: simplified schema
+        :param plurals: plural names of multi-valued fields, used to name their ArrayOf definitions
+        :return: simplified schema, the same instance while the schema & extensions are unchanged
         """
         schema = self.schema()
         exts = EXTENSIONS.union(extensions) if extensions else EXTENSIONS
-        schema["types"] = unfold_extensions(schema["types"], self.info.config.Sys, exts)
-        return Schema(**schema)
+        key = (self.fingerprint(schema), frozenset(exts), frozenset((plurals or {}).items()))
+        if (simple := _simplify_cache.get(key)) is not None:
+            DefinitionBase.__config__.types = simple.types
+        else:
+            info = schema.get("info")
+            unfolded = {t[0]: t for t in unfold_extensions(schema["types"], self.info.config.Sys, exts, plurals)}
+            prev = self._simplified
+            if prev is not None and prev._unfolded and prev._unfolded[:2] == (info, key[1:]):
+                # Only compile the unfolded definitions that changed since the last simplify
+                prev_unfolded = prev._unfolded[2]
+                types = recompile_types(
+                    prev.types,
+                    {k: v for k, v in unfolded.items() if prev_unfolded.get(k) != v},
+                    prev_unfolded.keys() - unfolded.keys(),
+                    prev.graph.reverse,
+                    self.__formats__
+                )
+                schema["types"] = {k: types[k] for k in unfolded}
+            else:
+                schema["types"] = list(unfolded.values())
+            simple = _simplify_cache[key] = Schema(**schema)
+            simple._unfolded = (info, key[1:], unfolded)
+        self._simplified = simple
+        _simplify_recent[key] = simple
+        _simplify_recent.move_to_end(key)
+        while len(_simplify_recent) > SIMPLIFY_CACHE_SIZE:
+            _simplify_recent.popitem(last=False)
+        return simple
@@ -2,7 +2,7 @@
 Utility functions & classes
 """
 from .general import (
-    addKey, check_values, classproperty, default_decode, default_encode, ellipsis_str, floatString, isBase64, safe_cast, toStr, unixTimeMillis
+    addKey, check_values, classproperty, default_decode, default_encode, ellipsis_str, floatString, fromBase64, isBase64, safe_cast, toStr, unixTimeMillis
 )
 from .enums import EnumBase
 from .ext_dicts import ObjectDict, FrozenDict, QueryDict
@@ -16,6 +16,7 @@ __all__ = [
     "default_encode",
     "ellipsis_str",
     "floatString",
+    "fromBase64",
     "isBase64",
     "safe_cast",
     "toStr",
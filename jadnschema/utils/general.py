@@ -7,7 +7,11 @@ import re
 import sys
 
 from datetime import datetime
-from typing import Any, Callable, Dict, Type, Union
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Type, Union
+
+_B64_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/")
 
 
 def addKey(d: dict, k: str = None) -> Callable:
@@ -70,23 +74,87 @@ def default_decode(itm: Any, decoders: Dict[Type, Callable[[Any], Any]] = None)
 def default_encode(itm: Any, encoders: Dict[Type, Callable[[Any], Any]] = None) -> Any:
     """
     Default encode the given object to the predefined types
+    Containers are only copied when an item within them changes, unchanged objects are returned as is
+    The result may be the given object or share containers with it, callers must not mutate the result in place
     :param itm: object to encode/decode,
     :param encoders: custom type encoding - Ex) -> {bytes: lambda b: b.decode('utf-8', 'backslashreplace')}
     :return: default system encoded object
     """
-    if encoders and isinstance(itm, tuple(encoders.keys())):
-        return encoders[type(itm)](itm)
-
-    if isinstance(itm, dict):
-        return {default_encode(k, encoders): default_encode(v, encoders) for k, v in itm.items()}
-
-    if isinstance(itm, (list, set, tuple)):
-        return type(itm)(default_encode(i, encoders) for i in itm)
+    return _normalizer(tuple(encoders.items()) if encoders else ())(itm)
 
-    if isinstance(itm, (int, float)):
-        return itm
 
-    return toStr(itm)
+class _Normalizer:
+    """
+    Single pass, type dispatched implementation of `default_encode`
+    The handler of each type is resolved once and cached by exact type
+    """
+    _dispatch: Dict[Type, Callable[[Any], Any]]
+    _encoders: Tuple[Tuple[Type, Callable[[Any], Any]], ...]
+    # types returned unchanged, items of these types are not dispatched
+    _native: Set[Type]
+
+    __slots__ = ("_dispatch", "_encoders", "_native")
+
+    def __init__(self, encoders: Tuple[Tuple[Type, Callable[[Any], Any]], ...]):
+        self._encoders = encoders
+        self._dispatch = dict(encoders)
+        self._native = {t for t in (bool, float, int, str) if t not in self._dispatch}
+        for t in self._native:
+            self._dispatch[t] = _identity
+        for t, handler in ((dict, self._dict), (list, self._sequence), (set, self._sequence), (tuple, self._sequence)):
+            self._dispatch.setdefault(t, handler)
+
+    def __call__(self, itm: Any) -> Any:
+        if handler := self._dispatch.get(type(itm)):
+            return handler(itm)
+        return self._resolve(type(itm))(itm)
+
+    def _resolve(self, itm_type: Type) -> Callable[[Any], Any]:
+        """
+        Find the handler of a subclass, custom encoders take precedence
+        """
+        for base, encoder in self._encoders:
+            if issubclass(itm_type, base):
+                break
+        else:
+            if issubclass(itm_type, dict):
+                encoder = self._dict
+            elif issubclass(itm_type, (list, set, tuple)):
+                encoder = self._sequence
+            elif issubclass(itm_type, (int, float)):
+                encoder = _identity
+            else:
+                encoder = toStr
+        self._dispatch[itm_type] = encoder
+        return encoder
+
+    def _dict(self, itm: dict) -> dict:
+        native = self._native
+        out = None if type(itm) is dict else {}
+        for idx, (key, val) in enumerate(itm.items()):
+            enc_key = key if type(key) in native else self(key)
+            enc_val = val if type(val) in native else self(val)
+            if out is None and (enc_key is not key or enc_val is not val):
+                out = dict(islice(itm.items(), idx))
+            if out is not None:
+                out[enc_key] = enc_val
+        return itm if out is None else out
+
+    def _sequence(self, itm: Union[list, set, tuple]) -> Union[list, set, tuple]:
+        native = self._native
+        items = [i if type(i) in native else self(i) for i in itm]
+        if type(itm) in (list, set, tuple) and all(a is b for a, b in zip(items, itm)):
+            return itm
+        return type(itm)(items)
+
+
+@lru_cache(maxsize=32)
+def _normalizer(encoders: Tuple[Tuple[Type, Callable[[Any], Any]], ...]) -> _Normalizer:
+    return _Normalizer(encoders)
+
+
+def _identity(itm: Any) -> Any:
+    return itm
 
 
 def ellipsis_str(val: str, cut: int = 100) -> str:
@@ -117,23 +185,33 @@ def floatString(num: Union[float, str]) -> Union[float, str]:
     return num
 
 
+def fromBase64(sb: Union[bytes, bytearray, memoryview, str]) -> Optional[bytes]:
+    """
+    Decode the given value if it is base64, the size and first/last characters are checked before the value is scanned
+    :param sb: value to decode
+    :return: decoded bytes or None if not base64
+    """
+    if not isinstance(sb, (bytes, bytearray, memoryview, str)):
+        return None
+    if len(sb) == 0 or len(sb) % 4 != 0:
+        return None
+    first, last = (sb[0], sb[-1]) if isinstance(sb, str) else (chr(sb[0]), chr(sb[-1]))
+    if first not in _B64_CHARS or (last not in _B64_CHARS and last != "="):
+        return None
+    try:
+        # validation and decoding are done together, the value is not re-encoded to check it
+        return base64.b64decode(sb, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
 def isBase64(sb: Union[bytes, str]) -> bool:
     """
     Determine if the given value is a base64
     :param sb: value to check
     :return: bool if base64
     """
-    try:
-        if isinstance(sb, str):
-            # If there's any unicode here, an exception will be thrown and the function will return false
-            sb_bytes = bytes(sb, 'ascii')
-        elif isinstance(sb, bytes):
-            sb_bytes = sb
-        else:
-            raise ValueError("Argument must be string or bytes")
-        return base64.b64encode(base64.b64decode(sb_bytes)) == sb_bytes
-    except (binascii.Error, ValueError):
-        return False
+    return fromBase64(sb) is not None
 
 
 def safe_cast(val: Any, to_type: Type, default: Any = None) -> Any:
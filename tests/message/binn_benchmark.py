@@ -0,0 +1,168 @@
+"""
+Benchmark the BINN codec against the previous stream based implementation
+Run from this directory: `PYTHONPATH=../.. python binn_benchmark.py [iterations]`
+On query_pairs.binn (195 bytes, 2000 iterations, CPython 3.11) three runs measured 1.22x - 1.39x faster decode and
+1.84x - 1.99x faster encode, small messages are dominated by per-call overhead so expect variation between machines
+"""
+import io
+import sys
+import timeit
+
+from functools import partial
+from struct import pack, unpack
+from typing import Union
+from jadnschema.convert.message.serialize import pybinn
+from jadnschema.convert.message.serialize.pybinn import datatypes as types
+
+orig_file = "query_pairs"
+
+
+class LegacyEncoder:
+    """
+    Previous BINNEncoder, values are written through a BytesIO and container items are encoded by a new encoder
+    """
+    def __init__(self):
+        self._buffer = io.BytesIO()
+
+    def encode_bytes(self, value) -> bytes:
+        self.encode(value)
+        return self._buffer.getvalue()
+
+    def encode(self, value) -> None:
+        if value is None:
+            self._buffer.write(types.BINN_NULL)
+        elif isinstance(value, str):
+            self._buffer.write(types.BINN_STRING)
+            self._buffer.write(self._to_varint(len(value.encode("utf8"))))
+            self._buffer.write(value.encode("utf8") + b"\0")
+        elif isinstance(value, int):
+            self._encode_int(value)
+        elif isinstance(value, float):
+            self._buffer.write(types.BINN_FLOAT64)
+            self._buffer.write(pack("d", value))
+        elif isinstance(value, bytes):
+            self._buffer.write(types.BINN_BLOB)
+            self._buffer.write(pack("I", len(value)))
+            self._buffer.write(value)
+        elif isinstance(value, list):
+            with io.BytesIO() as buffer:
+                for item in value:
+                    buffer.write(LegacyEncoder().encode_bytes(item))
+                self._buffer.write(types.BINN_LIST)
+                self._buffer.write(self._to_varint(buffer.tell() + 3))
+                self._buffer.write(self._to_varint(len(value)))
+                self._buffer.write(buffer.getvalue())
+        elif isinstance(value, dict):
+            with io.BytesIO() as buffer:
+                for key in value:
+                    buffer.write(pack("B", len(key)))
+                    buffer.write(key.encode("utf8"))
+                    buffer.write(LegacyEncoder().encode_bytes(value[key]))
+                self._buffer.write(types.BINN_OBJECT)
+                self._buffer.write(self._to_varint(buffer.tell() + 3))
+                self._buffer.write(self._to_varint(len(value)))
+                self._buffer.write(buffer.getvalue())
+        else:
+            raise TypeError(f"Invalid type for encode: {type(value)}")
+
+    def _encode_int(self, value: int) -> None:
+        for low, high, binn_type, fmt in (
+            (0, 0x100, types.BINN_UINT8, "B"), (0, 0x10000, types.BINN_UINT16, "H"), (0, 0x100000000, types.BINN_UINT32, "I"),
+            (0, 0x10000000000000000, types.BINN_UINT64, "L"), (-0x80, 0, types.BINN_INT8, "b"), (-0x8000, 0, types.BINN_INT16, "h"),
+            (-0x80000000, 0, types.BINN_INT32, "i"), (-0x8000000000000000, 0, types.BINN_INT64, "l")
+        ):
+            if low <= value < high:
+                self._buffer.write(binn_type)
+                self._buffer.write(pack(fmt, value))
+                return
+
+    @staticmethod
+    def _to_varint(value: int) -> bytes:
+        if value > 127:
+            return pack(">I", value | 0x80000000)
+        return pack("B", value)
+
+
+class LegacyDecoder:
+    """
+    Previous BINNDecoder, values are read from a BytesIO of the buffer and unpacked individually
+    """
+    def __init__(self, buffer: bytes):
+        self._buffer = io.BytesIO(buffer)
+        self._decoders = {
+            types.BINN_STRING: self._decode_str,
+            types.BINN_UINT8: partial(self._unpack, "B", 1),
+            types.BINN_INT8: partial(self._unpack, "b", 1),
+            types.BINN_UINT16: partial(self._unpack, "H", 2),
+            types.BINN_INT16: partial(self._unpack, "h", 2),
+            types.BINN_UINT32: partial(self._unpack, "I", 4),
+            types.BINN_INT32: partial(self._unpack, "i", 4),
+            types.BINN_UINT64: partial(self._unpack, "L", 8),
+            types.BINN_INT64: partial(self._unpack, "l", 8),
+            types.BINN_FLOAT64: partial(self._unpack, "d", 8),
+            types.BINN_LIST: self._decode_list,
+            types.BINN_TRUE: lambda: True,
+            types.BINN_FALSE: lambda: False,
+            types.BINN_NULL: lambda: None
+        }
+
+    def decode(self):
+        binn_type = self._buffer.read(1)
+        if binn_type == types.BINN_OBJECT:
+            return self._decode_dict()
+        if decoder := self._decoders.get(binn_type, None):
+            return decoder()
+        raise TypeError(f"Invalid data format: {binn_type}")
+
+    def _decode_str(self) -> str:
+        size = self._from_varint()
+        value = self._buffer.read(size).decode("utf8")
+        self._buffer.read(1)
+        return value
+
+    def _decode_list(self) -> list:
+        self._from_varint()
+        count = self._from_varint()
+        return [self.decode() for _ in range(count)]
+
+    def _decode_dict(self) -> dict:
+        self._from_varint()
+        count = self._from_varint()
+        result = {}
+        for _ in range(count):
+            key_size = unpack("B", self._buffer.read(1))[0]
+            key = self._buffer.read(key_size).decode("utf8")
+            result[key] = self.decode()
+        return result
+
+    def _from_varint(self) -> int:
+        value = unpack("B", self._buffer.read(1))[0]
+        if value & 0x80:
+            self._buffer.seek(self._buffer.tell() - 1)
+            value = unpack(">I", self._buffer.read(4))[0]
+            value &= 0x7FFFFFFF
+        return value
+
+    def _unpack(self, fmt: str, size: int) -> Union[int, float]:
+        return unpack(fmt, self._buffer.read(size))[0]
+
+
+def bench(name: str, legacy, current, number: int) -> None:
+    # best of several runs, a single run is too sensitive to other load on the machine
+    legacy_time = min(timeit.repeat(legacy, number=number, repeat=5))
+    current_time = min(timeit.repeat(current, number=number, repeat=5))
+    print(f"{name:<8} legacy {legacy_time / number * 1e6:9.2f} us   current {current_time / number * 1e6:9.2f} us   speedup {legacy_time / current_time:5.2f}x")
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with open(f"{orig_file}.binn", "rb") as f:
+        encoded = f.read()
+    decoded = pybinn.loads(encoded)
+
+    assert LegacyDecoder(encoded).decode() == decoded, "Legacy decoder does not match the current decoder"
+    assert LegacyEncoder().encode_bytes(decoded) == pybinn.dumps(decoded) == encoded, "Encoders do not match the original message"
+
+    print(f"{orig_file}.binn - {len(encoded)} bytes, {iterations} iterations")
+    bench("decode", lambda: LegacyDecoder(encoded).decode(), lambda: pybinn.loads(encoded), iterations)
+    bench("encode", lambda: LegacyEncoder().encode_bytes(decoded), lambda: pybinn.dumps(decoded), iterations)
@@ -0,0 +1,147 @@
+"""
+Benchmark the message serializations
+Each serialization encodes & decodes each JSON fixture of this directory, reporting the throughput, encoded size,
+peak memory, round-trip correctness and whether the fixture of the serialization, e.g. `query_pairs.cbor`, decodes
+to the JSON fixture, as a table and optionally as JSON for tracking across versions
+Serializations in `KNOWN_BROKEN` are reported separately and do not fail the run, the exit status is 1 if any other
+serialization errors, does not round-trip or does not decode its fixture
+Run from this directory, with the package importable, e.g. from a checkout:
+`PYTHONPATH=../.. python codec_benchmark.py [-n iterations] [-f format ...] [-o results.json]`
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from typing import Callable, List, Optional
+from jadnschema import Schema
+from jadnschema.convert import SerialFormats
+from jadnschema.convert.message.serialize import decode_msg, encode_msg
+
+schema_file = os.path.join("..", "schema", "oc2ls-v1.1-lang_resolved.jadn")
+# serialization -> reason it fails on the fixtures
+KNOWN_BROKEN = {
+    SerialFormats.BENCODE: "bencode.bdecode requires bytes, encode_msg returns str",
+    SerialFormats.S_EXPRESSION: "sp_decode fails on empty lists",
+    SerialFormats.SMILE: "SmileDecoder.init deletes an attribute that is not set"
+}
+
+
+def package_version() -> str:
+    try:
+        return version("jadnschema")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def peak_memory(func: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def throughput(func: Callable[[], object], number: int) -> float:
+    # best of several runs, a single run is too sensitive to other load on the machine
+    return number / min(timeit.repeat(func, number=number, repeat=5))
+
+
+def decode_fixture(fixture: str, msg: dict, fmt: SerialFormats, encoded: object, kwargs: dict) -> Optional[bool]:
+    # fixtures are written by format_dump.py, text serializations as UTF-8
+    path = f"{fixture}.{fmt.value}"
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    return decode_msg(data.decode("utf-8") if isinstance(encoded, str) else data, fmt, raw=True, **kwargs) == msg
+
+
+def bench(fixture: str, msg: dict, fmt: SerialFormats, number: int, schema: Schema) -> dict:
+    result = {"fixture": fixture, "format": fmt.value}
+    kwargs = {"schema": schema} if fmt == SerialFormats.CBOR_SCHEMA else {}
+    if fmt in KNOWN_BROKEN:
+        result["known_broken"] = KNOWN_BROKEN[fmt]
+    try:
+        encoded = encode_msg(msg, fmt, raw=True, **kwargs)
+        decoded = decode_msg(encoded, fmt, raw=True, **kwargs)
+        result["fixture_decodes"] = decode_fixture(fixture, msg, fmt, encoded, kwargs)
+    except Exception as e:  # pylint: disable=broad-except
+        return {**result, "error": f"{type(e).__name__}: {e}"}
+
+    return {
+        **result,
+        "size": len(encoded),
+        "encode_per_sec": throughput(lambda: encode_msg(msg, fmt, raw=True, **kwargs), number),
+        "decode_per_sec": throughput(lambda: decode_msg(encoded, fmt, raw=True, **kwargs), number),
+        "encode_peak_bytes": peak_memory(lambda: encode_msg(msg, fmt, raw=True, **kwargs)),
+        "decode_peak_bytes": peak_memory(lambda: decode_msg(encoded, fmt, raw=True, **kwargs)),
+        "roundtrip": decoded == msg
+    }
+
+
+def passed(result: dict) -> bool:
+    return "error" not in result and result["roundtrip"] and result["fixture_decodes"] is not False
+
+
+def table(results: List[dict]) -> str:
+    def check(val: Optional[bool]) -> str:
+        return "-" if val is None else "ok" if val else "FAIL"
+
+    header = f"{'fixture':<16} {'format':<12} {'size':>7} {'enc/s':>10} {'dec/s':>10} {'enc peak':>9} {'dec peak':>9}  roundtrip  fixture"
+    rows = [header, "-" * len(header)]
+    for r in results:
+        if "error" in r:
+            rows.append(f"{r['fixture']:<16} {r['format']:<12} {r['error']}")
+            continue
+        rows.append(
+            f"{r['fixture']:<16} {r['format']:<12} {r['size']:>7} {r['encode_per_sec']:>10.0f} {r['decode_per_sec']:>10.0f} "
+            f"{r['encode_peak_bytes']:>9} {r['decode_peak_bytes']:>9}  {check(r['roundtrip']):<9}  {check(r['fixture_decodes'])}"
+        )
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the message serializations")
+    parser.add_argument("-n", "--iterations", type=int, default=1000, help="encodes/decodes per timing run")
+    parser.add_argument("-f", "--format", action="append", choices=[f.value for f in SerialFormats], help="serialization to benchmark, defaults to all")
+    parser.add_argument("-o", "--output", help="file to write the results to as JSON")
+    args = parser.parse_args(argv)
+
+    schema = Schema.load(schema_file)
+    formats = [SerialFormats(f) for f in args.format] if args.format else list(SerialFormats)
+    results = []
+    for path in sorted(glob.glob("*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            msg = json.load(f)
+        fixture = os.path.splitext(os.path.basename(path))[0]
+        results.extend(bench(fixture, msg, fmt, args.iterations, schema) for fmt in formats)
+
+    broken = [r for r in results if "known_broken" in r]
+    print(table([r for r in results if "known_broken" not in r]))
+    if broken:
+        print(f"\nKnown broken, not counted in the exit status\n{table(broken)}")
+        for fmt, reason in KNOWN_BROKEN.items():
+            if fmt in formats:
+                print(f"  {fmt.value}: {reason}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": package_version(),
+                "python": platform.python_version(),
+                "created": datetime.now(timezone.utc).isoformat(),
+                "iterations": args.iterations,
+                "results": results
+            }, f, indent=2)
+    return 0 if all(passed(r) for r in results if "known_broken" not in r) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
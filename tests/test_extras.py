@@ -2,11 +2,13 @@
 Test JADN Schema transformations
 Transformation -> Reduce Complexity
 """
+import io
 import os
 
 from typing import Callable
 from unittest import TestCase, skip
 from jadnschema import Schema, convert
+from jadnschema.exceptions import SchemaException
 
 # Consts
 schema = 'oc2ls-v1.1-lang_resolved'
@@ -92,5 +94,85 @@ class Conversions(TestCase):
         with open(os.path.join(self._test_dir, schema + '.simple.jadn'), "w") as f:
             simple_schema.dump(f)
 
+    def test_Unfold_cached(self):
+        simple_schema = self._schema_obj.simplify()
+        self.assertIs(simple_schema, Schema.parse_file(self._base_schema).simplify())
+        self.assertIsNot(simple_schema, self._schema_obj.simplify({"NotAnExtension"}))
+
+    def test_Unfold_incremental(self):
+        schema_obj = Schema.parse_file(self._base_schema)
+        simple_schema = schema_obj.simplify()
+        args = next(t for t in schema_obj.schema()["types"] if t[0] == "Args")
+        schema_obj.update_type([*args[:4], [*args[4], [99, "extra_arg", "String", ["[0"], ""]]])
+        self.assertIn("extra_arg", schema_obj.types["Args"].__fields__)
+
+        updated_schema = schema_obj.simplify()
+        self.assertEqual(updated_schema.schema(), Schema(**schema_obj.schema()).simplify({"NotAnExtension"}).schema())
+        self.assertIsNot(updated_schema.types["Args"], simple_schema.types["Args"])
+        self.assertIs(updated_schema.types["Action"], simple_schema.types["Action"])
+
+        with self.assertRaises(SchemaException):
+            schema_obj.remove_type("Args")
+
+    def test_Prune(self):
+        pruned_schema, report = self._schema_obj.prune(["Args"])
+        self.assertEqual(list(pruned_schema.types), ["Args", "Date-Time", "Duration", "Response-Type"])
+        self.assertEqual(sorted(report["kept"] + report["removed"]), sorted(self._schema_obj.types))
+        self.assertIs(pruned_schema.types["Args"], self._schema_obj.types["Args"])
+        self.assertEqual(pruned_schema.info.exports.value(), ["Args"])
+        self.assertEqual(len(self._schema_obj.prune()[0].types), len(self._schema_obj.types))
+
+    def test_PruneJadn(self):
+        jadn = self._schema_obj.schema()
+        pruned, report = Schema.prune_jadn(jadn, ["Args"])
+        self.assertEqual([t[0] for t in pruned["types"]], ["Args", "Date-Time", "Duration", "Response-Type"])
+        self.assertEqual(report, self._schema_obj.prune(["Args"])[1])
+        self.assertEqual(pruned["info"]["exports"], ["Args"])
+        # only the kept types are compiled
+        loaded = Schema.loads(jadn, roots=["Args"])
+        self.assertEqual(list(loaded.types), ["Args", "Date-Time", "Duration", "Response-Type"])
+        self.assertEqual(list(Schema.load(self._base_schema, roots=["Args"]).types), list(loaded.types))
+        with self.assertRaises(SchemaException):
+            Schema.prune_jadn({"types": jadn["types"]})
+
     def test_prettyFormat(self):
         self._schema_obj.dump(f"{self._test_dir}/{schema}_reorg.jadn")
+
+    def test_Graph(self):
+        graph = self._schema_obj.graph
+        self.assertIs(graph, self._schema_obj.graph)
+        self.assertEqual(sorted(graph.order), sorted(self._schema_obj.types))
+        for name in graph.order:
+            self.assertTrue(all(graph.depth[d] <= graph.depth[name] for d in graph.forward[name]))
+
+        tree = Schema(**{"types": [
+            ["Tree", "Record", [], "", [
+                [1, "label", "String", [], ""],
+                [2, "children", "Forest", ["[0"], ""]
+            ]],
+            ["Forest", "ArrayOf", ["*Tree"], ""],
+            ["Root", "Record", [], "", [[1, "tree", "Tree", [], ""]]]
+        ]})
+        self.assertEqual([sorted(c) for c in tree.graph.cycles], [["Forest", "Tree"]])
+        self.assertEqual(tree.graph.order[-1], "Root")
+        self.assertEqual(tree.graph.depth, {"Forest": 0, "Tree": 0, "Root": 1})
+        self.assertEqual([sorted(c) for c in tree.analyze()["cycles"]], [["Forest", "Tree"]])
+
+    def test_Index(self):
+        index = self._schema_obj.index
+        self.assertIs(index, self._schema_obj.index)
+        self.assertEqual(index.referencing("Args"), ["OpenC2-Command"])
+        self.assertEqual(index.with_field("start_time"), ["Args"])
+        self.assertIn("Hostname", index.with_format("hostname"))
+        self.assertIn("Args", index.with_option("minc"))
+        self.assertEqual(index.with_field("NotAField"), [])
+
+    def test_dump_stream(self):
+        buf = io.StringIO()
+        self._schema_obj.dump(buf)
+        self.assertEqual(buf.getvalue(), self._schema_obj.dumps())
+
+        deep = []
+        for _ in range(5000):
+            deep = [deep]
+        self.assertEqual(self._schema_obj._dumps(deep).count("["), 5001)
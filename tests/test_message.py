@@ -1,12 +1,24 @@
 """
 Test JADN Messages
 """
+import cbor2
+import io
 import json
 import os
+import socket
+import tempfile
+import uuid
+import zlib
 
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from unittest import TestCase, skip
 from jadnschema import Schema
-from jadnschema.convert import Message, SerialFormats
+from jadnschema.convert import Message, MessageReader, MessageStore, MessageType, MessageWriter, SerialFormats, TransferEncoding
+from jadnschema.convert.message import Compression
+from jadnschema.convert.message.serialize import compression, decode_msg, encode_msg, null_types, pybinn, schema_cbor, serializations, xml_dump_stream, xml_load_stream
+from jadnschema.convert.message.serialize.batch import decode_many, encode_many, iter_decode, iter_encode
+from jadnschema.utils import default_encode, fromBase64, isBase64
 
 schema = "oc2ls-v1.1-lang_resolved"
 
@@ -77,3 +89,494 @@ class Messages(TestCase):
 
     def test_loadMessage_yaml(self):
         self._loadMessage(SerialFormats.YAML)
+
+
+class Peek(TestCase):
+    _test_root = os.path.join(os.path.abspath(os.path.dirname(__file__)))
+    _base_message = f"{_test_root}/message/query_pairs.json"
+    with open(_base_message, "r", encoding="utf-8") as f:
+        _base_message_json = json.load(f)
+
+    def _peek(self, fmt: SerialFormats, msg: bytes):
+        peeked = Message.peek(msg, fmt)
+        headers = self._base_message_json["headers"]
+        self.assertEqual(headers["request_id"], str(peeked.request_id))
+        self.assertEqual(headers["from"], peeked.origin)
+        self.assertEqual(MessageType.Request, peeked.msg_type)
+        self.assertIsNotNone(peeked.raw_content, f"{fmt.value} content was decoded by peek")
+        self.assertDictEqual(self._base_message_json, peeked.oc2_message(), f"Peeked {fmt.value} message is not equal to the original")
+
+    def test_peek_formats(self):
+        for fmt in (SerialFormats.CBOR, SerialFormats.JSON, SerialFormats.MSGPACK, SerialFormats.BINN):
+            with open(f"{self._test_root}/message/query_pairs.{fmt.value}", "rb") as f:
+                self._peek(fmt, f.read())
+
+    def test_peek_body_first(self):
+        msg = {"body": self._base_message_json["body"], "headers": self._base_message_json["headers"]}
+        for fmt in (SerialFormats.CBOR, SerialFormats.JSON, SerialFormats.MSGPACK):
+            self._peek(fmt, encode_msg(msg, fmt, raw=True))
+
+    def test_peek_invalid_content(self):
+        msg = {"headers": self._base_message_json["headers"], "body": {"openc2": {"request": {"action": "query"}}}}
+        peeked = Message.peek(encode_msg(msg, SerialFormats.CBOR, raw=True), SerialFormats.CBOR)
+        # the content stays invalid, every access raises rather than returning None after the first
+        for _ in range(2):
+            with self.assertRaises(KeyError):
+                _ = peeked.content
+        self.assertIsNotNone(peeked.raw_content)
+        with self.assertRaises(KeyError):
+            str(peeked)
+
+
+class LazyMessages(TestCase):
+    _test_root = os.path.join(os.path.abspath(os.path.dirname(__file__)))
+
+    def setUp(self):
+        with open(f"{self._test_root}/message/query_pairs.cbor", "rb") as f:
+            self.encoded = f.read()
+
+    def test_passthrough(self):
+        msg = Message.oc2_loads(self.encoded, SerialFormats.CBOR, lazy=True)
+        self.assertIs(self.encoded, msg.serialize())
+        # modified headers are re-encoded, the content is decoded for it
+        msg.recipients = ["consumer1@ex.com"]
+        self.assertNotEqual(self.encoded, msg.serialize())
+        self.assertIsNone(msg.raw_content)
+
+    def test_changed_format(self):
+        msg = Message.oc2_loads(self.encoded, SerialFormats.CBOR, lazy=True)
+        msg.content_type = SerialFormats.JSON
+        self.assertEqual(Message.oc2_loads(self.encoded, SerialFormats.CBOR).oc2_message(), json.loads(msg.serialize()))
+
+    def test_record_passthrough(self):
+        msg = Message(content={"action": "query", "target": {"features": ["pairs"]}})
+        record = msg.dumps()
+        lazy = MessageReader(record, lazy=True).read()
+        self.assertIsNotNone(lazy.raw_content)
+        self.assertEqual(record, lazy.dumps())
+        self.assertIsNotNone(lazy.raw_content, "Content was decoded to re-frame the message")
+        self.assertEqual(msg.content, lazy.content)
+        self.assertIsNone(lazy.raw_content)
+
+    def test_deferred_validation(self):
+        lazy = Message.loads(Message(msg_type=MessageType.Response, content={"status": 200}).dumps(), lazy=True)
+        lazy.msg_type = MessageType.Request
+        with self.assertRaises(KeyError):
+            _ = lazy.content
+
+
+class Framing(TestCase):
+    def setUp(self):
+        self.msg = Message(
+            recipients=["consumer1@ex.com", "consumer2@ex.com"],
+            origin="producer1@orchestrator1",
+            content_type=SerialFormats.CBOR,
+            content={"action": "query", "target": {"features": ["pairs"]}}
+        )
+
+    def _assertMessageEqual(self, msg: Message, other: Message):
+        for attr in ("recipients", "origin", "created", "msg_type", "request_id", "content_type", "content"):
+            self.assertEqual(getattr(msg, attr), getattr(other, attr), f"Message attribute `{attr}` is not equal")
+
+    def test_dumps_loads(self):
+        self._assertMessageEqual(self.msg, Message.loads(self.msg.dumps()))
+
+    def test_separator_content(self):
+        self.msg.content = {"action": "query", "target": {"features": ["\xF5\xBE", "\xF5\xBD"]}}
+        self._assertMessageEqual(self.msg, Message.loads(self.msg.dumps()))
+
+    def test_truncated(self):
+        record = self.msg.dumps()
+        with self.assertRaises(ValueError):
+            Message.loads(record[:-1])
+        with self.assertRaises(ValueError):
+            list(MessageReader(io.BytesIO(record + record[:10])))
+
+    def test_stream(self):
+        msgs = [self.msg, Message(msg_type=MessageType.Response, content={"status": 200})]
+        buffer = io.BytesIO()
+        MessageWriter(buffer).write_many(msgs)
+        for source in (buffer.getvalue(), io.BytesIO(buffer.getvalue())):
+            loaded = list(MessageReader(source))
+            self.assertEqual(len(msgs), len(loaded))
+            for msg, other in zip(msgs, loaded):
+                self._assertMessageEqual(msg, other)
+
+    def test_socket(self):
+        producer, consumer = socket.socketpair()
+        with producer, consumer:
+            MessageWriter(producer).write_many([self.msg] * 3)
+            producer.shutdown(socket.SHUT_WR)
+            loaded = list(MessageReader(consumer))
+        self.assertEqual(3, len(loaded))
+        self._assertMessageEqual(self.msg, loaded[-1])
+
+
+class Store(TestCase):
+    start = datetime(2023, 1, 1)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.requests = []
+        with MessageStore(self.tmp.name, segment_size=1024) as store:
+            for i in range(25):
+                request = Message(created=self.start + timedelta(minutes=i), content={"action": "query", "target": {"features": ["pairs"]}})
+                response = Message(msg_type=MessageType.Response, request_id=request.request_id, created=request.created + timedelta(seconds=1), content={"status": 200})
+                store.extend([request, response])
+                self.requests.append(request)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookup(self):
+        with MessageStore(self.tmp.name, segment_size=1024) as store:
+            self.assertEqual(50, len(store))
+            entries = store.lookup(self.requests[10].request_id)
+            self.assertEqual([MessageType.Request, MessageType.Response], [e.msg_type for e in entries])
+            self.assertEqual(self.requests[10].content, store.read(entries[0]).content)
+            self.assertEqual({"status": 200}, store.read(entries[1]).content)
+            self.assertEqual([], store.lookup(uuid.uuid4()))
+
+    def test_scan(self):
+        with MessageStore(self.tmp.name, segment_size=1024) as store:
+            entries = list(store.scan(self.start + timedelta(minutes=5), self.start + timedelta(minutes=10), MessageType.Response))
+            self.assertEqual([r.request_id for r in self.requests[5:10]], [e.request_id for e in entries])
+            self.assertEqual(50, len(list(store)))
+            aware = self.start.replace(tzinfo=timezone(timedelta(hours=1)))
+            entries = list(store.scan(aware + timedelta(minutes=65), aware + timedelta(minutes=70), MessageType.Response))
+            self.assertEqual([r.request_id for r in self.requests[5:10]], [e.request_id for e in entries])
+
+    def test_sorted_index(self):
+        files = os.listdir(self.tmp.name)
+        logs = sorted(f for f in files if f.endswith(".log"))
+        # the active segment is indexed in memory, sealed segments by the sorted files
+        self.assertEqual(sorted(f.replace(".log", ".rid") for f in logs[:-1]), sorted(f for f in files if f.endswith(".rid")))
+        os.remove(os.path.join(self.tmp.name, logs[0].replace(".log", ".rid")))
+        with MessageStore(self.tmp.name, segment_size=1024) as store:
+            for request in self.requests:
+                self.assertEqual([MessageType.Request, MessageType.Response], [e.msg_type for e in store.lookup(request.request_id)])
+
+    def test_recover(self):
+        logs = sorted(f for f in os.listdir(self.tmp.name) if f.endswith(".log"))
+        # unindexed last record & partially written record
+        with open(os.path.join(self.tmp.name, logs[-1].replace(".log", ".idx")), "r+b") as f:
+            f.truncate(os.path.getsize(f.name) - 10)
+        with open(os.path.join(self.tmp.name, logs[-1]), "ab") as f:
+            f.write(Message(content={"status": 200}, msg_type=MessageType.Response).dumps()[:-5])
+
+        with MessageStore(self.tmp.name, segment_size=1024) as store:
+            self.assertEqual(50, len(store))
+            self.assertEqual({"status": 200}, store.read(store.lookup(self.requests[-1].request_id)[-1]).content)
+            store.append(self.requests[0])
+            self.assertEqual(3, len(store.lookup(self.requests[0].request_id)))
+
+    def test_recover_corrupt(self):
+        logs = sorted(f for f in os.listdir(self.tmp.name) if f.endswith(".log"))
+        with open(os.path.join(self.tmp.name, logs[-1]), "ab") as f:
+            f.write(b"\xff" * 64)
+
+        with MessageStore(self.tmp.name, segment_size=1024) as store:
+            self.assertEqual(50, len(store))
+            store.append(self.requests[0])
+        with MessageStore(self.tmp.name, segment_size=1024) as store:
+            self.assertEqual({"status": 200}, store.read(store.lookup(self.requests[-1].request_id)[-1]).content)
+            self.assertEqual(3, len(store.lookup(self.requests[0].request_id)))
+
+
+class BinnCodec(TestCase):
+    _test_root = os.path.join(os.path.abspath(os.path.dirname(__file__)))
+
+    def test_fixture_roundtrip(self):
+        with open(f"{self._test_root}/message/query_pairs.binn", "rb") as f:
+            encoded = f.read()
+        self.assertEqual(encoded, pybinn.dumps(pybinn.loads(encoded)), "BINN encoding is not equal to the original")
+        self.assertEqual(pybinn.loads(encoded), pybinn.loads(memoryview(encoded)))
+
+    def test_value_roundtrip(self):
+        value = {
+            "ints": [0, 255, 256, -1, -129, 70000, -70000, 2**40, -2**40],
+            "float": 1.5,
+            "bytes": b"\x00\xF5\xBE",
+            "nested": [{"key": "k" * 300}, [], {}],
+            "ünïcode": "välue",
+            "none": None
+        }
+        self.assertEqual(value, pybinn.loads(pybinn.dumps(value)))
+        self.assertEqual({1: "int"}, pybinn.loads(pybinn.dumps({1: "int"})))
+        self.assertEqual({b"8 bytes!": "bytes"}, pybinn.loads(pybinn.dumps({b"8 bytes!": "bytes"})))
+
+
+class Batch(TestCase):
+    _test_root = os.path.join(os.path.abspath(os.path.dirname(__file__)))
+    formats = (SerialFormats.BINN, SerialFormats.CBOR, SerialFormats.JSON, SerialFormats.MSGPACK, SerialFormats.YAML)
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        with open(f"{cls._test_root}/message/query_pairs.json", "r", encoding="utf-8") as f:
+            base = json.load(f)
+        cls.msgs = [base, {"action": "query", "target": {"features": []}}, {"status": 200, "results": {"versions": ["1.1"]}}] * 3
+
+    def test_matches_single(self):
+        for fmt in self.formats:
+            for raw in (True, False):
+                encoded = encode_many(self.msgs, fmt, raw)
+                self.assertEqual([encode_msg(m, fmt, raw) for m in self.msgs], encoded, f"{fmt.value} batch encoding differs")
+                self.assertEqual([decode_msg(m, fmt, raw) for m in encoded], decode_many(encoded, fmt, raw))
+        # the SMILE encoder is reused, shared string references must not leak between messages
+        self.assertEqual([encode_msg(m, SerialFormats.SMILE) for m in self.msgs], encode_many(self.msgs, SerialFormats.SMILE))
+
+    def test_iter(self):
+        encoded = iter_encode(iter(self.msgs), SerialFormats.CBOR, raw=True)
+        self.assertEqual(self.msgs, list(iter_decode(encoded, SerialFormats.CBOR, raw=True)))
+
+    def test_framed(self):
+        for fmt in self.formats:
+            framed = encode_many(self.msgs, fmt, framed=True)
+            self.assertIsInstance(framed, bytes)
+            self.assertEqual(self.msgs, decode_many(framed, fmt), f"{fmt.value} framed batch differs")
+            self.assertEqual(self.msgs, list(iter_decode(io.BytesIO(framed), fmt)))
+        with self.assertRaises(ValueError):
+            decode_many(encode_many(self.msgs, SerialFormats.JSON, framed=True)[:-1], SerialFormats.JSON)
+
+    def test_executor(self):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            encoded = encode_many(self.msgs, SerialFormats.MSGPACK, executor=pool, chunk_size=2)
+            self.assertEqual(encode_many(self.msgs, SerialFormats.MSGPACK), encoded)
+            self.assertEqual(self.msgs, decode_many(encoded, SerialFormats.MSGPACK, executor=pool, chunk_size=2))
+            framed = encode_many(self.msgs, SerialFormats.CBOR, framed=True, executor=pool, chunk_size=4)
+            self.assertEqual(self.msgs, decode_many(framed, SerialFormats.CBOR, executor=pool, chunk_size=4))
+
+
+    def test_options(self):
+        schema_obj = Schema.parse_file(f"{self._test_root}/schema/{schema}.jadn")
+        msgs = [NativeBinary.msg] * 3
+        for kwargs in ({"schema": schema_obj}, {"compression": Compression.ZLIB}, {"schema": schema_obj, "compression": Compression.LZMA}):
+            encoded = encode_many(msgs, SerialFormats.CBOR, raw=True, **kwargs)
+            self.assertEqual([encode_msg(m, SerialFormats.CBOR, raw=True, **kwargs) for m in msgs], encoded, kwargs)
+            self.assertEqual(msgs, decode_many(encoded, SerialFormats.CBOR, raw=True, **kwargs), kwargs)
+
+
+class Normalize(TestCase):
+    def test_unchanged_not_copied(self):
+        msg = {"action": "query", "target": {"features": ["versions", "pairs"]}, "args": {"duration": 1.5, "flag": True}}
+        self.assertIs(msg, default_encode(msg))
+        self.assertIs(msg, decode_msg(msg, SerialFormats.JSON))
+
+    def test_changed(self):
+        msg = {"blob": b"data", "items": ("a", b"b"), "nested": [{"key": b"val"}], "same": ["x"]}
+        encoded = default_encode(msg, {bytes: bytes.decode})
+        self.assertEqual({"blob": "data", "items": ("a", "b"), "nested": [{"key": "val"}], "same": ["x"]}, encoded)
+        self.assertIs(msg["same"], encoded["same"])
+        self.assertEqual(b"data", msg["blob"], "original message was modified")
+
+    def test_subclasses(self):
+        class Text(str):
+            pass
+
+        class Mapping(dict):
+            pass
+        encoded = default_encode(Mapping(key=Text("val"), other=Mapping(a=1)))
+        self.assertIs(type(encoded), dict)
+        self.assertIs(type(encoded["key"]), str)
+        self.assertIs(type(encoded["other"]), dict)
+        self.assertEqual({"key": "val", "other": {"a": 1}}, encoded)
+
+    def test_none(self):
+        self.assertEqual({"from": "None", "to": ["None"]}, default_encode({"from": None, "to": [None]}))
+
+
+class DefaultHeaders(TestCase):
+    _test_root = os.path.join(os.path.abspath(os.path.dirname(__file__)))
+    content = {"action": "query", "target": {"features": ["versions"]}}
+    # decoding fails regardless of the headers, see the skipped `Messages` tests
+    _broken_decode = {SerialFormats.BENCODE, SerialFormats.S_EXPRESSION, SerialFormats.SMILE}
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._schema_obj = Schema.parse_file(f"{cls._test_root}/schema/{schema}.jadn")
+
+    def test_roundtrip_formats(self):
+        for fmt in map(SerialFormats, serializations.encode):
+            with self.subTest(fmt=fmt.name):
+                # no origin or recipients are set
+                msg = Message(content=self.content, content_type=fmt, msg_type=MessageType.Request)
+                encoded = msg.serialize(schema=self._schema_obj)
+                if fmt in self._broken_decode:
+                    continue
+                loaded = Message.oc2_loads(encoded, fmt, schema=self._schema_obj)
+                self.assertEqual(msg.request_id, loaded.request_id)
+                self.assertEqual(self.content, loaded.content)
+                self.assertEqual(None if fmt in null_types else "None", loaded.origin)
+
+
+class Transfer(TestCase):
+    msg = {"headers": {"request_id": str(uuid.uuid4()), "created": 1600000000000}, "body": {"openc2": {"request": {"action": "query", "target": {"features": []}}}}}
+
+    def test_base64_detection(self):
+        self.assertEqual(b"data", fromBase64("ZGF0YQ=="))
+        self.assertEqual(b"data", fromBase64(memoryview(b"ZGF0YQ==")))
+        for value in ("ZGF0YQ=", "{\"a\": 1}", "ZGF0Y\u00e9==", b"\xA1\x00\x00\x00", "", 1):
+            self.assertIsNone(fromBase64(value))
+            self.assertFalse(isBase64(value))
+
+    def test_transfer_encodings(self):
+        raw = encode_msg(self.msg, SerialFormats.CBOR, raw=True)
+        safe = encode_msg(self.msg, SerialFormats.CBOR)
+        self.assertEqual(self.msg, decode_msg(raw, SerialFormats.CBOR, transfer_encoding=TransferEncoding.RAW))
+        self.assertEqual(self.msg, decode_msg(safe, SerialFormats.CBOR, transfer_encoding=TransferEncoding.BASE64))
+        self.assertEqual(self.msg, decode_msg(safe, SerialFormats.CBOR, transfer_encoding="auto"))
+        self.assertEqual(self.msg, decode_msg(raw, SerialFormats.CBOR))
+        # explicit raw never attempts base64 decoding
+        self.assertNotEqual(self.msg, decode_msg(safe, SerialFormats.CBOR, transfer_encoding=TransferEncoding.RAW))
+
+    def test_oc2_loads(self):
+        safe = encode_msg(self.msg, SerialFormats.MSGPACK)
+        for lazy in (False, True):
+            msg = Message.oc2_loads(safe, SerialFormats.MSGPACK, lazy=lazy, transfer_encoding=TransferEncoding.BASE64)
+            self.assertEqual(self.msg["body"]["openc2"]["request"], msg.content)
+
+
+class SchemaCbor(TestCase):
+    _test_root = os.path.join(os.path.abspath(os.path.dirname(__file__)))
+    content = {"action": "deny", "target": {"ipv4_connection": {"src_addr": "10.0.0.0/8", "dst_port": 443, "protocol": "tcp"}}, "args": {"duration": 500}}
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._schema_obj = Schema.parse_file(f"{cls._test_root}/schema/{schema}.jadn")
+
+    def _message(self) -> Message:
+        return Message(content=self.content, content_type=SerialFormats.CBOR_SCHEMA, msg_type=MessageType.Request, request_id=uuid.uuid4())
+
+    def test_roundtrip(self):
+        msg = self._message()
+        encoded = msg.oc2_message(serialize=True, schema=self._schema_obj)
+        self.assertLess(len(encoded), len(encode_msg(msg.oc2_message(), SerialFormats.CBOR, raw=True)))
+        for lazy in (False, True):
+            self.assertEqual(self.content, Message.oc2_loads(encoded, SerialFormats.CBOR_SCHEMA, lazy=lazy, schema=self._schema_obj).content)
+
+    def test_custom_types(self):
+        ping = Schema(**{"types": [["Ping", "Record", [], "", [[1, "count", "Integer", [], ""], [2, "label", "String", ["[0"], ""]]]]})
+        serializer = schema_cbor.SchemaCBOR(ping, {"notification": "Ping"})
+        self.assertEqual({"notification": "Ping"}, serializer.types)
+        msg = {"headers": {}, "body": {"openc2": {"notification": {"count": 3, "label": "pings"}}}}
+        encoded = encode_msg(msg, SerialFormats.CBOR_SCHEMA, raw=True, schema=serializer)
+        self.assertEqual([3, "pings"], cbor2.loads(encoded)["body"]["openc2"]["notification"])
+        self.assertEqual(msg, decode_msg(encoded, SerialFormats.CBOR_SCHEMA, raw=True, schema=serializer))
+        # each call carries its own schema, other schemas are unaffected
+        self.assertEqual(self.content, Message.oc2_loads(self._message().serialize(schema=self._schema_obj), SerialFormats.CBOR_SCHEMA, schema=self._schema_obj).content)
+
+    def test_binary_values(self):
+        content = {"action": "query", "target": {"file": {"hashes": {"md5": "0123456789ABCDEF0123456789ABCDEF"}}}}
+        encoded = self._schema_obj.encode(content, "OpenC2-Command", "compact", binary=True)
+        self.assertEqual(bytes.fromhex(content["target"]["file"]["hashes"]["md5"]), encoded[1][10][3][1])
+        self.assertEqual(content, self._schema_obj.decode(encoded, "OpenC2-Command"))
+        encoded = self._schema_obj.encode(self.content, "OpenC2-Command", "compact", binary=True)
+        self.assertEqual([b"\x0a\x00\x00\x00", 8], encoded[1][15][0])
+        self.assertEqual(self.content, self._schema_obj.decode(encoded, "OpenC2-Command"))
+
+    def test_no_schema(self):
+        with self.assertRaises(ReferenceError):
+            self._message().oc2_message(serialize=True)
+
+
+class NativeBinary(TestCase):
+    _test_root = os.path.join(os.path.abspath(os.path.dirname(__file__)))
+    msg = {"headers": {"request_id": str(uuid.uuid4())}, "body": {"openc2": {"request": {"action": "query", "target": {"file": {"hashes": {"sha256": "AB" * 32}}}}}}}
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._schema_obj = Schema.parse_file(f"{cls._test_root}/schema/{schema}.jadn")
+
+    def test_binary_formats(self):
+        for fmt in (SerialFormats.BINN, SerialFormats.BSON, SerialFormats.CBOR, SerialFormats.ION, SerialFormats.MSGPACK, SerialFormats.UBJSON):
+            encoded = encode_msg(self.msg, fmt, raw=True, schema=self._schema_obj)
+            # the 32 byte hash is stored as is rather than as 64 characters of hex
+            self.assertLess(len(encoded), len(encode_msg(self.msg, fmt, raw=True)) - 24, fmt)
+            self.assertEqual(self.msg, decode_msg(encoded, fmt, raw=True, schema=self._schema_obj), fmt)
+
+    def test_text_formats(self):
+        encoded = encode_msg(self.msg, SerialFormats.JSON, schema=self._schema_obj)
+        self.assertEqual(encode_msg(self.msg, SerialFormats.JSON), encoded)
+        self.assertEqual(self.msg, decode_msg(encoded, SerialFormats.JSON, schema=self._schema_obj))
+
+
+class XmlCodec(TestCase):
+    msg = {
+        "headers": {"request_id": str(uuid.uuid4()), "created": 1600000000000},
+        "body": {"openc2": {"request": {"action": "query", "target": {"features": ["versions", "pairs"]}, "args": {"duration": 1.5, "flag": True, "none": None}}}}
+    }
+
+    def test_roundtrip(self):
+        encoded = encode_msg(self.msg, SerialFormats.XML)
+        self.assertTrue(encoded.startswith('<?xml version="1.0" encoding="utf-8"?>'))
+        self.assertEqual(self.msg, decode_msg(encoded, SerialFormats.XML, raw=True))
+
+    def test_short_lists(self):
+        msg = {"headers": {"request_id": "r1"}, "body": {"features": ["versions"], "profiles": [], "targets": [{"file": None}]}}
+        encoded = encode_msg(msg, SerialFormats.XML)
+        self.assertEqual(msg, decode_msg(encoded, SerialFormats.XML, raw=True))
+
+    def test_attributes(self):
+        msg = decode_msg('<message><body count="2"><id>007</id><id>x</id></body></message>', SerialFormats.XML, raw=True)
+        self.assertEqual({"body": {"id": [7, "x"], "count": 2}}, msg)
+        with self.assertRaises(KeyError):
+            decode_msg('<message id="1"><id>2</id></message>', SerialFormats.XML, raw=True)
+
+    def test_stream(self):
+        msgs = [self.msg, {"headers": {"request_id": "r2"}, "body": {"openc2": {"response": {"status": 200}}}}] * 50
+        with tempfile.TemporaryFile() as fp:
+            self.assertEqual(len(msgs), xml_dump_stream(iter(msgs), fp))
+            fp.seek(0)
+            self.assertEqual(msgs, list(xml_load_stream(fp)))
+
+
+class Compressed(TestCase):
+    _test_root = os.path.join(os.path.abspath(os.path.dirname(__file__)))
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.dictionary = compression.schema_dictionary(Schema.parse_file(f"{cls._test_root}/schema/{schema}.jadn"))
+        compression.register_dictionary(cls.dictionary)
+
+    def setUp(self):
+        self.msg = Message(origin="producer1@orchestrator1", content={"action": "query", "target": {"features": ["pairs", "versions"]}})
+
+    def test_record(self):
+        plain = self.msg.dumps()
+        for comp in Compression:
+            record = self.msg.dumps(comp, self.dictionary if comp == Compression.ZLIB else None)
+            self.assertEqual(self.msg.content, Message.loads(record).content, comp)
+            self.assertEqual(self.msg.content, Message.loads(record, lazy=True).content, comp)
+        # the dictionary makes small messages smaller
+        self.assertLess(len(self.msg.dumps(Compression.ZLIB, self.dictionary)), len(self.msg.dumps(Compression.ZLIB)))
+        self.assertLess(len(self.msg.dumps(Compression.ZLIB, self.dictionary)), len(plain))
+
+    def test_stream(self):
+        buffer = io.BytesIO()
+        MessageWriter(buffer, Compression.ZLIB, self.dictionary).write_many([self.msg] * 3)
+        self.assertEqual([self.msg.content] * 3, [m.content for m in MessageReader(buffer.getvalue())])
+
+    def test_serialize(self):
+        dictionary = compression.schema_dictionary(Schema.parse_file(f"{self._test_root}/schema/{schema}.jadn"), SerialFormats.JSON)
+        encoded = self.msg.serialize(Compression.ZLIB, dictionary)
+        # compressing does not register the dictionary, the receiver does
+        with self.assertRaises(KeyError):
+            Message.oc2_loads(encoded, SerialFormats.JSON, compression=Compression.ZLIB)
+        compression.register_dictionary(dictionary)
+        self.assertEqual(self.msg.content, Message.oc2_loads(encoded, SerialFormats.JSON, compression=Compression.ZLIB).content)
+        encoded = encode_msg(self.msg.oc2_message(), SerialFormats.CBOR, compression=Compression.LZMA)
+        self.assertEqual(self.msg.oc2_message(), decode_msg(encoded, SerialFormats.CBOR, compression=Compression.LZMA))
+
+    def test_store(self):
+        # the store reads its own messages, it registers its dictionary
+        dictionary = compression.schema_dictionary(Schema.parse_file(f"{self._test_root}/schema/{schema}.jadn"), SerialFormats.MSGPACK)
+        with tempfile.TemporaryDirectory() as tmp:
+            with MessageStore(tmp, compression=Compression.ZLIB, dictionary=dictionary) as store:
+                entry = store.append(self.msg)
+                self.assertEqual(self.msg.content, store.read(entry).content)
+
+    def test_unknown_dictionary(self):
+        compressor = zlib.compressobj(zdict=b"unregistered dictionary")
+        data = compressor.compress(b"data") + compressor.flush()
+        with self.assertRaises(KeyError):
+            compression.decompress(data, Compression.ZLIB)
@@ -2,15 +2,90 @@
 Test JADN Schema transformations
 Transformation -> Reduce Complexity
 """
+import json
+import os
+import shutil
+import tempfile
+
 from unittest import TestCase, skip
-from jadnschema import jadn
+from jadnschema import Schema, jadn
+from jadnschema.exceptions import SchemaException
 from jadnschema.schema.consts import EXTENSIONS
+from jadnschema.schema.extensions import unfold_extensions
+from jadnschema.schema.resolve import load_package, resolve_imports
 
 
 class Resolve(TestCase):
-    schema = {}  # TODO: test Merge imported definitions
+    packages = {
+        'lang.jadn': {
+            'info': {'package': 'http://example.com/lang', 'namespaces': {'base': 'http://example.com/base'}},
+            'types': [
+                ['Target', 'Choice', [], '', [
+                    [1, 'addr', 'base:IPv4-Addr', [], ''],
+                    [2, 'names', 'Names', [], '']
+                ]],
+                ['Names', 'ArrayOf', ['*base:Name'], ''],
+                ['Unused', 'String', [], '']
+            ]
+        },
+        'base.jadn': {
+            'info': {'package': 'http://example.com/base'},
+            'types': [
+                ['IPv4-Addr', 'Binary', ['/ipv4-addr'], ''],
+                ['Name', 'String', [], '']
+            ]
+        }
+    }
+    schema = {
+        'info': {'package': 'http://example.com/profile', 'namespaces': {'ls': 'http://example.com/lang'}},
+        'types': [
+            ['Command', 'Record', [], '', [
+                [1, 'target', 'ls:Target', [], ''],
+                [2, 'targets', 'Targets', [], '']
+            ]],
+            ['Targets', 'ArrayOf', ['*ls:Target'], '']
+        ]
+    }
+
+    def setUp(self):
+        self.repository = tempfile.mkdtemp()
+        for fname, package in self.packages.items():
+            with open(os.path.join(self.repository, fname), 'w') as f:
+                json.dump(package, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.repository)
+
+    def test_resolve(self):
+        schema = Schema.loads(self.schema, self.repository)
+        self.assertEqual(list(schema.types), ['Command', 'Targets', 'ls:Target', 'base:IPv4-Addr', 'ls:Names', 'base:Name'])
+        self.assertEqual(schema.types['ls:Target'].schema()[4][0][2], 'base:IPv4-Addr')
+        schema.validate_as('Command', {'target': {'names': ['a', 'b']}, 'targets': [{'names': ['c']}]})
 
-    # def test_resolve(self):
+    def test_resolve_shared(self):
+        first = resolve_imports(self.schema, self.repository)
+        second = resolve_imports(self.schema, self.repository)
+        self.assertIs(first['types'][2], second['types'][2])
+        # the shared definitions are frozen, they are copied to be edited
+        with self.assertRaises(TypeError):
+            first['types'][2][4][0] = [1, 'addr', 'String', [], '']
+        schema = Schema.loads(first)
+        target = first['types'][2]
+        schema.update_type([*target[:4], [[1, 'addr', 'String', [], ''], target[4][1]]])
+        self.assertEqual(schema.types['ls:Target'].schema()[4][0][2], 'String')
+        self.assertEqual(resolve_imports(self.schema, self.repository)['types'][2][4][0][2], 'base:IPv4-Addr')
+
+    def test_resolve_invalid_package(self):
+        with open(os.path.join(self.repository, 'broken.jadn'), 'w') as f:
+            f.write('{"info": ')
+        self.assertEqual(list(Schema.loads(self.schema, self.repository).types)[2], 'ls:Target')
+        with self.assertRaisesRegex(SchemaException, 'broken.jadn'):
+            load_package(os.path.join(self.repository, 'broken.jadn'))
+
+    def test_resolve_missing(self):
+        os.remove(os.path.join(self.repository, 'base.jadn'))
+        with self.assertRaises(SchemaException):
+            resolve_imports(self.schema, self.repository)
 
 
 class StripComments(TestCase):
@@ -257,6 +332,11 @@ class UnfoldExtensions(TestCase):
     def test_multiplicity_all(self):
         self.do_unfold_test(self.schema_mult_folded, self.schema_mult_unfolded)
 
+    def test_multiplicity_plurals(self):
+        types = unfold_extensions(self.schema_mult_folded['structures'], '$', plurals={'list': 'lists'})
+        self.assertEqual([t[0] for t in types if t[1] == 'ArrayOf'], ['T-list-1-2$Lists', 'T-list-0-2$Lists', 'T-list-2-3$Lists', 'T-list-1-n$Lists'])
+        self.assertEqual(types[1][4][1][2], 'T-list-1-2$Lists')
+
     """
     Derived Enumeration Extension
     """
@@ -470,6 +550,20 @@ class UnfoldExtensions(TestCase):
     def test_pointer_all(self):
         self.do_unfold_test(self.schema_pointer_folded, self.schema_pointer_unfolded)
 
+    def test_pointer_nested(self):
+        types = [
+            ['Root', 'Record', [], '', [[1, 'a', 'String', [], ''], [2, 'b', 'Branch', ['<'], '']]],
+            ['Branch', 'Record', [], '', [[1, 'c', 'Leaf', ['<'], ''], [2, 'd', 'Leaf', ['<'], '']]],
+            ['Leaf', 'Record', [], '', [[1, 'x', 'String', [], ''], [2, 'y', 'String', [], '']]],
+            ['Paths', 'Enumerated', ['>Root'], '', []]
+        ]
+        paths = unfold_extensions(types, '$')[3]
+        self.assertEqual([f[1] for f in paths[4]], ['a', 'b/c/x', 'b/c/y', 'b/d/x', 'b/d/y'])
+
+        types[2][4].append([3, 'z', 'Root', ['<'], ''])
+        with self.assertRaisesRegex(SchemaException, 'Root -> Branch -> Leaf -> Root'):
+            unfold_extensions(types, '$')
+
     """
     Link Extension
     """
@@ -536,3 +630,10 @@ class UnfoldExtensions(TestCase):
 
     def test_link_all(self):
         self.do_unfold_test(self.schema_link_folded, self.schema_link_unfolded_all)
+
+    def test_link_types(self):
+        def normalize(types):  # options are unordered & fields are optional
+            return [[name, type_, sorted(opts), desc, *(fields or [[]])] for name, type_, opts, desc, *fields in types]
+
+        types = unfold_extensions(self.schema_link_folded['structures'], '$')
+        self.assertEqual(normalize(types), normalize(self.schema_link_unfolded_all['structures']))
@@ -1,8 +1,14 @@
+import json
 import os
+import re
+import shutil
+import subprocess
+import tempfile
 
-from unittest import TestCase, skip
+from unittest import TestCase, skip, skipUnless
 from pydantic import ValidationError
 from jadnschema import Schema
+from jadnschema.convert.schema.writers.proto import proto_dumps
 
 CMD_TYPE = "OpenC2-Command"
 RSP_TYPE = "OpenC2-Response"
@@ -119,3 +125,115 @@ class ResponseValidation(TestCase):
                 ]
             }
         })
+
+
+class Encoding(TestCase):
+    _test_root = os.path.join(os.path.abspath(os.path.dirname(__file__)))
+    _schema = f"{_test_root}/schema/oc2ls-v1.1-lang_resolved.jadn"
+    command = {"action": "query", "target": {"features": ["pairs", "versions"]}, "args": {"response_requested": "complete"}}
+    response = {"status": 200, "results": {"pairs": {"scan": ["file"], "query": ["features"]}}}
+    types = Schema(types=[
+        ["Color", "Enumerated", [], "", [[1, "red", ""], [2, "green", ""]]],
+        ["Tagged", "Choice", ["="], "", [[1, "name", "String", [], ""], [2, "color", "Color", [], ""]]],
+        ["Shape", "Record", [], "", [
+            [1, "color", "Color", [], ""],
+            [2, "sides", "Integer", ["[0"], ""],
+            [3, "tags", "String", ["[0", "]0"], ""],
+            [4, "field", "Enumerated", ["#Shape", "[0"], ""]
+        ]],
+        ["Counts", "MapOf", ["+Integer", "*Color"], ""]
+    ])
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._schema_obj = Schema.parse_file(cls._schema)
+
+    def test_styles(self):
+        self.assertEqual(self.command, self._schema_obj.encode(self.command, CMD_TYPE))
+        self.assertEqual([3, {9: [3, 1]}, {4: 3}], self._schema_obj.encode(self.command, CMD_TYPE, "compact"))
+        self.assertEqual(["query", {"features": ["pairs", "versions"]}, {"response_requested": "complete"}], self._schema_obj.encode(self.command, CMD_TYPE, "concise"))
+
+    def test_roundtrip(self):
+        for style in ("verbose", "compact", "concise"):
+            for type_, value in ((CMD_TYPE, self.command), (RSP_TYPE, self.response)):
+                encoded = json.loads(json.dumps(self._schema_obj.encode(value, type_, style)))
+                self.assertEqual(value, self._schema_obj.decode(encoded, type_), f"{type_} {style} roundtrip failed")
+
+    def test_validate_compact(self):
+        self._schema_obj.validate_as(CMD_TYPE, {"1": 3, "2": {"9": [3]}})
+
+    def test_options(self):
+        shape = {"color": "green", "tags": ["a", "b"], "field": "sides"}
+        self.assertEqual([2, None, ["a", "b"], 2], self.types.encode(shape, "Shape", "compact"))
+        self.assertEqual(shape, self.types.decode([2, None, ["a", "b"], 2], "Shape"))
+        # Choice.ID keys are IDs in all styles
+        self.assertEqual({2: "green"}, self.types.encode({2: "green"}, "Tagged"))
+        self.assertEqual({2: 2}, self.types.encode({2: "green"}, "Tagged", "compact"))
+        self.assertEqual({2: "green"}, self.types.decode({"2": 2}, "Tagged"))
+        # MapOf with keys that are not strings is an array of keys and values
+        self.assertEqual([1, 1, 5, 2], self.types.encode({1: "red", 5: "green"}, "Counts", "compact"))
+        self.assertEqual({1: "red", 5: "green"}, self.types.decode([1, 1, 5, 2], "Counts"))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.types.encode({"color": "blue"}, "Shape")
+        with self.assertRaises(ValueError):
+            self.types.encode({"colour": "red"}, "Shape")
+        with self.assertRaises(ValueError):
+            self.types.decode([1, 2, [], 1, 5], "Shape")
+        with self.assertRaises(ValueError):
+            self.types.encode({1: "a", 2: "red"}, "Tagged")
+
+
+class Protobuf(TestCase):
+    _test_root = os.path.join(os.path.abspath(os.path.dirname(__file__)))
+    _schema = f"{_test_root}/schema/oc2ls-v1.1-lang_resolved.jadn"
+    commands = [
+        {"action": "deny", "target": {"ipv4_connection": {"src_addr": "10.0.0.0/8", "dst_port": 443, "protocol": "tcp"}}, "args": {"duration": 500}},
+        {"action": "query", "target": {"features": ["versions", "pairs"]}},
+        {"action": "query", "target": {"file": {"hashes": {"md5": "0123456789ABCDEF0123456789ABCDEF"}}}}
+    ]
+    response = {"status": 200, "results": {"pairs": {"query": ["features"], "deny": ["ipv4_net", "file"]}, "versions": ["1.0"], "args": ["duration"]}}
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._schema_obj = Schema.parse_file(cls._schema)
+
+    def test_wire_format(self):
+        # action = 3 (varint field 1), target = {features = [1, 3]} (message field 2 of the Features message field 9,
+        # a packed enum field 1)
+        self.assertEqual(bytes.fromhex("0803 1206 4a04 0a020103"), self._schema_obj.protobuf.encode(self.commands[1], CMD_TYPE))
+        # status = 200, as a two byte varint
+        self.assertEqual(bytes.fromhex("08c801"), self._schema_obj.protobuf.encode({"status": 200}, RSP_TYPE))
+
+    def test_roundtrip(self):
+        codec = self._schema_obj.protobuf
+        self.assertIs(codec, self._schema_obj.protobuf)
+        for cmd in self.commands:
+            self.assertEqual(cmd, codec.decode(codec.encode(cmd, CMD_TYPE), CMD_TYPE))
+        self.assertEqual(self.response, codec.decode(codec.encode(self.response, RSP_TYPE), RSP_TYPE))
+
+    @skipUnless(shutil.which("protoc"), "protoc is not installed")
+    def test_proto_schema(self):
+        # the generated .proto decodes the encoded messages & its encoding decodes to the same instances
+        codec = self._schema_obj.protobuf
+        proto = proto_dumps(self._schema_obj)
+        package = re.search(r"^package (.+);$", proto, re.MULTILINE).group(1)
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "schema.proto"), "w", encoding="UTF-8") as f:
+                f.write(proto)
+
+            def protoc(mode: str, msg_type: str, data: bytes) -> bytes:
+                args = ["protoc", f"--proto_path={tmp}", f"--{mode}={package}.{msg_type.replace('-', '_')}", "schema.proto"]
+                return subprocess.run(args, input=data, capture_output=True, check=True).stdout
+
+            for msg, msg_type in [*((c, CMD_TYPE) for c in self.commands), (self.response, RSP_TYPE)]:
+                text = protoc("decode", msg_type, codec.encode(msg, msg_type))
+                self.assertEqual(msg, codec.decode(protoc("encode", msg_type, text), msg_type))
+
+    def test_invalid(self):
+        codec = self._schema_obj.protobuf
+        with self.assertRaises(ValueError):
+            codec.encode({"action": "unknown"}, CMD_TYPE)
+        with self.assertRaises(ValueError):
+            codec.decode(b"\x12\x05\x4a", CMD_TYPE)